@@ -0,0 +1,111 @@
+"""Compare file size, insert time and scan throughput of a log table
+stored uncompressed and with each column compression codec.
+
+    python -m benchmarks.compression_benchmark --directory /tmp --rows 200000
+
+Each configuration is written to its own database file. The scan reads
+every row through SQLiteDatabase.select_batches, so it includes
+decompression.
+"""
+import argparse
+import json
+import os
+import pathlib
+import random
+import time
+from typing import Optional
+
+from sqlite_tables.column import IntColumn, TextColumn
+from sqlite_tables.compression import zstandard
+from sqlite_tables.database import SQLiteDatabase
+from sqlite_tables.enums import SQLiteCompression
+from sqlite_tables.table import SQLiteTable
+
+
+SERVICES = ('checkout', 'search', 'accounts', 'inventory')
+LEVELS = ('debug', 'info', 'warning', 'error')
+DICTIONARY = json.dumps({
+    'level': 'info', 'service': 'checkout', 'message': 'request finished',
+    'status': 200, 'duration_ms': 12, 'path': '/api/v1/',
+}).encode('utf-8')
+
+
+def make_message(i: int) -> str:
+    return json.dumps({
+        'level': random.choice(LEVELS),
+        'service': random.choice(SERVICES),
+        'message': 'request finished',
+        'status': random.choice((200, 200, 200, 404, 500)),
+        'duration_ms': random.randrange(1000),
+        'path': f'/api/v1/items/{i}',
+    })
+
+
+def make_table(
+    compression: Optional[SQLiteCompression],
+    dictionary: Optional[bytes] = None,
+) -> SQLiteTable:
+    return SQLiteTable(
+        'logs',
+        columns=(
+            IntColumn('id', is_primary_key=True),
+            TextColumn(
+                'message',
+                compression=compression,
+                compression_dictionary=dictionary,
+            ),
+        ),
+    )
+
+
+def run(path: pathlib.Path, table: SQLiteTable, rows: int) -> dict:
+    if path.exists():
+        path.unlink()
+    db = SQLiteDatabase(str(path), tables=(table,))
+    db.do_creation()
+    random.seed(0)
+    start = time.perf_counter()
+    db.insert_many(
+        'logs', ['id', 'message'], ((i, make_message(i)) for i in range(rows))
+    )
+    insert_time = time.perf_counter() - start
+    db.connection.execute('VACUUM')
+    start = time.perf_counter()
+    scanned = sum(len(batch) for batch in db.select_batches('logs'))
+    scan_time = time.perf_counter() - start
+    db.connection.close()
+    return {
+        'file_mb': os.path.getsize(path) / (1 << 20),
+        'insert_seconds': insert_time,
+        'rows_per_sec': scanned / scan_time,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--directory', type=pathlib.Path, default=pathlib.Path('.'))
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+    configurations = [
+        ('none', make_table(None)),
+        ('zlib', make_table(SQLiteCompression.ZLIB)),
+        ('zlib+dict', make_table(SQLiteCompression.ZLIB, DICTIONARY)),
+        ('lzma', make_table(SQLiteCompression.LZMA)),
+    ]
+    if zstandard is not None:
+        configurations.append(('zstd', make_table(SQLiteCompression.ZSTD)))
+        configurations.append(
+            ('zstd+dict', make_table(SQLiteCompression.ZSTD, DICTIONARY))
+        )
+    for name, table in configurations:
+        path = args.directory / f'compression_bench_{name.replace("+", "_")}.db'
+        result = run(path, table, args.rows)
+        print(
+            f"{name:>10} size={result['file_mb']:>9.1f}MB "
+            f"insert={result['insert_seconds']:.2f}s "
+            f"scan={result['rows_per_sec']:>10.0f} rows/s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compare random primary key lookups and full table scans with and
+without memory-mapped I/O.
+
+    python -m benchmarks.mmap_benchmark --path /tmp/bench.db --size-gb 2
+
+The database file is built on first run and reused afterwards; drop the
+OS page cache between runs for cold-cache numbers.
+"""
+import argparse
+import os
+import pathlib
+import random
+import time
+
+from sqlite_tables.column import IntColumn, TextColumn
+from sqlite_tables.database import SQLiteDatabase
+from sqlite_tables.table import SQLiteTable
+
+
+PAYLOAD_SIZE = 1024
+TABLE = SQLiteTable(
+    'bench',
+    columns=(
+        IntColumn('id', is_primary_key=True),
+        TextColumn('payload'),
+    ),
+)
+
+
+def build(path: pathlib.Path, rows: int) -> None:
+    db = SQLiteDatabase(str(path), tables=(TABLE,), page_size=4096)
+    db.do_creation()
+    payload = 'x' * PAYLOAD_SIZE
+    with db.connection:
+        db.connection.executemany(
+            'INSERT INTO bench (id, payload) VALUES (?, ?)',
+            ((i, payload) for i in range(rows)),
+        )
+    db.connection.close()
+
+
+def run(path: pathlib.Path, rows: int, lookups: int, mmap_size: int) -> dict:
+    db = SQLiteDatabase(str(path), tables=(TABLE,), mmap_size=mmap_size)
+    db.connection.row_factory = None
+    keys = [random.randrange(rows) for _ in range(lookups)]
+    start = time.perf_counter()
+    for key in keys:
+        db.connection.execute(
+            'SELECT payload FROM bench WHERE id = ?', (key,)
+        ).fetchone()
+    lookup_time = time.perf_counter() - start
+    start = time.perf_counter()
+    db.connection.execute('SELECT SUM(LENGTH(payload)) FROM bench').fetchone()
+    scan_time = time.perf_counter() - start
+    settings = db.get_storage_settings()
+    db.connection.close()
+    return {
+        'mmap_size': settings['mmap_size'],
+        'lookups_per_sec': lookups / lookup_time,
+        'scan_seconds': scan_time,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', type=pathlib.Path, default='mmap_bench.db')
+    parser.add_argument('--size-gb', type=float, default=2.0)
+    parser.add_argument('--lookups', type=int, default=200000)
+    args = parser.parse_args()
+    rows = int(args.size_gb * (1 << 30) / PAYLOAD_SIZE)
+    if not args.path.exists():
+        build(args.path, rows)
+    file_size = os.path.getsize(args.path)
+    for mmap_size in (0, file_size):
+        result = run(args.path, rows, args.lookups, mmap_size)
+        print(
+            f"mmap_size={result['mmap_size']:>12} "
+            f"lookups/s={result['lookups_per_sec']:>12.0f} "
+            f"scan={result['scan_seconds']:.3f}s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+from typing import (
+    Generator,
+    List,
+    Tuple,
+    Union,
+)
+
+from .exceptions import InvalidTableConfiguration
+from .column import (
+    SQLiteColumn,
+    IntColumn,
+    NumericColumn,
+)
+from .table import SQLiteTable
+from .utils import SQLiteTemplate
+
+
+class SQLiteAggregate(object):
+    """A summary of a table grouped by some of its columns, kept current
+    by triggers. Minimums and maximums are recomputed from an index on
+    (group_by..., column) when a row leaves its group.
+    """
+    create_group_template = SQLiteTemplate(
+        'INSERT INTO $summary_table ($group_names) SELECT $group_values '
+        'WHERE NOT EXISTS (SELECT 1 FROM $summary_table WHERE $group_match)'
+    )
+    update_group_template = SQLiteTemplate(
+        'UPDATE $summary_table SET $assignments WHERE $group_match'
+    )
+    drop_group_template = SQLiteTemplate(
+        'DELETE FROM $summary_table WHERE $group_match AND row_count = 0'
+    )
+    backfill_template = SQLiteTemplate(
+        'INSERT INTO $summary_table ($summary_names) SELECT * FROM ('
+        'SELECT $aggregates FROM $table_name $group_clause) '
+        'WHERE row_count > 0 AND NOT EXISTS (SELECT 1 FROM $summary_table)'
+    )
+    recompute_template = SQLiteTemplate(
+        '$func($column_name) FROM $table_name WHERE $group_match'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        group_by: Union[Tuple[str, ...], List[str]] = (),
+        sum_columns: Union[Tuple[str, ...], List[str]] = (),
+        min_columns: Union[Tuple[str, ...], List[str]] = (),
+        max_columns: Union[Tuple[str, ...], List[str]] = (),
+    ) -> None:
+        self.name = name
+        self.group_by = tuple(group_by)
+        self.sum_columns = tuple(sum_columns)
+        self.min_columns = tuple(min_columns)
+        self.max_columns = tuple(max_columns)
+
+    def __repr__(self) -> str:
+        template = (
+            '{!s}({!r}, group_by={!r}, sum_columns={!r}, min_columns={!r}, '
+            'max_columns={!r})'
+        )
+        return template.format(
+            self.__class__.__name__,
+            self.name,
+            self.group_by,
+            self.sum_columns,
+            self.min_columns,
+            self.max_columns,
+        )
+
+    def __str__(self) -> str:
+        return '<{!s}: {!r}>'.format(self.__class__.__name__, self.name)
+
+    def get_summary_table_name(self, table: SQLiteTable) -> str:
+        return f'{table.table_name}_{self.name}'
+
+    def get_source_columns(self) -> List[str]:
+        return list(dict.fromkeys(
+            self.group_by + self.sum_columns + self.min_columns + self.max_columns
+        ))
+
+    def validate(self, table: SQLiteTable) -> None:
+        for column_name in self.get_source_columns():
+            if column_name not in table.columns:
+                raise InvalidTableConfiguration(
+                    f'Aggregate "{self.name}" references unknown column '
+                    f'"{column_name}"'
+                )
+
+    def get_summary_columns(self, table: SQLiteTable) -> List[SQLiteColumn]:
+        self.validate(table)
+        columns = [
+            SQLiteColumn(name, table.columns[name].sqlite_type)
+            for name in self.group_by
+        ]
+        columns.append(IntColumn('row_count', default=0, allow_null=False))
+        columns.extend(
+            NumericColumn(f'sum_{name}', default=0, allow_null=False)
+            for name in self.sum_columns
+        )
+        for prefix, names in (('min', self.min_columns), ('max', self.max_columns)):
+            columns.extend(
+                SQLiteColumn(f'{prefix}_{name}', table.columns[name].sqlite_type)
+                for name in names
+            )
+        return columns
+
+    def get_summary_table(self, table: SQLiteTable) -> SQLiteTable:
+        return SQLiteTable(
+            self.get_summary_table_name(table),
+            columns=self.get_summary_columns(table),
+            raise_exists_error=table.raise_exists_error,
+        )
+
+    def schema_to_sql(self, table: SQLiteTable) -> Generator:
+        summary_table = self.get_summary_table(table)
+        yield summary_table.schema_to_sql()
+        if self.group_by:
+            yield table.index_template.substitute({
+                'exists': table.get_exists_sql(),
+                'index_name': f'{summary_table.table_name}_group',
+                'table_name': summary_table.table_name,
+                'column_names': ', '.join(self.group_by),
+            })
+        for column_name in dict.fromkeys(self.min_columns + self.max_columns):
+            column_names = self.group_by + (column_name,)
+            yield table.index_template.substitute({
+                'exists': table.get_exists_sql(),
+                'index_name': '_'.join((table.table_name,) + column_names),
+                'table_name': table.table_name,
+                'column_names': ', '.join(column_names),
+            })
+        yield self.backfill_to_sql(table)
+
+    def backfill_to_sql(self, table: SQLiteTable) -> str:
+        summary_table = self.get_summary_table(table)
+        aggregates = list(self.group_by)
+        aggregates.append('COUNT(*) AS row_count')
+        aggregates.extend(
+            f'coalesce(SUM({name}), 0) AS sum_{name}' for name in self.sum_columns
+        )
+        for func, names in (('min', self.min_columns), ('max', self.max_columns)):
+            aggregates.extend(
+                f'{func.upper()}({name}) AS {func}_{name}' for name in names
+            )
+        group_clause = ''
+        if self.group_by:
+            group_clause = f'GROUP BY {", ".join(self.group_by)}'
+        return self.backfill_template.substitute({
+            'summary_table': summary_table.table_name,
+            'summary_names': ', '.join(summary_table.columns),
+            'aggregates': ', '.join(aggregates),
+            'table_name': table.table_name,
+            'group_clause': group_clause,
+        })
+
+    def get_group_match_sql(self, prefix: str, qualifier: str = '') -> str:
+        if not self.group_by:
+            return '1'
+        return ' AND '.join(
+            f'{qualifier}{name} IS {prefix}.{name}' for name in self.group_by
+        )
+
+    def get_recompute_sql(
+        self,
+        table: SQLiteTable,
+        func: str,
+        column_name: str,
+    ) -> str:
+        expr = self.recompute_template.substitute({
+            'func': func.upper(),
+            'column_name': column_name,
+            'table_name': table.table_name,
+            'group_match': self.get_group_match_sql('old', f'{table.table_name}.'),
+        })
+        return f'{func}_{column_name} = (SELECT {expr})'
+
+    def add_row_sql(self, table: SQLiteTable, prefix: str) -> List[str]:
+        summary_table = self.get_summary_table_name(table)
+        group_match = self.get_group_match_sql(prefix)
+        assignments = ['row_count = row_count + 1']
+        assignments.extend(
+            f'sum_{name} = sum_{name} + coalesce({prefix}.{name}, 0)'
+            for name in self.sum_columns
+        )
+        for func, names in (('min', self.min_columns), ('max', self.max_columns)):
+            assignments.extend(
+                f'{func}_{name} = {func}(coalesce({func}_{name}, {prefix}.{name}), '
+                f'coalesce({prefix}.{name}, {func}_{name}))'
+                for name in names
+            )
+        return [
+            self.create_group_template.substitute({
+                'summary_table': summary_table,
+                'group_names': ', '.join(self.group_by) or 'row_count',
+                'group_values': ', '.join(
+                    f'{prefix}.{name}' for name in self.group_by
+                ) or '0',
+                'group_match': group_match,
+            }),
+            self.update_group_template.substitute({
+                'summary_table': summary_table,
+                'assignments': ', '.join(assignments),
+                'group_match': group_match,
+            }),
+        ]
+
+    def remove_row_sql(self, table: SQLiteTable) -> List[str]:
+        summary_table = self.get_summary_table_name(table)
+        group_match = self.get_group_match_sql('old')
+        assignments = ['row_count = row_count - 1']
+        assignments.extend(
+            f'sum_{name} = sum_{name} - coalesce(old.{name}, 0)'
+            for name in self.sum_columns
+        )
+        for func, names in (('min', self.min_columns), ('max', self.max_columns)):
+            assignments.extend(
+                self.get_recompute_sql(table, func, name) for name in names
+            )
+        return [
+            self.update_group_template.substitute({
+                'summary_table': summary_table,
+                'assignments': ', '.join(assignments),
+                'group_match': group_match,
+            }),
+            self.drop_group_template.substitute({
+                'summary_table': summary_table,
+                'group_match': group_match,
+            }),
+        ]
+
+    def triggers_to_sql(self, table: SQLiteTable) -> Generator:
+        self.validate(table)
+        trigger_name = self.get_summary_table_name(table)
+        events = [
+            ('insert', 'INSERT', self.add_row_sql(table, 'new')),
+            ('delete', 'DELETE', self.remove_row_sql(table)),
+        ]
+        source_columns = self.get_source_columns()
+        if source_columns:
+            events.append((
+                'update',
+                f'UPDATE OF {", ".join(source_columns)}',
+                self.remove_row_sql(table) + self.add_row_sql(table, 'new'),
+            ))
+        for suffix, event, statements in events:
+            yield table.trigger_template.substitute({
+                'trigger_name': f'{trigger_name}_{suffix}',
+                'when': 'AFTER',
+                'event': event,
+                'table_name': table.table_name,
+                'expr': '; '.join(statements),
+            })
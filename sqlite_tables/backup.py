@@ -0,0 +1,69 @@
+import sqlite3
+import time
+from typing import (
+    Callable,
+    NamedTuple,
+    Optional,
+)
+
+
+class SQLiteBackupProgress(NamedTuple):
+    remaining: int
+    total: int
+    elapsed: float
+
+    @property
+    def copied(self) -> int:
+        return self.total - self.remaining
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.copied / self.elapsed if self.elapsed else 0.0
+
+
+class SQLiteBackupResult(NamedTuple):
+    connection: sqlite3.Connection
+    pages: int
+    page_size: int
+    elapsed: float
+
+    @property
+    def bytes_copied(self) -> int:
+        return self.pages * self.page_size
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_copied / self.elapsed if self.elapsed else 0.0
+
+
+def backup_connection(
+    source: sqlite3.Connection,
+    target: sqlite3.Connection,
+    pages_per_step: int = 1024,
+    sleep: float = 0.0,
+    progress: Optional[Callable[[SQLiteBackupProgress], None]] = None,
+) -> SQLiteBackupResult:
+    """Copy source into target pages_per_step pages at a time, sleeping
+    between steps so that writers are not locked out.
+    """
+    start = time.perf_counter()
+    last_status = SQLiteBackupProgress(0, 0, 0.0)
+
+    def on_step(status: int, remaining: int, total: int) -> None:
+        nonlocal last_status
+        last_status = SQLiteBackupProgress(
+            remaining, total, time.perf_counter() - start
+        )
+        if progress is not None:
+            progress(last_status)
+        if sleep and remaining:
+            time.sleep(sleep)
+
+    source.backup(target, pages=pages_per_step, progress=on_step)
+    page_size = target.execute('PRAGMA page_size').fetchone()[0]
+    return SQLiteBackupResult(
+        connection=target,
+        pages=last_status.total,
+        page_size=page_size,
+        elapsed=time.perf_counter() - start,
+    )
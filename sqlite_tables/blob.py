@@ -0,0 +1,224 @@
+import io
+import os
+import sqlite3
+from typing import (
+    IO,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from .utils import (
+    STREAM_BUFFER_SIZE,
+    SQLiteTemplate,
+)
+
+# Connection.blobopen is new in Python 3.11.
+HAS_BLOBOPEN = hasattr(sqlite3.Connection, 'blobopen')
+update_template = SQLiteTemplate(
+    'UPDATE $table_name SET $column_name = $value WHERE rowid = ?'
+)
+
+
+def get_stream_size(source: IO[bytes]) -> int:
+    """Bytes left to read from source. BLOBs are written into space
+    reserved with zeroblob(), so the size has to be known up front.
+    """
+    try:
+        return os.fstat(source.fileno()).st_size - source.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    if not source.seekable():
+        raise ValueError('Give the size of a stream that can not seek')
+    position = source.tell()
+    size = source.seek(0, io.SEEK_END) - position
+    source.seek(position)
+    return size
+
+
+def copy_to_blob(
+    blob: 'sqlite3.Blob',
+    source: IO[bytes],
+    size: int,
+    chunk_size: int = STREAM_BUFFER_SIZE,
+) -> int:
+    buffer = bytearray(min(chunk_size, size))
+    view = memoryview(buffer)
+    written = 0
+    while written < size:
+        n = source.readinto(view[:min(chunk_size, size - written)])
+        if not n:
+            raise ValueError(f'Stream ended after {written} of {size} bytes')
+        blob.write(view[:n])
+        written += n
+    return written
+
+
+def write_blob_value(
+    connection: sqlite3.Connection,
+    table_name: str,
+    column_name: str,
+    rowid: int,
+    source: IO[bytes],
+    size: int,
+) -> int:
+    """Replace a BLOB with size bytes from source, in chunks through a
+    BLOB handle if there is one, otherwise in a single UPDATE.
+    """
+    substitutions = {'table_name': table_name, 'column_name': column_name}
+    if not HAS_BLOBOPEN:
+        value = bytearray()
+        while len(value) < size:
+            data = source.read(size - len(value))
+            if not data:
+                raise ValueError(f'Stream ended after {len(value)} of {size} bytes')
+            value += data
+        connection.execute(
+            update_template.substitute(substitutions, value='?'),
+            (bytes(value), rowid),
+        )
+        return size
+    connection.execute(
+        update_template.substitute(substitutions, value='zeroblob(?)'),
+        (size, rowid),
+    )
+    with connection.blobopen(table_name, column_name, rowid) as blob:
+        return copy_to_blob(blob, source, size)
+
+
+class SQLiteSubstrBlob(object):
+    """Reads a BLOB with substr() where sqlite3.Blob is not available."""
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        table_name: str,
+        column_name: str,
+        rowid: int,
+        schema_name: Optional[str] = None,
+    ) -> None:
+        if schema_name is not None:
+            table_name = f'{schema_name}.{table_name}'
+        self.connection = connection
+        self.rowid = rowid
+        self.read_sql = (
+            f'SELECT substr({column_name}, ?, ?) FROM {table_name} WHERE rowid = ?'
+        )
+        row = connection.execute(
+            f'SELECT length({column_name}) FROM {table_name} WHERE rowid = ?',
+            (rowid,),
+        ).fetchone()
+        if row is None:
+            raise sqlite3.OperationalError('no such rowid: {}'.format(rowid))
+        self.size = row[0] or 0
+        self.position = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> 'SQLiteSubstrBlob':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def read(self, length: int = -1) -> bytes:
+        if length < 0:
+            length = self.size
+        length = min(length, self.size - self.position)
+        if length <= 0:
+            return b''
+        data = self.connection.execute(
+            self.read_sql, (self.position + 1, length, self.rowid)
+        ).fetchone()[0]
+        self.position += len(data)
+        return bytes(data)
+
+    def seek(self, offset: int, origin: int = io.SEEK_SET) -> None:
+        base = {
+            io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size
+        }[origin]
+        if not 0 <= base + offset <= self.size:
+            raise ValueError('offset out of blob range')
+        self.position = base + offset
+
+    def tell(self) -> int:
+        return self.position
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBlobReader(io.RawIOBase):
+    """A read-only, seekable file object over a BLOB."""
+
+    def __init__(self, blob: Union['sqlite3.Blob', SQLiteSubstrBlob]) -> None:
+        super().__init__()
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.blob)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.blob.read(len(buffer))
+        n = len(data)
+        memoryview(buffer).cast('B')[:n] = data
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self.blob.seek(offset, whence)
+        return self.blob.tell()
+
+    def tell(self) -> int:
+        return self.blob.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.blob.close()
+        super().close()
+
+    def iter_chunks(
+        self, chunk_size: int = STREAM_BUFFER_SIZE
+    ) -> Iterator[memoryview]:
+        """Yield successive chunks as views of one reused buffer; each
+        view is only valid until the next one is produced.
+        """
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            n = self.readinto(view)
+            if not n:
+                return
+            yield view[:n]
+
+    def copy_to(
+        self, target: IO[bytes], chunk_size: int = STREAM_BUFFER_SIZE
+    ) -> int:
+        copied = 0
+        for chunk in self.iter_chunks(chunk_size):
+            target.write(chunk)
+            copied += len(chunk)
+        return copied
+
+
+def open_blob_reader(
+    connection: sqlite3.Connection,
+    table_name: str,
+    column_name: str,
+    rowid: int,
+    schema_name: Optional[str] = None,
+) -> SQLiteBlobReader:
+    if not HAS_BLOBOPEN:
+        return SQLiteBlobReader(SQLiteSubstrBlob(
+            connection, table_name, column_name, rowid, schema_name
+        ))
+    kwargs = {} if schema_name is None else {'name': schema_name}
+    return SQLiteBlobReader(connection.blobopen(
+        table_name, column_name, rowid, readonly=True, **kwargs
+    ))
@@ -0,0 +1,153 @@
+from typing import (
+    Any,
+    Generator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .utils import SQLiteTemplate
+
+
+class SQLiteChange(NamedTuple):
+    seq: int
+    table_name: str
+    op: str
+    pk: Any
+    changed_columns: Tuple[str, ...]
+
+
+class SQLiteChangeLog(object):
+    """A log of the rows inserted, updated or deleted in tables declared
+    with capture_changes=True, appended to by triggers.
+    """
+    log_table_name = 'change_log'
+    offsets_table_name = 'change_log_offsets'
+    log_schema_template = SQLiteTemplate(
+        'CREATE TABLE IF NOT EXISTS $log_table_name ('
+        'seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, '
+        'op TEXT NOT NULL, pk, changed TEXT)'
+    )
+    offsets_schema_template = SQLiteTemplate(
+        'CREATE TABLE IF NOT EXISTS $offsets_table_name ('
+        'consumer TEXT PRIMARY KEY, seq INTEGER NOT NULL)'
+    )
+    log_insert_template = SQLiteTemplate(
+        "INSERT INTO $log_table_name (table_name, op, pk) "
+        "VALUES ('$table_name', '$op', $row_key)"
+    )
+    log_update_template = SQLiteTemplate(
+        "INSERT INTO $log_table_name (table_name, op, pk, changed) "
+        "SELECT '$table_name', 'U', $row_key, changed "
+        "FROM (SELECT rtrim($changed_expr, ',') AS changed) WHERE changed <> ''"
+    )
+    read_template = SQLiteTemplate(
+        'SELECT seq, table_name, op, pk, changed FROM $log_table_name '
+        'WHERE seq > ? $table_filter ORDER BY seq LIMIT ?'
+    )
+    prune_template = SQLiteTemplate(
+        'DELETE FROM $log_table_name WHERE seq IN (SELECT seq FROM $log_table_name '
+        'WHERE seq <= ? ORDER BY seq LIMIT ?)'
+    )
+
+    @classmethod
+    def schema_to_sql(cls) -> Generator:
+        yield cls.log_schema_template.substitute(log_table_name=cls.log_table_name)
+        yield cls.offsets_schema_template.substitute(
+            offsets_table_name=cls.offsets_table_name
+        )
+
+    @classmethod
+    def get_changed_expr(cls, table) -> str:
+        return ' || '.join(
+            f"CASE WHEN old.{name} IS NOT new.{name} THEN '{name},' ELSE '' END"
+            for name in table.columns
+        )
+
+    @classmethod
+    def triggers_to_sql(cls, table) -> Generator:
+        substitutions = {
+            'log_table_name': cls.log_table_name,
+            'table_name': table.table_name,
+        }
+        events = (
+            ('INSERT', cls.log_insert_template.substitute(
+                substitutions, op='I', row_key=table.get_row_key_sql('new')
+            )),
+            ('DELETE', cls.log_insert_template.substitute(
+                substitutions, op='D', row_key=table.get_row_key_sql('old')
+            )),
+            ('UPDATE', cls.log_update_template.substitute(
+                substitutions,
+                row_key=table.get_row_key_sql('new'),
+                changed_expr=cls.get_changed_expr(table),
+            )),
+        )
+        for event, expr in events:
+            yield table.trigger_template.substitute({
+                'trigger_name': f'{table.table_name}_changes_{event.lower()}',
+                'when': 'AFTER',
+                'event': event,
+                'table_name': table.table_name,
+                'expr': expr,
+            })
+
+    @classmethod
+    def read_sql(cls, table_names: Optional[Sequence[str]] = None) -> str:
+        table_filter = ''
+        if table_names:
+            placeholders = ', '.join('?' for _ in table_names)
+            table_filter = f'AND table_name IN ({placeholders})'
+        return cls.read_template.substitute(
+            log_table_name=cls.log_table_name, table_filter=table_filter
+        )
+
+    @classmethod
+    def prune_sql(cls) -> str:
+        return cls.prune_template.substitute(log_table_name=cls.log_table_name)
+
+    @staticmethod
+    def to_change(row: Sequence) -> SQLiteChange:
+        seq, table_name, op, pk, changed = row
+        return SQLiteChange(
+            seq, table_name, op, pk, tuple(changed.split(',')) if changed else ()
+        )
+
+
+class SQLiteChangeConsumer(object):
+    """Reads the change log from an offset stored per consumer name."""
+
+    def __init__(
+        self,
+        database,
+        name: str,
+        table_names: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.database = database
+        self.name = name
+        self.table_names = list(table_names or ())
+
+    def get_offset(self) -> int:
+        row = self.database.connection.execute(
+            f'SELECT seq FROM {SQLiteChangeLog.offsets_table_name} '
+            f'WHERE consumer = ?',
+            (self.name,),
+        ).fetchone()
+        return 0 if row is None else row[0]
+
+    def poll(self, limit: int = 1000) -> List[SQLiteChange]:
+        """The next changes after this consumer's offset. The offset only
+        moves when they are acknowledged.
+        """
+        return self.database.read_changes(self.get_offset(), limit, self.table_names)
+
+    def acknowledge(self, seq: int) -> None:
+        with self.database.transaction():
+            self.database.connection.execute(
+                f'INSERT INTO {SQLiteChangeLog.offsets_table_name} (consumer, seq) '
+                f'VALUES (?, ?) ON CONFLICT (consumer) DO UPDATE SET '
+                f'seq = max(seq, excluded.seq)',
+                (self.name, seq),
+            )
@@ -1,19 +1,56 @@
+import base64
+import json
 from collections import defaultdict
 from typing import (
+    Callable,
     DefaultDict,
+    Dict,
     Any,
+    Sequence,
+    Tuple,
     Union,
+    List,
     Optional,
 )
 
+from .compression import get_compressor
 from .exceptions import InvalidColumnConfiguration
 from .enums import (
+    SQLiteCompression,
     SQLiteType,
     SQLiteConstraint,
     SQLiteConstant,
+    SQLiteTimeStorage,
 )
 from .utils import SQLiteTemplate
-from .types import IntList
+from .types import (
+    IntList,
+    encode_bools,
+    decode_bools,
+    encode_int_lists,
+    decode_int_lists,
+    dump_json,
+    encode_jsons,
+    decode_jsons,
+    get_temporal_codec,
+)
+
+
+CSV_TRUE_STRINGS = frozenset(('1', 'true', 't', 'yes', 'y'))
+COMPRESSIBLE_TYPES = (SQLiteType.TEXT, SQLiteType.JSON, SQLiteType.BLOB)
+# STRICT tables only accept INT, INTEGER, REAL, TEXT, BLOB and ANY. Types
+# whose values may be written as something else (IntList adapts to
+# bytes, NUMERIC keeps whatever it is given) are declared ANY.
+STRICT_TYPES = {
+    SQLiteType.INT: 'INT',
+    SQLiteType.TEXT: 'TEXT',
+    SQLiteType.REAL: 'REAL',
+    SQLiteType.NUMERIC: 'ANY',
+    SQLiteType.BLOB: 'BLOB',
+    SQLiteType.BOOL: 'INT',
+    SQLiteType.INT_LIST: 'ANY',
+    SQLiteType.JSON: 'TEXT',
+}
 
 
 class SQLiteColumn(object):
@@ -27,11 +64,34 @@ class SQLiteColumn(object):
         f'UPDATE $$table_name SET $column_name = $default_for_update WHERE '
         f'$$primary_key_col = old.$$primary_key_col'
     )
+    searchable = False
+    indexed = False
+    generated_columns: Dict[str, str] = {}
 
     @staticmethod
     def prepare_for_insert(value):
         return value
 
+    @staticmethod
+    def from_csv(value: str) -> Any:
+        return None if value == '' else value
+
+    @staticmethod
+    def to_csv(value: Any) -> Any:
+        return value
+
+    @staticmethod
+    def encode_batch(values: Sequence) -> Sequence:
+        """Convert a chunk of one column's values to types sqlite3 can
+        bind without an adapter. Native columns pass through unchanged.
+        """
+        return values
+
+    @staticmethod
+    def decode_batch(values: Sequence) -> Sequence:
+        """Inverse of encode_batch, applied to raw (unconverted) values."""
+        return values
+
     def __init__(
         self,
         column_name: str,
@@ -43,6 +103,9 @@ class SQLiteColumn(object):
         fk_table_ref: Optional[str] = None,
         is_primary_key: bool = False,
         unique: bool = False,
+        compression: Optional[SQLiteCompression] = None,
+        compression_level: Optional[int] = None,
+        compression_dictionary: Optional[bytes] = None,
     ) -> None:
         self.column_name = column_name
         self.sqlite_type = sqlite_type
@@ -54,6 +117,13 @@ class SQLiteColumn(object):
         self.is_primary_key = is_primary_key
         self.unique = unique
         self.default_for_update: Optional[str] = None
+        self.compressor = None
+        if compression is not None:
+            self.compressor = get_compressor(
+                SQLiteCompression(compression),
+                compression_level,
+                compression_dictionary,
+            )
 
     def __repr__(self):
         template = (
@@ -88,15 +158,69 @@ class SQLiteColumn(object):
             raise InvalidColumnConfiguration(
                 'default value should not be specified for primary key columns'
             )
+        if self.compressor is not None:
+            self.validate_compression()
+
+    def validate_compression(self) -> None:
+        if self.sqlite_type not in COMPRESSIBLE_TYPES:
+            raise InvalidColumnConfiguration(
+                f'{self.sqlite_type.value} columns can not be compressed'
+            )
+        if self.default is not None or self.is_primary_key or self.unique:
+            raise InvalidColumnConfiguration(
+                'compressed columns can not have defaults or be keys'
+            )
+        if self.searchable or self.generated_columns:
+            raise InvalidColumnConfiguration(
+                'compressed columns can not be searchable or have JSON paths'
+            )
 
     def get_default_value_sql(self):
         return self.default
 
-    def get_definition_subs(self) -> dict:
+    def get_converter(self) -> Optional[Callable]:
+        """Converter for this column's values regardless of its declared
+        type; None to look it up by declared type.
+        """
+        if self.compressor is None:
+            return None
+        if self.sqlite_type is SQLiteType.JSON:
+            return self.compressor.to_json
+        if self.sqlite_type is SQLiteType.BLOB:
+            return self.compressor.to_bytes
+        return self.compressor.to_text
+
+    def compress_value(self, value: Any) -> Any:
+        if self.compressor is None:
+            return value
+        return self.compressor.compress_value(value)
+
+    def compress_batch(self, values: Sequence) -> Sequence:
+        if self.compressor is None:
+            return values
+        return self.compressor.compress_batch(values)
+
+    def decompress_batch(self, values: Sequence) -> Sequence:
+        """Decompress raw values before decode_batch; text and JSON
+        come back as str, BLOBs as bytes.
+        """
+        if self.compressor is None:
+            return values
+        return self.compressor.decompress_batch(
+            values, text=self.sqlite_type is not SQLiteType.BLOB
+        )
+
+    def get_definition_subs(self, strict: bool = False) -> dict:
         self.validate_column_def_constraints()
         substitutions: DefaultDict[str, str] = defaultdict(str)
         substitutions['column_name'] = self.column_name
-        substitutions['type'] = self.sqlite_type.value
+        if strict and self.compressor is not None:
+            # Compressed values are bytes whatever the declared type.
+            substitutions['type'] = SQLiteType.BLOB.value
+        elif strict:
+            substitutions['type'] = STRICT_TYPES[self.sqlite_type]
+        else:
+            substitutions['type'] = self.sqlite_type.value
         if self.is_primary_key:
             substitutions['unique_constraint'] = SQLiteConstraint.PRIMARY_KEY.value
         elif self.unique:
@@ -109,8 +233,8 @@ class SQLiteColumn(object):
             substitutions['null_constraint'] = SQLiteConstraint.NOT_NULL.value
         return substitutions
 
-    def definition_to_sql(self) -> str:
-        return self.column_def_template.substitute(self.get_definition_subs())
+    def definition_to_sql(self, strict: bool = False) -> str:
+        return self.column_def_template.substitute(self.get_definition_subs(strict))
 
     def get_fk_constraint_substitutions(self) -> dict:
         substitutions = {
@@ -136,6 +260,9 @@ class SQLiteColumn(object):
             'default_for_update': self.default_for_update,
         }
 
+    def generated_columns_to_sql(self, strict: bool = False) -> List[str]:
+        return []
+
     def trigger_expression_to_sql(self):
         return self.trigger_expression_template.substitute(
             self.get_trigger_expression_substitutions()
@@ -143,6 +270,10 @@ class SQLiteColumn(object):
 
 
 class IntColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> Optional[int]:
+        return None if value == '' else int(value)
+
     def __init__(
         self,
         column_name: str,
@@ -153,6 +284,10 @@ class IntColumn(SQLiteColumn):
 
 
 class RealColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> Optional[float]:
+        return None if value == '' else float(value)
+
     def __init__(
         self,
         column_name: str,
@@ -163,13 +298,19 @@ class RealColumn(SQLiteColumn):
 
 
 class TextColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> str:
+        return value
+
     def __init__(
         self,
         column_name: str,
         default: Optional[str] = None,
+        searchable: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(column_name, SQLiteType.TEXT, default=default, **kwargs)
+        self.searchable = searchable
 
     def prepare_string_default(self, default_str: str) -> str:
         if default_str == "":
@@ -185,6 +326,15 @@ class TextColumn(SQLiteColumn):
 
 
 class NumericColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> Union[float, int, None]:
+        if value == '':
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+
     def __init__(
         self,
         column_name: str,
@@ -194,64 +344,139 @@ class NumericColumn(SQLiteColumn):
         super().__init__(column_name, SQLiteType.NUMERIC, default=default, **kwargs)
 
 
-class DateTimeColumn(SQLiteColumn):
+class TemporalColumn(SQLiteColumn):
+    """Base for date and time columns, stored as ISO 8601 text or, with
+    numeric storage, as epoch or Julian day numbers.
+    """
+    kind = 'datetime'
+    now_constant = SQLiteConstant.CURRENT_TIMESTAMP
+
     def __init__(
         self,
         column_name: str,
         default: Optional[str] = None,
         auto_now_insert: bool = False,
         auto_now_update: bool = False,
+        storage: SQLiteTimeStorage = SQLiteTimeStorage.TEXT,
         **kwargs,
     ) -> None:
+        self.storage = SQLiteTimeStorage(storage)
+        if self.storage is SQLiteTimeStorage.TEXT:
+            self.codec = None
+            sqlite_type = SQLiteType.TEXT
+            now_sql = self.now_constant.value
+        else:
+            self.codec = get_temporal_codec(self.kind, self.storage)
+            sqlite_type = SQLiteType.INT if self.codec.is_integer else SQLiteType.REAL
+            now_sql = f'({self.codec.get_now_sql()})'
         super().__init__(
             column_name,
-            SQLiteType.TEXT,
-            default=SQLiteConstant.CURRENT_TIMESTAMP.value if auto_now_insert else None,
+            sqlite_type,
+            default=now_sql if auto_now_insert else None,
             **kwargs,
         )
         if auto_now_update:
-            self.default_for_update = SQLiteConstant.CURRENT_TIMESTAMP.value
+            self.default_for_update = now_sql
 
+    def prepare_for_insert(self, value: Any) -> Any:
+        if self.codec is None:
+            return value
+        return self.codec.encode(value)
 
-class DateColumn(SQLiteColumn):
-    def __init__(
-        self,
-        column_name: str,
-        default: Optional[str] = None,
-        auto_now_insert: bool = False,
-        auto_now_update: bool = False,
-        **kwargs,
-    ) -> None:
-        super().__init__(
-            column_name,
-            SQLiteType.TEXT,
-            default=SQLiteConstant.CURRENT_DATE.value if auto_now_insert else None,
-            **kwargs,
-        )
-        if auto_now_update:
-            self.default_for_update = SQLiteConstant.CURRENT_DATE.value
+    def from_csv(self, value: str) -> Any:
+        """With numeric storage, CSV cells may hold either the stored
+        number or an ISO 8601 string; encode_batch handles both.
+        """
+        if value == '':
+            return None
+        if self.codec is not None:
+            for number_type in (int, float):
+                try:
+                    return number_type(value)
+                except ValueError:
+                    pass
+        return value
 
+    def to_csv(self, value: Any) -> Any:
+        if value is None or self.codec is None:
+            return value
+        return value.isoformat()
 
-class TimeColumn(SQLiteColumn):
-    def __init__(
+    def encode_batch(self, values: Sequence) -> Sequence:
+        if self.codec is None:
+            return values
+        return self.codec.encode_batch(values)
+
+    def decode_batch(self, values: Sequence) -> Sequence:
+        if self.codec is None:
+            return values
+        return self.codec.decode_batch(values)
+
+    def get_converter(self) -> Optional[Callable]:
+        if self.codec is None:
+            return super().get_converter()
+        return self.codec.convert
+
+    def encode_value(self, value: Any) -> Any:
+        if self.codec is None and not isinstance(value, str):
+            return str(value)
+        return self.prepare_for_insert(value)
+
+    def range_to_sql(
         self,
-        column_name: str,
-        default: Optional[str] = None,
-        auto_now_insert: bool = False,
-        auto_now_update: bool = False,
-        **kwargs,
-    ) -> None:
-        super().__init__(
-            column_name,
-            SQLiteType.TEXT,
-            default=SQLiteConstant.CURRENT_TIME.value if auto_now_insert else None,
-            **kwargs,
-        )
-        if auto_now_update:
-            self.default_for_update = SQLiteConstant.CURRENT_TIME.value
+        start: Any = None,
+        end: Any = None,
+    ) -> Tuple[str, List[Any]]:
+        """A where clause and its parameters matching values from start
+        (inclusive) up to end (exclusive).
+        """
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append(f'{self.column_name} >= ?')
+            params.append(self.encode_value(start))
+        if end is not None:
+            clauses.append(f'{self.column_name} < ?')
+            params.append(self.encode_value(end))
+        if not clauses:
+            return f'{self.column_name} IS NOT NULL', params
+        return ' AND '.join(clauses), params
+
+
+class DateTimeColumn(TemporalColumn):
+    kind = 'datetime'
+    now_constant = SQLiteConstant.CURRENT_TIMESTAMP
+
+
+class DateColumn(TemporalColumn):
+    kind = 'date'
+    now_constant = SQLiteConstant.CURRENT_DATE
+
+
+class TimeColumn(TemporalColumn):
+    kind = 'time'
+    now_constant = SQLiteConstant.CURRENT_TIME
 
 
 class BoolColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> Optional[bool]:
+        return None if value == '' else value.lower() in CSV_TRUE_STRINGS
+
+    @staticmethod
+    def to_csv(value: Optional[bool]) -> Optional[int]:
+        return None if value is None else int(value)
+
+    @staticmethod
+    def prepare_for_insert(value):
+        """Store booleans as native integers rather than going through
+        adapt_bool; convert_bool reads either representation.
+        """
+        return None if value is None else int(value)
+
+    encode_batch = staticmethod(encode_bools)
+    decode_batch = staticmethod(decode_bools)
+
     def __init__(
         self,
         column_name: str,
@@ -262,6 +487,10 @@ class BoolColumn(SQLiteColumn):
 
 
 class IntListColumn(SQLiteColumn):
+    """With indexed=True, rows can be filtered by list members (see
+    SQLiteMembershipIndex).
+    """
+
     @staticmethod
     def prepare_for_insert(value):
         """sqlite3 checks the type of the object passed in to
@@ -271,10 +500,108 @@ class IntListColumn(SQLiteColumn):
         """
         return IntList(value)
 
+    @staticmethod
+    def from_csv(value: str) -> IntList:
+        if value == '':
+            return IntList([])
+        return IntList(int(i) for i in value.split(','))
+
+    @staticmethod
+    def to_csv(value: Optional[IntList]) -> Optional[str]:
+        return None if value is None else ','.join(str(i) for i in value)
+
+    encode_batch = staticmethod(encode_int_lists)
+    decode_batch = staticmethod(decode_int_lists)
+
     def __init__(
         self,
         column_name: str,
         default: Optional[bool] = None,
+        indexed: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(column_name, SQLiteType.INT_LIST, default=default, **kwargs)
+        self.indexed = indexed
+
+
+class BlobColumn(SQLiteColumn):
+    """Binary values; large ones can be streamed with
+    SQLiteDatabase.write_blob and open_blob.
+    """
+
+    @staticmethod
+    def prepare_for_insert(value):
+        if isinstance(value, (bytearray, memoryview)):
+            return bytes(value)
+        return value
+
+    @staticmethod
+    def from_csv(value: str) -> Optional[bytes]:
+        return None if value == '' else base64.b64decode(value)
+
+    @staticmethod
+    def to_csv(value: Optional[bytes]) -> Optional[str]:
+        return None if value is None else base64.b64encode(value).decode('ascii')
+
+    def __init__(
+        self,
+        column_name: str,
+        default: Optional[bytes] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(column_name, SQLiteType.BLOB, default=default, **kwargs)
+
+    def get_default_value_sql(self):
+        return f"X'{self.default.hex()}'"
+
+
+class JSONColumn(SQLiteColumn):
+    """Stores JSON as compact text. Each entry in paths adds a generated
+    column that can be indexed.
+    """
+    generated_column_template = SQLiteTemplate(
+        "$name $type GENERATED ALWAYS AS (json_extract($column_name, '$path')) "
+        "VIRTUAL"
+    )
+
+    @staticmethod
+    def prepare_for_insert(value):
+        return None if value is None else dump_json(value)
+
+    @staticmethod
+    def from_csv(value: str) -> Any:
+        return None if value == '' else json.loads(value)
+
+    @staticmethod
+    def to_csv(value: Any) -> Optional[str]:
+        return None if value is None else dump_json(value)
+
+    encode_batch = staticmethod(encode_jsons)
+    decode_batch = staticmethod(decode_jsons)
+
+    def __init__(
+        self,
+        column_name: str,
+        default: Any = None,
+        paths: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(column_name, SQLiteType.JSON, default=default, **kwargs)
+        self.generated_columns = dict(paths or {})
+
+    def get_default_value_sql(self):
+        return "'{}'".format(dump_json(self.default).replace("'", "''"))
+
+    def generated_columns_to_sql(self, strict: bool = False) -> List[str]:
+        for path in self.generated_columns.values():
+            if "'" in path:
+                raise InvalidColumnConfiguration(f'Invalid JSON path: {path!r}')
+        return [
+            self.generated_column_template.substitute(
+                name=name,
+                type='ANY' if strict else '',
+                column_name=self.column_name,
+                path=path,
+            )
+            for name, path in self.generated_columns.items()
+        ]
@@ -0,0 +1,187 @@
+import json
+import lzma
+import sqlite3
+import threading
+import zlib
+from functools import lru_cache
+from typing import (
+    Any,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from .enums import SQLiteCompression
+from .exceptions import (
+    InvalidColumnConfiguration,
+    InvalidDatabaseConfiguration,
+)
+from .utils import SQLiteTemplate
+
+
+DEFAULT_LEVELS = {
+    SQLiteCompression.ZLIB: 6,
+    SQLiteCompression.LZMA: 6,
+    SQLiteCompression.ZSTD: 3,
+}
+
+
+class ColumnCompressor(object):
+    """Compresses the values of a column. zstd contexts are not thread
+    safe, so every thread gets its own.
+    """
+
+    def __init__(
+        self,
+        compression: SQLiteCompression,
+        level: Optional[int] = None,
+        dictionary: Optional[bytes] = None,
+    ) -> None:
+        self.compression = SQLiteCompression(compression)
+        self.level = DEFAULT_LEVELS[self.compression] if level is None else level
+        self.dictionary = dictionary
+        if dictionary is not None and self.compression is SQLiteCompression.LZMA:
+            raise InvalidColumnConfiguration('lzma does not support dictionaries')
+        if self.compression is SQLiteCompression.ZSTD:
+            if zstandard is None:
+                raise InvalidColumnConfiguration(
+                    'zstd compression needs the zstandard package'
+                )
+            self.zstd_dictionary = (
+                None if dictionary is None
+                else zstandard.ZstdCompressionDict(dictionary)
+            )
+            self.zstd_contexts = threading.local()
+
+    def get_zstd_compressor(self) -> 'zstandard.ZstdCompressor':
+        compressor = getattr(self.zstd_contexts, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self.zstd_dictionary
+            )
+            self.zstd_contexts.compressor = compressor
+        return compressor
+
+    def get_zstd_decompressor(self) -> 'zstandard.ZstdDecompressor':
+        decompressor = getattr(self.zstd_contexts, 'decompressor', None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(
+                dict_data=self.zstd_dictionary
+            )
+            self.zstd_contexts.decompressor = decompressor
+        return decompressor
+
+    def get_dictionary_id(self) -> Optional[int]:
+        if self.dictionary is None:
+            return None
+        return zlib.crc32(self.dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.compression is SQLiteCompression.LZMA:
+            return lzma.compress(data, preset=self.level)
+        if self.compression is SQLiteCompression.ZSTD:
+            return self.get_zstd_compressor().compress(data)
+        if self.dictionary is None:
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.compression is SQLiteCompression.LZMA:
+            return lzma.decompress(data)
+        if self.compression is SQLiteCompression.ZSTD:
+            return self.get_zstd_decompressor().decompress(data)
+        if self.dictionary is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def compress_value(self, value: Union[str, bytes, None]) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        return self.compress(value)
+
+    def compress_batch(self, values: Sequence) -> List[Optional[bytes]]:
+        compress_value = self.compress_value
+        return [compress_value(value) for value in values]
+
+    def decompress_batch(self, values: Sequence, text: bool) -> List[Any]:
+        convert = self.to_text if text else self.to_bytes
+        return [None if value is None else convert(value) for value in values]
+
+    def to_bytes(self, value: bytes) -> bytes:
+        return self.decompress(value)
+
+    def to_text(self, value: bytes) -> str:
+        return self.decompress(value).decode('utf-8')
+
+    def to_json(self, value: bytes) -> Any:
+        return json.loads(self.decompress(value))
+
+
+@lru_cache(maxsize=None)
+def get_compressor(
+    compression: SQLiteCompression,
+    level: Optional[int] = None,
+    dictionary: Optional[bytes] = None,
+) -> ColumnCompressor:
+    """Compressors are shared, so that equally configured columns have
+    equal converters.
+    """
+    return ColumnCompressor(compression, level, dictionary)
+
+
+class SQLiteCompressionMetadata(object):
+    """Records how each column is compressed, since values carry no
+    header to tell.
+    """
+    table_name = 'column_compression'
+    schema_template = SQLiteTemplate(
+        'CREATE TABLE IF NOT EXISTS $table_name (table_name TEXT NOT NULL, '
+        'column_name TEXT NOT NULL, codec TEXT NOT NULL, level INT NOT NULL, '
+        'dictionary_id INT, PRIMARY KEY (table_name, column_name))'
+    )
+
+    @classmethod
+    def schema_to_sql(cls) -> Generator:
+        yield cls.schema_template.substitute(table_name=cls.table_name)
+
+    @classmethod
+    def get_record(cls, column) -> tuple:
+        compressor = column.compressor
+        return (
+            compressor.compression.value,
+            compressor.level,
+            compressor.get_dictionary_id(),
+        )
+
+    @classmethod
+    def record(cls, connection: sqlite3.Connection, table) -> None:
+        for column in table.columns.values():
+            if column.compressor is None:
+                continue
+            record = cls.get_record(column)
+            existing = connection.execute(
+                f'SELECT codec, level, dictionary_id FROM {cls.table_name} '
+                f'WHERE table_name = ? AND column_name = ?',
+                (table.table_name, column.column_name),
+            ).fetchone()
+            if existing is None:
+                connection.execute(
+                    f'INSERT INTO {cls.table_name} VALUES (?, ?, ?, ?, ?)',
+                    (table.table_name, column.column_name) + record,
+                )
+            elif tuple(existing) != record:
+                raise InvalidDatabaseConfiguration(
+                    f'"{table.table_name}.{column.column_name}" was compressed '
+                    f'with {tuple(existing)!r}, not {record!r}'
+                )
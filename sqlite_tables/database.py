@@ -1,25 +1,102 @@
+import csv
+import itertools
 import sqlite3
 import pathlib
-from functools import wraps
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import (
+    partial,
+    wraps,
+)
 from typing import (
+    DefaultDict,
+    IO,
     Callable,
+    Iterable,
+    Iterator,
     Optional,
+    Sequence,
     List,
     Dict,
     Any,
     Tuple,
+    Union,
 )
 
-from .enums import SQLiteType
+from .enums import (
+    SQLiteAutoVacuum,
+    SQLiteType,
+    SQLiteForeignKeyMode,
+    SQLiteTempStore,
+    SQLiteTransactionMode,
+)
 from .table import SQLiteTable
-from .utils import SQLiteTemplate
-from .exceptions import InvalidDatabaseConfiguration
+from .column import (
+    IntColumn,
+    SQLiteColumn,
+)
+from .utils import (
+    SQLiteTemplate,
+    chunked,
+    open_text_stream,
+)
+from .blob import (
+    SQLiteBlobReader,
+    get_stream_size,
+    open_blob_reader,
+    write_blob_value,
+)
+from .backup import (
+    SQLiteBackupProgress,
+    SQLiteBackupResult,
+    backup_connection,
+)
+from .changes import (
+    SQLiteChange,
+    SQLiteChangeConsumer,
+    SQLiteChangeLog,
+)
+from .compression import SQLiteCompressionMetadata
+from .diagnostics import (
+    SQLiteQueryDiagnostics,
+    SQLiteQueryFinding,
+)
+from .exceptions import (
+    ForeignKeyViolation,
+    InvalidDatabaseConfiguration,
+)
+from .foreign_keys import (
+    SQLiteForeignKeyViolation,
+    check_foreign_keys,
+)
+from .lookup import SQLiteKeyLookup
+from .maintenance import (
+    SQLiteMaintenance,
+    SQLiteMaintenanceReport,
+)
+from .membership import SQLiteMembershipIndex
+from .partition import TablePartitions
+from .prefetch import (
+    get_relation,
+    group_by_value,
+)
+from .registry import SQLiteCodecRegistry
+from .replica import TableReplica
+from .row import (
+    LazyRow,
+    LazyRowSpec,
+)
+from .transaction import (
+    SQLiteBatchSizer,
+    SQLiteTransaction,
+    SQLiteTransactionStats,
+)
 from .types import (
     IntList,
-    adapt_bool,
     convert_bool,
     adapt_int_list,
     convert_int_list,
+    convert_json,
 )
 
 
@@ -35,7 +112,11 @@ def db_transaction(func):
                 'First positional argument to function wrapped with "db_transaction" '
                 'must be of type sqlite3.Connection'
             )
-        with db_connection:
+        if hasattr(args[0], 'transaction'):
+            transaction = args[0].transaction()
+        else:
+            transaction = SQLiteTransaction(db_connection)
+        with transaction:
             return func(*args, **kwargs)
     return with_connection_context_manager
 
@@ -44,13 +125,25 @@ class SQLiteDatabase(object):
     insert_template = SQLiteTemplate(
         'INSERT INTO $table_name ($column_names) VALUES ($value_template)'
     )
+    select_template = SQLiteTemplate(
+        'SELECT $column_names FROM $table_name $where_clause $order_clause '
+        '$limit_clause'
+    )
+    pragma_template = SQLiteTemplate('PRAGMA $pragma = $value')
+    storage_pragmas = ('page_size', 'cache_size', 'mmap_size', 'temp_store')
+    batch_size = 10000
+    # SQLite's default limit on databases attached to a connection,
+    # shared between the partitioned tables.
+    max_attached = 10
+    # Booleans are bound as the integers BoolColumn stores.
     default_adapters = (
-        (bool, adapt_bool),
+        (bool, int),
         (IntList, adapt_int_list),
     )
     default_converters = (
         (SQLiteType.BOOL, convert_bool),
         (SQLiteType.INT_LIST, convert_int_list),
+        (SQLiteType.JSON, convert_json),
     )
 
     def __init__(
@@ -60,8 +153,38 @@ class SQLiteDatabase(object):
         connection: Optional[sqlite3.Connection] = None,
         adapters: Tuple = (),
         converters: Tuple = (),
+        mmap_size: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        page_size: Optional[int] = None,
+        temp_store: Optional[SQLiteTempStore] = None,
+        partition_directory: Optional[pathlib.Path] = None,
+        replicated_tables: Sequence[str] = (),
+        replica_refresh_interval: Optional[float] = None,
+        transaction_mode: SQLiteTransactionMode = SQLiteTransactionMode.DEFERRED,
+        busy_retries: int = 5,
+        busy_backoff: float = 0.005,
+        commit_latency_target: Optional[float] = None,
+        foreign_keys: SQLiteForeignKeyMode = SQLiteForeignKeyMode.OFF,
+        query_diagnostics: bool = False,
+        scan_min_rows: int = 10000,
+        auto_vacuum: Optional[SQLiteAutoVacuum] = None,
+        maintenance_interval: Optional[float] = None,
     ):
         self.path = path
+        self.foreign_keys = SQLiteForeignKeyMode(foreign_keys)
+        self.transaction_mode = transaction_mode
+        self.busy_retries = busy_retries
+        self.busy_backoff = busy_backoff
+        self.transaction_stats = SQLiteTransactionStats()
+        self.batch_sizer = (
+            None if commit_latency_target is None
+            else SQLiteBatchSizer(commit_latency_target)
+        )
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.page_size = page_size
+        self.temp_store = temp_store
+        self.auto_vacuum = auto_vacuum
         if path is not None and connection is not None:
             raise InvalidDatabaseConfiguration(
                 'Specify either connection object or path'
@@ -69,17 +192,36 @@ class SQLiteDatabase(object):
         elif connection is not None:
             self.connection = connection
         else:
-            self.register_adapters(self.default_adapters + adapters)
-            self.register_converters(self.default_converters + converters)
-            self.connection = sqlite3.connect(
-                path,
-                detect_types=sqlite3.PARSE_DECLTYPES,
-            )
-        self.connection.row_factory = sqlite3.Row
+            self.connection = sqlite3.connect(path)
         self.tables = {table.table_name: table for table in tables}
+        self.partitions = self.get_table_partitions(partition_directory)
+        self.codecs = SQLiteCodecRegistry(
+            self.default_adapters + adapters,
+            self.default_converters + converters,
+        )
+        self.codecs.add_tables(self.tables.values())
+        self.connection.row_factory = sqlite3.Row
+        self.apply_connection_pragmas()
         self.existing_tables = self.get_existing_tables()
+        self.replica = self.get_replica(replicated_tables, replica_refresh_interval)
+        self.lookup_batches = itertools.count()
+        self.diagnostics = (
+            SQLiteQueryDiagnostics(scan_min_rows) if query_diagnostics else None
+        )
+        self.attach_diagnostics()
+        self.maintenance = SQLiteMaintenance(None if path is None else str(path))
+        if maintenance_interval is not None:
+            if path is None or str(path) == ':memory:':
+                raise InvalidDatabaseConfiguration(
+                    'Background maintenance needs a database path'
+                )
+            self.maintenance.interval = maintenance_interval
+            self.maintenance.start()
 
     def register_adapters(self, adapters: Tuple[Tuple[Any, Callable]]) -> None:
+        """Register adapters process-wide with sqlite3. SQLiteDatabase
+        does not need this; its own codecs only apply to its connection.
+        """
         for python_type, adapter_func in adapters:
             sqlite3.register_adapter(python_type, adapter_func)
 
@@ -87,6 +229,244 @@ class SQLiteDatabase(object):
         for declared_type, converter_func in converters:
             sqlite3.register_converter(declared_type, converter_func)
 
+    def transaction(
+        self, mode: Optional[SQLiteTransactionMode] = None
+    ) -> SQLiteTransaction:
+        """A transaction scope that becomes a savepoint inside another one."""
+        return SQLiteTransaction(
+            self.connection,
+            mode=mode or self.transaction_mode,
+            retries=self.busy_retries,
+            backoff=self.busy_backoff,
+            stats=self.transaction_stats,
+            begin_statements=self.get_begin_statements(),
+        )
+
+    def write_transaction(self) -> SQLiteTransaction:
+        """A transaction scope for the library's own writes. DEFERRED is
+        upgraded to IMMEDIATE, so that waiting for the write lock happens
+        in BEGIN, where it is timed as lock_wait, not at the first write.
+        """
+        mode = self.transaction_mode
+        if mode is SQLiteTransactionMode.DEFERRED:
+            mode = SQLiteTransactionMode.IMMEDIATE
+        return self.transaction(mode)
+
+    def get_begin_statements(self) -> Tuple[str, ...]:
+        if self.foreign_keys is SQLiteForeignKeyMode.DEFERRED:
+            return (self.pragma_template.substitute(
+                pragma='defer_foreign_keys', value='ON'
+            ),)
+        return ()
+
+    def get_transaction(self, connection: sqlite3.Connection) -> SQLiteTransaction:
+        if connection is self.connection:
+            return self.transaction()
+        return SQLiteTransaction(connection)
+
+    def run_in_transaction(
+        self,
+        func: Callable,
+        *args: Any,
+        mode: Optional[SQLiteTransactionMode] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Call func in a transaction, retrying the whole call if the
+        database stays busy. func must be safe to run more than once.
+        """
+        return self.transaction(mode).run(func, *args, **kwargs)
+
+    def get_table_partitions(
+        self,
+        partition_directory: Optional[pathlib.Path],
+    ) -> Dict[str, TablePartitions]:
+        partitioned = [x for x in self.tables.values() if x.partition_by is not None]
+        if not partitioned:
+            return {}
+        if partition_directory is None:
+            if self.path is None or str(self.path) == ':memory:':
+                raise InvalidDatabaseConfiguration(
+                    'partition_directory is required for partitioned tables '
+                    'unless the database has a file path'
+                )
+            partition_directory = pathlib.Path(self.path).parent
+        max_attached = max(1, self.max_attached // len(partitioned))
+        return {
+            table.table_name: TablePartitions(
+                table, partition_directory, max_attached
+            )
+            for table in partitioned
+        }
+
+    def get_replica(
+        self,
+        table_names: Sequence[str],
+        refresh_interval: Optional[float],
+    ) -> Optional[TableReplica]:
+        if not table_names:
+            return None
+        tables = [self.get_table(table_name) for table_name in table_names]
+        for table in tables:
+            if table.table_name in self.partitions:
+                raise InvalidDatabaseConfiguration(
+                    f'Partitioned table "{table.table_name}" can not be replicated'
+                )
+        replica = TableReplica(
+            tables, self.create_table, refresh_interval, self.batch_size
+        )
+        replica.connection.row_factory = self.connection.row_factory
+        if all(table.table_name in self.existing_tables for table in tables):
+            replica.load(self.connection)
+        return replica
+
+    def is_replicated(self, table_name: str) -> bool:
+        return self.replica is not None and table_name in self.replica.tables
+
+    def get_read_connection(self, table_name: str) -> sqlite3.Connection:
+        """The replica's connection for replicated tables, otherwise the
+        database's own.
+        """
+        partitions = self.partitions.get(table_name)
+        if partitions is not None and partitions.get_missing_keys():
+            raise ValueError(
+                f'Not every partition of "{table_name}" is attached; only '
+                f'select, select_batches and export_csv read them all'
+            )
+        if not self.is_replicated(table_name):
+            return self.connection
+        if self.replica.is_stale():
+            self.replica.load(self.connection)
+        return self.replica.connection
+
+    def iter_read_connections(
+        self,
+        table_name: str,
+        reverse: bool = False,
+    ) -> Iterator[sqlite3.Connection]:
+        """The connection to read table_name from, yielded once per batch
+        of partitions when they can not all be attached together. Each
+        batch must be read in full before the next one is requested.
+        """
+        partitions = self.partitions.get(table_name)
+        if partitions is None or not partitions.get_missing_keys():
+            yield self.get_read_connection(table_name)
+            return
+        keys = partitions.get_existing_keys()
+        if reverse:
+            keys.reverse()
+        for start in range(0, len(keys), partitions.max_attached):
+            partitions.attach_only(
+                self.connection,
+                keys[start:start + partitions.max_attached],
+                self.create_table,
+            )
+            yield self.connection
+
+    def refresh_replica(self) -> None:
+        if self.replica is not None:
+            self.replica.load(self.connection)
+
+    def attach_diagnostics(self) -> None:
+        if self.diagnostics is None:
+            return
+        self.diagnostics.attach(self.connection)
+        if self.replica is not None:
+            self.diagnostics.attach(self.replica.connection)
+
+    def get_query_findings(self) -> List[SQLiteQueryFinding]:
+        """Statements and trigger statements whose plans scan a large table."""
+        if self.diagnostics is None:
+            raise ValueError('Query diagnostics are not enabled')
+        return self.diagnostics.analyze(self.connection, self.tables)
+
+    def set_pragma(self, pragma: str, value: Any) -> None:
+        self.connection.execute(
+            self.pragma_template.substitute(pragma=pragma, value=value)
+        )
+
+    def apply_connection_pragmas(self) -> None:
+        """page_size and auto_vacuum are set in do_creation instead, as they
+        only apply to a database with no tables yet.
+        """
+        if self.mmap_size is not None:
+            self.set_pragma('mmap_size', int(self.mmap_size))
+        if self.cache_size is not None:
+            self.set_pragma('cache_size', int(self.cache_size))
+        if self.temp_store is not None:
+            self.set_pragma('temp_store', SQLiteTempStore(self.temp_store).value)
+        self.apply_foreign_key_mode()
+
+    def apply_foreign_key_mode(self) -> None:
+        """OFF leaves the connection's setting alone."""
+        if self.foreign_keys is not SQLiteForeignKeyMode.OFF:
+            self.set_pragma('foreign_keys', 'ON')
+
+    def check_foreign_keys(
+        self, table_names: Optional[Sequence[str]] = None
+    ) -> List[SQLiteForeignKeyViolation]:
+        return check_foreign_keys(self.connection, table_names)
+
+    @contextmanager
+    def bulk_load(
+        self, table_names: Optional[Sequence[str]] = None
+    ) -> Iterator[None]:
+        """Load rows in one transaction, checking foreign keys once at the
+        end instead of row by row.
+        """
+        if self.connection.in_transaction:
+            raise ValueError('bulk_load can not start inside a transaction')
+        enforced = self.connection.execute('PRAGMA foreign_keys').fetchone()[0]
+        self.set_pragma('foreign_keys', 'OFF')
+        try:
+            with self.write_transaction():
+                yield
+                violations = self.check_foreign_keys(table_names)
+                if violations:
+                    raise ForeignKeyViolation(violations)
+        finally:
+            self.set_pragma('foreign_keys', 'ON' if enforced else 'OFF')
+
+    def run_maintenance(self) -> SQLiteMaintenanceReport:
+        """Run a maintenance pass now, regardless of activity."""
+        return self.maintenance.run(self.connection, force=True)
+
+    def stop_maintenance(self, timeout: Optional[float] = None) -> None:
+        self.maintenance.stop(timeout)
+
+    def get_storage_settings(self) -> Dict[str, Optional[int]]:
+        """The values SQLite is actually using, which may differ from those
+        requested.
+        """
+        settings = {}
+        for pragma in self.storage_pragmas:
+            row = self.connection.execute(f'PRAGMA {pragma}').fetchone()
+            settings[pragma] = None if row is None else row[0]
+        return settings
+
+    def backup(
+        self,
+        target: Union[str, pathlib.Path, sqlite3.Connection, None] = None,
+        pages_per_step: int = 1024,
+        sleep: float = 0.0,
+        progress: Optional[Callable[[SQLiteBackupProgress], None]] = None,
+    ) -> SQLiteBackupResult:
+        """Copy the database with the online backup API. target may be a
+        path, a connection or None for a new in-memory database.
+        """
+        if target is None:
+            target = ':memory:'
+        if isinstance(target, sqlite3.Connection):
+            return backup_connection(
+                self.connection, target, pages_per_step, sleep, progress
+            )
+        connection = sqlite3.connect(str(target))
+        result = backup_connection(
+            self.connection, connection, pages_per_step, sleep, progress
+        )
+        if str(target) != ':memory:':
+            connection.close()
+        return result
+
     @db_transaction
     def get_existing_tables(self):
         return [x[0] for x in self.connection.execute(
@@ -94,28 +474,896 @@ class SQLiteDatabase(object):
             {'type_arg': 'table'},
         )]
 
-    @db_transaction
     def do_creation(self) -> None:
-        for table in self.tables.values():
-            self.connection.execute(table.schema_to_sql())
-            for trigger_def in table.triggers_to_sql():
-                self.connection.execute(trigger_def)
+        for table_name in self.partitions:
+            self.attach_partitions(table_name)
+        self.create_tables()
 
     @db_transaction
-    def insert(self, table_name: str, value_dict: Dict[str, Any]):
+    def create_tables(self) -> None:
+        if self.page_size is not None:
+            self.set_pragma('page_size', int(self.page_size))
+        if self.auto_vacuum is not None:
+            self.set_pragma('auto_vacuum', SQLiteAutoVacuum(self.auto_vacuum).value)
+        for table in self.tables.values():
+            if table.table_name not in self.partitions:
+                self.create_table(self.connection, table)
+        self.existing_tables = self.get_existing_tables()
+        if self.replica is not None and self.replica.loaded_at is None:
+            self.replica.load(self.connection)
+
+    @staticmethod
+    def create_table(connection: sqlite3.Connection, table: SQLiteTable) -> None:
+        connection.execute(table.schema_to_sql())
+        for auxiliary_def in table.auxiliary_schema_to_sql():
+            connection.execute(auxiliary_def)
+        if table.get_compressed_columns():
+            SQLiteCompressionMetadata.record(connection, table)
+        for trigger_def in table.triggers_to_sql():
+            connection.execute(trigger_def)
+
+    def attach_partitions(
+        self,
+        table_name: str,
+        values: Optional[Iterable[Any]] = None,
+    ) -> None:
+        """Attach the partitions of table_name for the periods containing
+        values, or else the most recent existing ones. ATTACH can not run
+        inside a transaction.
+        """
+        table = self.get_table(table_name)
+        table.validate_columns()
+        partitions = self.partitions[table_name]
+        if values is not None:
+            keys = list(dict.fromkeys(partitions.get_key(value) for value in values))
+            if len(keys) > partitions.max_attached:
+                raise ValueError(
+                    f'Rows span {len(keys)} partitions of "{table_name}", more '
+                    f'than the {partitions.max_attached} that can be attached'
+                )
+        else:
+            keys = partitions.get_existing_keys()[-partitions.max_attached:]
+        for key in keys:
+            partitions.attach(self.connection, key, self.create_table)
+        if not keys:
+            partitions.refresh_view(self.connection)
+
+    def get_insert_target(
+        self,
+        table: SQLiteTable,
+        partition_key: Optional[str],
+    ) -> str:
+        if partition_key is None:
+            return table.table_name
+        partitions = self.partitions[table.table_name]
+        schema_name = partitions.attach(
+            self.connection, partition_key, self.create_table
+        )
+        return f'{schema_name}.{table.table_name}'
+
+    def get_partition_key(self, table: SQLiteTable, value: Any) -> Optional[str]:
+        partitions = self.partitions.get(table.table_name)
+        if partitions is None:
+            return None
+        return partitions.get_key(value)
+
+    def drop_partitions(self, table_name: str, before: Any) -> List[pathlib.Path]:
+        """Detach and delete the partitions of table_name for periods
+        before the one containing before.
+        """
         try:
-            table = self.tables[table_name]
+            partitions = self.partitions[table_name]
+        except KeyError:
+            raise ValueError(f'Table "{table_name}" is not partitioned')
+        return partitions.drop_before(self.connection, before)
+
+    def get_table(self, table_name: str) -> SQLiteTable:
+        try:
+            return self.tables[table_name]
         except KeyError:
             raise ValueError(f'Database has no table: "{table_name}"')
+
+    def get_columns(
+        self,
+        table: SQLiteTable,
+        column_names: Iterable[str],
+    ) -> List[SQLiteColumn]:
+        try:
+            return [table.columns[name] for name in column_names]
+        except KeyError as e:
+            raise ValueError(f'Table "{table.table_name}" has no Column {e}')
+
+    def insert(self, table_name: str, value_dict: Dict[str, Any]):
+        table = self.get_table(table_name)
+        partition_key = self.get_partition_key(
+            table, value_dict.get(table.partition_by)
+        )
         for column_name, value in value_dict.items():
             try:
                 column = table.columns[column_name]
             except KeyError:
                 raise ValueError(f'Table "{table_name}" has no Column "{column_name}"')
-            value_dict[column_name] = column.prepare_for_insert(value)
+            value_dict[column_name] = column.compress_value(
+                self.codecs.adapt(column.prepare_for_insert(value))
+            )
+        target = self.get_insert_target(table, partition_key)
+        self.insert_values(table, target, value_dict)
+
+    def insert_values(
+        self,
+        table: SQLiteTable,
+        target: str,
+        value_dict: Dict[str, Any],
+    ) -> None:
+        table_name = table.table_name
         insert_statement = self.insert_template.substitute({
-            'table_name': table_name,
+            'table_name': target,
             'column_names': ', '.join(value_dict.keys()),
             'value_template': ', '.join(f':{x}' for x in value_dict.keys()),
         })
-        self.connection.execute(insert_statement, value_dict)
+        with self.write_transaction():
+            if self.is_replicated(table_name):
+                (stored,) = self.insert_returning(
+                    table, insert_statement, (value_dict,)
+                )
+                SQLiteTransaction.on_commit(
+                    self.connection,
+                    partial(self.replica.execute, table_name, stored),
+                )
+            else:
+                self.connection.execute(insert_statement, value_dict)
+            SQLiteTransaction.add_rows(self.connection, 1)
+
+    def insert_returning(
+        self,
+        table: SQLiteTable,
+        insert_statement: str,
+        rows: Iterable[Union[Sequence, Dict[str, Any]]],
+    ) -> List[tuple]:
+        """Insert rows one at a time, returning each row as stored, with
+        its rowid and defaults, for the replica to replay.
+        """
+        returning = ', '.join(self.replica.get_stored_names(table))
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        try:
+            return [
+                cursor.execute(f'{insert_statement} RETURNING {returning}', row)
+                .fetchone()
+                for row in rows
+            ]
+        finally:
+            cursor.close()
+
+    def execute(
+        self,
+        sql: str,
+        params: Union[Sequence, Dict[str, Any]] = (),
+        table_name: Optional[str] = None,
+    ) -> sqlite3.Cursor:
+        """Run sql with this database's adapters, converting results named
+        like the columns of table_name.
+        """
+        cursor = self.connection.cursor()
+        if table_name is not None:
+            cursor.row_factory = self.codecs.get_row_factory(
+                self.get_table(table_name)
+            )
+        return cursor.execute(sql, self.codecs.adapt_params(params))
+
+    def get_raw_value(
+        self,
+        table_name: str,
+        column_name: str,
+        key_name: Union[str, Sequence[str]],
+        key: Any,
+    ) -> Any:
+        """With several key columns, key is a tuple of their values."""
+        if isinstance(key_name, str):
+            where_clause = f'WHERE {key_name} = ?'
+            params = (key,)
+        else:
+            where_clause = 'WHERE ({}) = ({})'.format(
+                ', '.join(key_name), ', '.join('?' for _ in key_name)
+            )
+            params = tuple(key)
+        cursor = self.get_read_connection(table_name).cursor()
+        cursor.row_factory = None
+        row = cursor.execute(
+            self.select_template.substitute(defaultdict(str, {
+                'table_name': table_name,
+                'column_names': column_name,
+                'where_clause': where_clause,
+            })),
+            self.codecs.adapt_params(params),
+        ).fetchone()
+        cursor.close()
+        return None if row is None else row[0]
+
+    def select(
+        self,
+        table_name: str,
+        column_names: Optional[List[str]] = None,
+        where: Optional[str] = None,
+        params: Union[Sequence, Dict[str, Any]] = (),
+        defer: Sequence[str] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[LazyRow]:
+        """Columns named in defer are read per row only if accessed.
+
+        The partitions of a partitioned table that can not all be
+        attached together are read a batch at a time, in period order;
+        rows can then only be ordered by the partition column, and no
+        columns deferred.
+        """
+        table = self.get_table(table_name)
+        columns = self.get_columns(table, column_names or table.columns.keys())
+        self.get_columns(table, defer)
+        substitutions: DefaultDict[str, str] = defaultdict(str)
+        substitutions['table_name'] = table_name
+        if where:
+            substitutions['where_clause'] = f'WHERE {where}'
+        if order_by is not None:
+            self.get_columns(table, (order_by,))
+            direction = 'DESC' if descending else 'ASC'
+            substitutions['order_clause'] = f'ORDER BY {order_by} {direction}'
+        batched = (
+            table_name in self.partitions
+            and bool(self.partitions[table_name].get_missing_keys())
+        )
+        if batched and (defer or order_by not in (None, table.partition_by)):
+            raise ValueError(
+                f'"{table_name}" has more partitions than can be attached, so '
+                f'its rows can only be ordered by "{table.partition_by}" and '
+                f'no columns can be deferred'
+            )
+        remaining = limit
+        for connection in self.iter_read_connections(
+            table_name, reverse=order_by is not None and descending
+        ):
+            if remaining is not None:
+                substitutions['limit_clause'] = f'LIMIT {int(remaining)}'
+            for row in self.select_rows(
+                table, columns, defer, substitutions, params, connection
+            ):
+                yield row
+                if remaining is not None:
+                    remaining -= 1
+            if remaining is not None and remaining <= 0:
+                return
+
+    def select_rows(
+        self,
+        table: SQLiteTable,
+        columns: List[SQLiteColumn],
+        defer: Sequence[str],
+        substitutions: DefaultDict[str, str],
+        params: Union[Sequence, Dict[str, Any]],
+        connection: Optional[sqlite3.Connection] = None,
+    ) -> Iterator[LazyRow]:
+        """Selected columns are qualified with the table name, so the FROM
+        clause may join other tables.
+        """
+        table_name = table.table_name
+        key_names = table.get_row_key_names()
+        key_name = key_names[0] if len(key_names) == 1 else tuple(key_names)
+        selected_names = [
+            x.column_name for x in columns if x.column_name not in defer
+        ]
+        selected_names.extend(x for x in key_names if x not in selected_names)
+        spec = LazyRowSpec(
+            column_names=[x.column_name for x in columns],
+            selected_names=selected_names,
+            key_name=key_name,
+            converters={x.column_name: self.codecs.get_converter(x) for x in columns},
+            load_deferred=lambda key, column_name: self.get_raw_value(
+                table_name, column_name, key_name, key
+            ),
+        )
+        connection = connection or self.get_read_connection(table_name)
+        cursor = connection.cursor()
+        cursor.row_factory = None
+        substitutions['column_names'] = ', '.join(
+            f'{table_name}.{x}' for x in selected_names
+        )
+        cursor.execute(
+            self.select_template.substitute(substitutions),
+            self.codecs.adapt_params(params),
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for raw in rows:
+                    yield LazyRow(spec, raw)
+        finally:
+            cursor.close()
+
+    def get_key_columns(
+        self,
+        table: SQLiteTable,
+        key_names: Optional[Sequence[str]],
+    ) -> List[SQLiteColumn]:
+        """Columns for key_names, by default the table's row key. rowid
+        is an INTEGER key unless the table has a column of that name.
+        """
+        if isinstance(key_names, str):
+            key_names = (key_names,)
+        return [
+            IntColumn(name)
+            if name == 'rowid' and name not in table.columns and not table.without_rowid
+            else self.get_columns(table, (name,))[0]
+            for name in key_names or table.get_row_key_names()
+        ]
+
+    @contextmanager
+    def load_lookup_keys(
+        self,
+        table_name: str,
+        columns: List[SQLiteColumn],
+        keys: Sequence[Any],
+    ) -> Iterator[Tuple[sqlite3.Connection, int]]:
+        """Write keys to the lookup table on the connection table_name is
+        read from, yielding the connection and the keys' batch number.
+        """
+        arity = len(columns)
+        rows = keys if arity > 1 else ((key,) for key in keys)
+        connection = self.get_read_connection(table_name)
+        batch = next(self.lookup_batches)
+        with self.get_transaction(connection):
+            connection.execute(SQLiteKeyLookup.schema_to_sql(arity))
+            connection.executemany(
+                SQLiteKeyLookup.insert_sql(arity),
+                SQLiteKeyLookup.number_rows(batch, self.encode_chunk(columns, rows)),
+            )
+        try:
+            yield connection, batch
+        finally:
+            with self.get_transaction(connection):
+                connection.execute(SQLiteKeyLookup.delete_sql(arity), (batch,))
+
+    def exists_many(
+        self,
+        table_name: str,
+        keys: Iterable[Any],
+        key_names: Optional[Sequence[str]] = None,
+    ) -> Iterator[Tuple[Any, bool]]:
+        """Yield (key, exists) for each distinct key, in the order given,
+        from a single query against a TEMP table of the keys.
+        """
+        table = self.get_table(table_name)
+        columns = self.get_key_columns(table, key_names)
+        keys = list(dict.fromkeys(keys))
+        with self.load_lookup_keys(table_name, columns, keys) as (connection, batch):
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            cursor.execute(
+                SQLiteKeyLookup.exists_sql(
+                    table_name, [x.column_name for x in columns]
+                ),
+                (batch,),
+            )
+            try:
+                for key, row in zip(keys, cursor):
+                    yield key, bool(row[0])
+            finally:
+                cursor.close()
+
+    def fetch_by_keys(
+        self,
+        table_name: str,
+        keys: Iterable[Any],
+        key_names: Optional[Sequence[str]] = None,
+        column_names: Optional[List[str]] = None,
+        defer: Sequence[str] = (),
+    ) -> Iterator[LazyRow]:
+        """Yield LazyRows matching keys, in key order; missing keys are
+        skipped.
+        """
+        table = self.get_table(table_name)
+        key_columns = self.get_key_columns(table, key_names)
+        columns = self.get_columns(table, column_names or table.columns.keys())
+        self.get_columns(table, defer)
+        keys = list(dict.fromkeys(keys))
+        substitutions: DefaultDict[str, str] = defaultdict(str)
+        substitutions['table_name'] = SQLiteKeyLookup.join_to_sql(
+            table_name, [x.column_name for x in key_columns]
+        )
+        substitutions['where_clause'] = SQLiteKeyLookup.where_clause
+        substitutions['order_clause'] = SQLiteKeyLookup.order_clause
+        with self.load_lookup_keys(table_name, key_columns, keys) as (
+            connection, batch
+        ):
+            yield from self.select_rows(
+                table, columns, defer, substitutions, (batch,), connection
+            )
+
+    def get_blob_column(self, table: SQLiteTable, column_name: str) -> SQLiteColumn:
+        column = self.get_columns(table, (column_name,))[0]
+        if column.sqlite_type is not SQLiteType.BLOB or column.compressor:
+            raise ValueError(
+                f'Column "{column_name}" is not an uncompressed BLOB column'
+            )
+        if table.table_name in self.partitions or self.is_replicated(table.table_name):
+            raise ValueError(
+                f'BLOBs of partitioned or replicated table "{table.table_name}" '
+                f'can not be streamed'
+            )
+        return column
+
+    def get_rowid(self, table: SQLiteTable, key: Any) -> int:
+        if table.without_rowid:
+            raise ValueError(f'Table "{table.table_name}" has no rowid')
+        key_name = table.get_primary_key_col_name()
+        if key_name == 'rowid':
+            return key
+        row = self.connection.execute(
+            f'SELECT rowid FROM {table.table_name} WHERE {key_name} = ?', (key,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f'No row in "{table.table_name}" with key {key!r}')
+        return row[0]
+
+    def write_blob(
+        self,
+        table_name: str,
+        column_name: str,
+        key: Any,
+        source: IO[bytes],
+        size: Optional[int] = None,
+    ) -> int:
+        """Replace a BLOB with size bytes read from source in chunks."""
+        table = self.get_table(table_name)
+        self.get_blob_column(table, column_name)
+        with self.write_transaction():
+            return self.fill_blob(
+                table_name, column_name, self.get_rowid(table, key), source, size
+            )
+
+    def fill_blob(
+        self,
+        table_name: str,
+        column_name: str,
+        rowid: int,
+        source: IO[bytes],
+        size: Optional[int] = None,
+    ) -> int:
+        if size is None:
+            size = get_stream_size(source)
+        return write_blob_value(
+            self.connection, table_name, column_name, rowid, source, size
+        )
+
+    def insert_blob(
+        self,
+        table_name: str,
+        value_dict: Dict[str, Any],
+        column_name: str,
+        source: IO[bytes],
+        size: Optional[int] = None,
+    ) -> int:
+        """Insert a row, stream its column_name value from source and
+        return its rowid.
+        """
+        table = self.get_table(table_name)
+        self.get_blob_column(table, column_name)
+        with self.write_transaction():
+            self.insert(table_name, dict(value_dict))
+            rowid = self.connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+            self.fill_blob(table_name, column_name, rowid, source, size)
+        return rowid
+
+    def open_blob(
+        self,
+        table_name: str,
+        column_name: str,
+        key: Any,
+    ) -> SQLiteBlobReader:
+        """A read-only file object over one BLOB value."""
+        table = self.get_table(table_name)
+        self.get_blob_column(table, column_name)
+        return open_blob_reader(
+            self.connection, table_name, column_name, self.get_rowid(table, key)
+        )
+
+    def read_blob(
+        self,
+        table_name: str,
+        column_name: str,
+        key: Any,
+        target: IO[bytes],
+    ) -> int:
+        with self.open_blob(table_name, column_name, key) as reader:
+            return reader.copy_to(target)
+
+    def select_members(
+        self,
+        table_name: str,
+        column_name: str,
+        values: Sequence[int],
+        match_all: bool = False,
+        **select_kwargs,
+    ) -> Iterator[LazyRow]:
+        table = self.get_table(table_name)
+        column = self.get_columns(table, (column_name,))[0]
+        if not column.indexed:
+            raise ValueError(f'Column "{column_name}" is not an indexed list')
+        where, params = SQLiteMembershipIndex.filter_to_sql(
+            table, column_name, values, match_all
+        )
+        return self.select(table_name, where=where, params=params, **select_kwargs)
+
+    def contains(
+        self,
+        table_name: str,
+        column_name: str,
+        value: int,
+        **select_kwargs,
+    ) -> Iterator[LazyRow]:
+        """Rows whose indexed IntList in column_name contains value."""
+        return self.select_members(table_name, column_name, [value], **select_kwargs)
+
+    def contains_any(
+        self,
+        table_name: str,
+        column_name: str,
+        values: Sequence[int],
+        **select_kwargs,
+    ) -> Iterator[LazyRow]:
+        return self.select_members(table_name, column_name, values, **select_kwargs)
+
+    def contains_all(
+        self,
+        table_name: str,
+        column_name: str,
+        values: Sequence[int],
+        **select_kwargs,
+    ) -> Iterator[LazyRow]:
+        return self.select_members(
+            table_name, column_name, values, match_all=True, **select_kwargs
+        )
+
+    def search(
+        self,
+        table_name: str,
+        query: str,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """Return the rowids of rows matching an FTS5 query, best match
+        first by bm25 rank.
+        """
+        table = self.get_table(table_name)
+        if not table.get_searchable_columns():
+            raise ValueError(f'Table "{table_name}" has no searchable columns')
+        connection = self.get_read_connection(table_name)
+        return [
+            row[0] for row in
+            connection.execute(table.search_to_sql(limit), (query,))
+        ]
+
+    def get_max_variables(self) -> int:
+        """The most parameters a statement may bind. Connection.getlimit
+        needs Python 3.11.
+        """
+        if hasattr(self.connection, 'getlimit'):
+            return self.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        if sqlite3.sqlite_version_info >= (3, 32, 0):
+            return 32766
+        return 999
+
+    def prefetch(
+        self,
+        rows: Sequence[LazyRow],
+        table_name: str,
+        related_table_name: str,
+        column_name: Optional[str] = None,
+        column_names: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[Any, List[LazyRow]]:
+        """Load the rows of related_table_name for rows of table_name, keyed
+        by each row's key, with one IN query per chunk of values.
+        """
+        table = self.get_table(table_name)
+        related_table = self.get_table(related_table_name)
+        relation = get_relation(table, related_table, column_name)
+        row_column = relation.get_row_column()
+        related_column = relation.get_related_column()
+        if column_names is not None and related_column not in column_names:
+            column_names = list(column_names) + [related_column]
+        values = list(dict.fromkeys(
+            value for value in (row.get_raw(row_column) for row in rows)
+            if value is not None
+        ))
+        chunk_size = min(chunk_size or self.batch_size, self.get_max_variables())
+        related_rows: List[LazyRow] = []
+        for chunk in chunked(values, chunk_size):
+            placeholders = ', '.join('?' for _ in chunk)
+            related_rows.extend(self.select(
+                related_table_name,
+                column_names=column_names,
+                where=f'{related_column} IN ({placeholders})',
+                params=chunk,
+                order_by=order_by,
+            ))
+        groups = group_by_value(related_rows, related_column)
+        return {
+            row.get_key(): groups.get(row.get_raw(row_column), [])
+            for row in rows
+        }
+
+    def get_aggregate(self, table_name: str, aggregate_name: str) -> List[sqlite3.Row]:
+        table = self.get_table(table_name)
+        try:
+            aggregate = table.aggregates[aggregate_name]
+        except KeyError:
+            raise ValueError(
+                f'Table "{table_name}" has no aggregate "{aggregate_name}"'
+            )
+        summary_table = aggregate.get_summary_table(table)
+        cursor = self.get_read_connection(table_name).cursor()
+        cursor.row_factory = self.codecs.get_row_factory(summary_table)
+        return cursor.execute(f'SELECT * FROM {summary_table.table_name}').fetchall()
+
+    def read_changes(
+        self,
+        after_seq: int = 0,
+        limit: int = 1000,
+        table_names: Optional[Sequence[str]] = None,
+    ) -> List[SQLiteChange]:
+        """Changes logged after sequence number after_seq, oldest first."""
+        params = [after_seq] + list(table_names or ()) + [limit]
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(SQLiteChangeLog.read_sql(table_names), params)
+        return [SQLiteChangeLog.to_change(row) for row in rows]
+
+    def get_change_consumer(
+        self,
+        name: str,
+        table_names: Optional[Sequence[str]] = None,
+    ) -> SQLiteChangeConsumer:
+        return SQLiteChangeConsumer(self, name, table_names)
+
+    def prune_changes(
+        self,
+        up_to_seq: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """Delete logged changes up to up_to_seq, by default everything
+        every consumer has acknowledged, one batch per commit.
+        """
+        if up_to_seq is None:
+            up_to_seq = self.connection.execute(
+                f'SELECT min(seq) FROM {SQLiteChangeLog.offsets_table_name}'
+            ).fetchone()[0]
+            if up_to_seq is None:
+                return 0
+        deleted = 0
+        while True:
+            with self.write_transaction():
+                cursor = self.connection.execute(
+                    SQLiteChangeLog.prune_sql(),
+                    (up_to_seq, batch_size or self.batch_size),
+                )
+            if cursor.rowcount <= 0:
+                return deleted
+            deleted += cursor.rowcount
+
+    @staticmethod
+    def convert_chunk(converters: List[Callable], rows: Iterable) -> Iterator[tuple]:
+        """Apply one converter per column over a chunk of rows, working
+        column-wise so each converter is mapped over a whole column.
+        """
+        columns = zip(*rows)
+        return zip(*(map(conv, col) for conv, col in zip(converters, columns)))
+
+    def encode_chunk(
+        self,
+        columns: List[SQLiteColumn],
+        rows: Iterable,
+    ) -> Iterator[tuple]:
+        values = zip(*rows)
+        return zip(*(
+            col.compress_batch(self.codecs.adapt_batch(col.encode_batch(vals)))
+            for col, vals in zip(columns, values)
+        ))
+
+    @staticmethod
+    def decode_chunk(columns: List[SQLiteColumn], rows: Iterable) -> Iterator[tuple]:
+        values = zip(*rows)
+        return zip(*(
+            col.decode_batch(col.decompress_batch(vals))
+            for col, vals in zip(columns, values)
+        ))
+
+    def insert_many(
+        self,
+        table_name: str,
+        column_names: List[str],
+        rows: Iterable[Sequence],
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """Insert rows in one transaction or, with a commit_latency_target
+        and no chunk_size, in separately committed chunks of adaptive size.
+        Rows spanning more partitions than can be attached together are
+        inserted one transaction per batch of partitions.
+        """
+        table = self.get_table(table_name)
+        columns = self.get_columns(table, column_names)
+        if table_name in self.partitions:
+            if table.partition_by not in column_names:
+                raise ValueError(
+                    f'Rows for "{table_name}" must include "{table.partition_by}"'
+                )
+            partitions = self.partitions[table_name]
+            position = column_names.index(table.partition_by)
+            groups: Dict[str, List[Sequence]] = defaultdict(list)
+            for row in rows:
+                groups[partitions.get_key(row[position])].append(row)
+            keys = sorted(groups)
+            if len(keys) > partitions.max_attached:
+                return sum(
+                    self.insert_many(
+                        table_name,
+                        column_names,
+                        [row for key in batch for row in groups[key]],
+                        chunk_size,
+                    )
+                    for batch in chunked(keys, partitions.max_attached)
+                )
+            # Every partition the rows need is attached up front, as that
+            # can not happen once the transaction has begun.
+            rows = [row for key in keys for row in groups[key]]
+            self.attach_partitions(table_name, (row[position] for row in rows))
+        if (
+            self.batch_sizer is None
+            or chunk_size is not None
+            or self.connection.in_transaction
+        ):
+            with self.write_transaction():
+                return sum(
+                    self.insert_chunk(table, columns, column_names, chunk)
+                    for chunk in chunked(rows, chunk_size or self.batch_size)
+                )
+        row_count = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, self.batch_sizer.size))
+            if not chunk:
+                return row_count
+            with self.write_transaction() as transaction:
+                row_count += self.insert_chunk(table, columns, column_names, chunk)
+            self.batch_sizer.observe(transaction.commit_time)
+
+    def insert_chunk(
+        self,
+        table: SQLiteTable,
+        columns: List[SQLiteColumn],
+        column_names: List[str],
+        chunk: List[Sequence],
+    ) -> int:
+        if table.table_name in self.partitions:
+            position = column_names.index(table.partition_by)
+            groups: Dict[Optional[str], List] = defaultdict(list)
+            for row in chunk:
+                groups[self.get_partition_key(table, row[position])].append(row)
+        else:
+            groups = {None: chunk}
+        for partition_key, group in groups.items():
+            insert_statement = self.insert_template.substitute({
+                'table_name': self.get_insert_target(table, partition_key),
+                'column_names': ', '.join(column_names),
+                'value_template': ', '.join('?' for _ in column_names),
+            })
+            encoded = list(self.encode_chunk(columns, group))
+            if self.is_replicated(table.table_name):
+                stored = self.insert_returning(table, insert_statement, encoded)
+                SQLiteTransaction.on_commit(
+                    self.connection,
+                    partial(self.replica.executemany, table.table_name, stored),
+                )
+            else:
+                self.connection.executemany(insert_statement, encoded)
+        SQLiteTransaction.add_rows(self.connection, len(chunk))
+        return len(chunk)
+
+    def select_batches(
+        self,
+        table_name: str,
+        column_names: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[tuple]]:
+        """Yield lists of row tuples, decoding each column a chunk at a time."""
+        table = self.get_table(table_name)
+        columns = self.get_columns(table, column_names or table.columns.keys())
+        query = self.select_template.substitute(defaultdict(str, {
+            'table_name': table_name,
+            'column_names': ', '.join(f'+{x.column_name}' for x in columns),
+        }))
+        for connection in self.iter_read_connections(table_name):
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            cursor.execute(query)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size or self.batch_size)
+                    if not rows:
+                        break
+                    yield list(self.decode_chunk(columns, rows))
+            finally:
+                cursor.close()
+
+    def import_csv(
+        self,
+        table_name: str,
+        source: Union[str, pathlib.Path, IO[str]],
+        column_map: Optional[Dict[str, str]] = None,
+        chunk_size: Optional[int] = None,
+        **fmtparams,
+    ) -> int:
+        """Load a CSV file into table_name with insert_many, so in a single
+        transaction unless the rows span more partitions than can be
+        attached. column_map renames headers; other keyword arguments are
+        passed to csv.reader.
+        """
+        table = self.get_table(table_name)
+        column_map = column_map or {}
+        chunk_size = chunk_size or self.batch_size
+        with open_text_stream(source, 'r') as fd:
+            reader = csv.reader(fd, **fmtparams)
+            try:
+                header = next(reader)
+            except StopIteration:
+                return 0
+            columns = self.get_columns(
+                table, (column_map.get(name, name) for name in header)
+            )
+            converters = [column.from_csv for column in columns]
+            column_names = [column.column_name for column in columns]
+            chunks = chunked(self.read_csv_rows(reader, len(header)), chunk_size)
+            rows = itertools.chain.from_iterable(
+                self.convert_chunk(converters, chunk) for chunk in chunks
+            )
+            return self.insert_many(table_name, column_names, rows, chunk_size)
+
+    @staticmethod
+    def read_csv_rows(reader: Any, width: int) -> Iterator[List[str]]:
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                raise ValueError(
+                    f'CSV line {reader.line_num} has {len(row)} fields, '
+                    f'expected {width}'
+                )
+            yield row
+
+    def export_csv(
+        self,
+        table_name: str,
+        target: Union[str, pathlib.Path, IO[str]],
+        column_names: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None,
+        write_header: bool = True,
+        **fmtparams,
+    ) -> int:
+        """Stream table_name to a CSV file, holding at most chunk_size
+        rows in memory at a time.
+        """
+        table = self.get_table(table_name)
+        columns = self.get_columns(table, column_names or table.columns.keys())
+        column_names = [column.column_name for column in columns]
+        converters = [column.to_csv for column in columns]
+        row_count = 0
+        with open_text_stream(target, 'w') as fd:
+            writer = csv.writer(fd, **fmtparams)
+            if write_header:
+                writer.writerow(column_names)
+            for rows in self.select_batches(table_name, column_names, chunk_size):
+                writer.writerows(self.convert_chunk(converters, rows))
+                row_count += len(rows)
+        return row_count
@@ -0,0 +1,289 @@
+import re
+import sqlite3
+from collections import Counter
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .table import SQLiteTable
+
+
+class SQLiteScan(NamedTuple):
+    table_name: str
+    rows: int
+    detail: str
+
+
+class SQLiteIndexSuggestion(NamedTuple):
+    """Columns for SQLiteTable(indexes=...) and the statement creating
+    the same index on an existing database.
+    """
+    table_name: str
+    column_names: Tuple[str, ...]
+    sql: str
+
+
+class SQLiteQueryFinding(NamedTuple):
+    """source is 'query' or the name of the trigger the statement
+    belongs to; executions is 0 for triggers.
+    """
+    shape: str
+    source: str
+    executions: int
+    scans: Tuple[SQLiteScan, ...]
+    suggestions: Tuple[SQLiteIndexSuggestion, ...]
+
+
+literal_pattern = re.compile(
+    r"[xX]'[0-9a-fA-F]*'|'(?:[^']|'')*'"
+    r"|(?<![\w.])-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?(?!\w)"
+)
+trigger_row_pattern = re.compile(r'\b(?:old|new)\.\w+', re.IGNORECASE)
+in_list_pattern = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+whitespace_pattern = re.compile(r'\s+')
+statement_pattern = re.compile(r"(?:'(?:[^']|'')*'|[^;'])+")
+# SEARCH without USING reads the whole table too.
+scan_pattern = re.compile(r'^SCAN (\w+)|^SEARCH (\w+)$')
+alias_pattern = re.compile(
+    r'\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)\s+AS\s+(\w+)', re.IGNORECASE
+)
+order_pattern = re.compile(r'\bORDER BY\s+(.+?)(?:\bLIMIT\b|$)', re.IGNORECASE)
+constraint_region_pattern = re.compile(r'\b(?:WHERE|ON)\b', re.IGNORECASE)
+equality_ops = r'(?:==?|IS\b|IN\b)'
+# LIKE and GLOB are left out: SQLite only uses an index for them when
+# the column's collation matches the operator's case sensitivity.
+range_ops = r'(?:<=?|>=?|BETWEEN\b)'
+explained_statements = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+def get_shape(statement: str) -> str:
+    """statement with literals replaced by ? and IN lists collapsed, so
+    that executions differing only in their values share a shape.
+    """
+    shape = literal_pattern.sub('?', statement)
+    shape = in_list_pattern.sub('IN (?)', shape)
+    return whitespace_pattern.sub(' ', shape).strip()
+
+
+def get_trigger_statements(sql: str) -> List[str]:
+    """The body statements of a CREATE TRIGGER, with references to the
+    old and new rows replaced by parameters.
+    """
+    body = sql[sql.upper().index(' BEGIN ') + 7:sql.upper().rindex(' END')]
+    statements = [x.strip() for x in statement_pattern.findall(body)]
+    return [trigger_row_pattern.sub('?', x) for x in statements if x]
+
+
+def get_constrained_columns(
+    shape: str,
+    table: SQLiteTable,
+    names: Iterable[str],
+) -> List[str]:
+    """Columns of table the statement filters or orders on, in the order
+    they best serve as index columns.
+    """
+    match = constraint_region_pattern.search(shape)
+    region = shape[match.end():] if match else ''
+    qualifier = '(?:(?:{})\\.)?'.format('|'.join(re.escape(x) for x in names))
+    found: Dict[str, List[str]] = {}
+    for ops in (equality_ops, range_ops):
+        positions = []
+        for column_name in table.columns:
+            pattern = re.compile(
+                rf'(?<![\w.]){qualifier}{re.escape(column_name)}\s*{ops}',
+                re.IGNORECASE,
+            )
+            match = pattern.search(region)
+            if match:
+                positions.append((match.start(), column_name))
+        found[ops] = [name for _, name in sorted(positions)]
+    columns = dict.fromkeys(found[equality_ops])
+    ranges = [x for x in found[range_ops] if x not in columns]
+    if ranges:
+        columns[ranges[0]] = None
+        return list(columns)
+    order_match = order_pattern.search(shape)
+    if order_match:
+        for term in order_match.group(1).split(','):
+            name = term.split()[0].split('.')[-1] if term.split() else ''
+            if name in table.columns:
+                columns[name] = None
+    return list(columns)
+
+
+class SQLiteQueryDiagnostics(object):
+    """Records statement shapes through a trace callback and reports those
+    whose plans scan a table of at least min_rows rows.
+    """
+
+    def __init__(self, min_rows: int = 10000) -> None:
+        self.min_rows = min_rows
+        self.shapes: Counter = Counter()
+        self.paused = False
+
+    def trace(self, statement: str) -> None:
+        if self.paused:
+            return
+        if statement.lstrip()[:7].upper().startswith(explained_statements):
+            self.shapes[get_shape(statement)] += 1
+
+    def attach(self, connection: sqlite3.Connection) -> None:
+        connection.set_trace_callback(self.trace)
+
+    def reset(self) -> None:
+        self.shapes.clear()
+
+    @staticmethod
+    def explain(connection: sqlite3.Connection, shape: str) -> Optional[List[str]]:
+        """The plan details for shape, or None if it cannot be planned,
+        for instance because a temporary table it used is gone.
+        """
+        # EXPLAIN does not notice schema changes, so a statement sqlite3
+        # cached before an index was created or dropped would report the
+        # old plan; the schema version keeps cached statements apart.
+        schema_version = connection.execute('PRAGMA schema_version').fetchone()[0]
+        try:
+            rows = connection.execute(
+                f'EXPLAIN QUERY PLAN {shape} -- {schema_version}',
+                (None,) * shape.count('?'),
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+        return [tuple(row)[3] for row in rows]
+
+    @staticmethod
+    def get_table_rows(connection: sqlite3.Connection, table_name: str) -> int:
+        """Rows in table_name, from sqlite_stat1 when ANALYZE has run."""
+        try:
+            row = connection.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1', (table_name,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is not None:
+            return int(tuple(row)[0].split()[0])
+        return connection.execute(f'SELECT COUNT(*) FROM {table_name}').fetchone()[0]
+
+    @staticmethod
+    def get_index_prefixes(
+        connection: sqlite3.Connection,
+        table_name: str,
+    ) -> List[Tuple[str, ...]]:
+        prefixes = []
+        for index in connection.execute(f'PRAGMA index_list({table_name})'):
+            index_name = tuple(index)[1]
+            prefixes.append(tuple(
+                tuple(row)[2]
+                for row in connection.execute(f"PRAGMA index_info('{index_name}')")
+            ))
+        return prefixes
+
+    def suggest_index(
+        self,
+        connection: sqlite3.Connection,
+        shape: str,
+        table: SQLiteTable,
+        aliases: Dict[str, str],
+    ) -> Optional[SQLiteIndexSuggestion]:
+        names = [table.table_name]
+        names.extend(x for x, name in aliases.items() if name == table.table_name)
+        column_names = tuple(get_constrained_columns(shape, table, names))
+        if not column_names:
+            return None
+        for prefix in self.get_index_prefixes(connection, table.table_name):
+            if prefix[:len(column_names)] == column_names:
+                return None
+        return SQLiteIndexSuggestion(
+            table.table_name,
+            column_names,
+            table.index_template.substitute({
+                'exists': table.get_exists_sql(),
+                'index_name': '_'.join((table.table_name,) + column_names),
+                'table_name': table.table_name,
+                'column_names': ', '.join(column_names),
+            }),
+        )
+
+    def analyze_shape(
+        self,
+        connection: sqlite3.Connection,
+        tables: Dict[str, SQLiteTable],
+        shape: str,
+        sizes: Dict[str, int],
+    ) -> Tuple[List[SQLiteScan], List[SQLiteIndexSuggestion]]:
+        scans: List[SQLiteScan] = []
+        suggestions: List[SQLiteIndexSuggestion] = []
+        aliases = {alias: name for name, alias in alias_pattern.findall(shape)}
+        for detail in self.explain(connection, shape) or ():
+            match = scan_pattern.match(detail)
+            if match is None:
+                continue
+            name = match.group(1) or match.group(2)
+            table_name = aliases.get(name, name)
+            if table_name not in tables:
+                continue
+            if table_name not in sizes:
+                sizes[table_name] = self.get_table_rows(connection, table_name)
+            if sizes[table_name] < self.min_rows:
+                continue
+            scans.append(SQLiteScan(table_name, sizes[table_name], detail))
+            suggestion = self.suggest_index(
+                connection, shape, tables[table_name], aliases
+            )
+            if suggestion is not None and suggestion not in suggestions:
+                suggestions.append(suggestion)
+        return scans, suggestions
+
+    def get_trigger_shapes(
+        self,
+        connection: sqlite3.Connection,
+        tables: Dict[str, SQLiteTable],
+    ) -> List[Tuple[str, str]]:
+        rows = connection.execute(
+            "SELECT name, tbl_name, sql FROM sqlite_master WHERE type = 'trigger' "
+            "ORDER BY name"
+        ).fetchall()
+        return [
+            (name, get_shape(statement))
+            for name, table_name, sql in (tuple(row) for row in rows)
+            if table_name in tables
+            for statement in get_trigger_statements(sql)
+        ]
+
+    def analyze(
+        self,
+        connection: sqlite3.Connection,
+        tables: Dict[str, SQLiteTable],
+    ) -> List[SQLiteQueryFinding]:
+        """Findings for every recorded shape and trigger statement that
+        scans a large table, most frequently run first.
+        """
+        sizes: Dict[str, int] = {}
+        candidates = [
+            ('query', shape, executions)
+            for shape, executions in self.shapes.most_common()
+        ]
+        candidates.extend(
+            (name, shape, 0) for name, shape in self.get_trigger_shapes(
+                connection, tables
+            )
+        )
+        findings = []
+        self.paused = True
+        try:
+            for source, shape, executions in candidates:
+                scans, suggestions = self.analyze_shape(
+                    connection, tables, shape, sizes
+                )
+                if scans:
+                    findings.append(SQLiteQueryFinding(
+                        shape, source, executions, tuple(scans), tuple(suggestions)
+                    ))
+        finally:
+            self.paused = False
+        return findings
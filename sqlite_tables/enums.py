@@ -20,6 +20,7 @@ class SQLiteType(str, Enum):
     BLOB = 'BLOB'
     BOOL = 'BOOL'
     INT_LIST = 'INT_LIST'
+    JSON = 'JSON_TEXT'
 
     def __repr__(self):
         return '{}.{}'.format(self.__class__.__name__, self.name)
@@ -32,3 +33,76 @@ class SQLiteConstant(str, Enum):
 
     def __repr__(self):
         return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteTimeStorage(str, Enum):
+    TEXT = 'TEXT'
+    EPOCH_SECONDS = 'EPOCH_SECONDS'
+    EPOCH_MILLISECONDS = 'EPOCH_MILLISECONDS'
+    JULIAN_DAY = 'JULIAN_DAY'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteCompression(str, Enum):
+    ZLIB = 'zlib'
+    LZMA = 'lzma'
+    ZSTD = 'zstd'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteForeignKeyMode(str, Enum):
+    OFF = 'OFF'
+    IMMEDIATE = 'IMMEDIATE'
+    DEFERRED = 'DEFERRED'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteTempStore(str, Enum):
+    DEFAULT = 'DEFAULT'
+    FILE = 'FILE'
+    MEMORY = 'MEMORY'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLitePartitionPeriod(str, Enum):
+    DAY = '%Y%m%d'
+    MONTH = '%Y%m'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteTransactionMode(str, Enum):
+    DEFERRED = 'DEFERRED'
+    IMMEDIATE = 'IMMEDIATE'
+    EXCLUSIVE = 'EXCLUSIVE'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteAutoVacuum(str, Enum):
+    NONE = 'NONE'
+    FULL = 'FULL'
+    INCREMENTAL = 'INCREMENTAL'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
+
+
+class SQLiteCheckpointMode(str, Enum):
+    PASSIVE = 'PASSIVE'
+    FULL = 'FULL'
+    RESTART = 'RESTART'
+    TRUNCATE = 'TRUNCATE'
+
+    def __repr__(self):
+        return '{}.{}'.format(self.__class__.__name__, self.name)
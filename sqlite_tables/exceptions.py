@@ -1,3 +1,6 @@
+import sqlite3
+
+
 class InvalidColumnConfiguration(Exception):
     pass
 
@@ -8,3 +11,13 @@ class InvalidTableConfiguration(Exception):
 
 class InvalidDatabaseConfiguration(Exception):
     pass
+
+
+class ForeignKeyViolation(sqlite3.IntegrityError):
+    """Raised when a foreign key check finds rows without a parent;
+    violations lists them.
+    """
+
+    def __init__(self, violations) -> None:
+        super().__init__(f'{len(violations)} foreign key violation(s)')
+        self.violations = violations
@@ -0,0 +1,64 @@
+import sqlite3
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+class SQLiteForeignKeyViolation(NamedTuple):
+    table_name: str
+    rowid: Optional[int]
+    parent_table_name: str
+    column_names: Tuple[str, ...]
+    values: Tuple[Any, ...]
+
+
+def get_foreign_key_columns(
+    connection: sqlite3.Connection,
+    table_name: str,
+) -> Dict[int, Tuple[str, ...]]:
+    """The child columns of each of table_name's foreign keys, by id."""
+    columns: Dict[int, List[str]] = {}
+    for row in connection.execute(f'PRAGMA foreign_key_list({table_name})'):
+        fk_id, seq, _, from_column = tuple(row)[:4]
+        columns.setdefault(fk_id, []).append(from_column)
+    return {fk_id: tuple(names) for fk_id, names in columns.items()}
+
+
+def check_foreign_keys(
+    connection: sqlite3.Connection,
+    table_names: Optional[Sequence[str]] = None,
+) -> List[SQLiteForeignKeyViolation]:
+    """Describe the rows PRAGMA foreign_key_check reports, with the
+    columns and values of the foreign key each breaks.
+    """
+    if table_names:
+        rows = [
+            tuple(row)
+            for table_name in table_names
+            for row in connection.execute(f'PRAGMA foreign_key_check({table_name})')
+        ]
+    else:
+        rows = [tuple(row) for row in connection.execute('PRAGMA foreign_key_check')]
+    fk_columns: Dict[str, Dict[int, Tuple[str, ...]]] = {}
+    violations = []
+    for table_name, rowid, parent_table_name, fk_id in rows:
+        if table_name not in fk_columns:
+            fk_columns[table_name] = get_foreign_key_columns(connection, table_name)
+        column_names = fk_columns[table_name][fk_id]
+        values: Tuple[Any, ...] = ()
+        if rowid is not None:
+            values = tuple(connection.execute(
+                f'SELECT {", ".join(column_names)} FROM {table_name} '
+                f'WHERE rowid = ?',
+                (rowid,),
+            ).fetchone())
+        violations.append(SQLiteForeignKeyViolation(
+            table_name, rowid, parent_table_name, column_names, values
+        ))
+    return violations
@@ -0,0 +1,97 @@
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+)
+
+from .utils import SQLiteTemplate
+
+
+class SQLiteKeyLookup(object):
+    """SQL for answering many key lookups with one join against a TEMP
+    table of keys, shared per connection and key arity.
+    """
+    schema_template = SQLiteTemplate(
+        'CREATE TEMP TABLE IF NOT EXISTS $lookup_table ('
+        'lookup_batch INTEGER NOT NULL, lookup_position INTEGER NOT NULL, '
+        '$key_columns, PRIMARY KEY (lookup_batch, lookup_position)) WITHOUT ROWID'
+    )
+    insert_template = SQLiteTemplate(
+        'INSERT INTO temp.$lookup_table VALUES ($placeholders)'
+    )
+    delete_template = SQLiteTemplate(
+        'DELETE FROM temp.$lookup_table WHERE lookup_batch = ?'
+    )
+    exists_template = SQLiteTemplate(
+        'SELECT EXISTS (SELECT 1 FROM $table_name WHERE $match) '
+        'FROM temp.$lookup_table WHERE lookup_batch = ? ORDER BY lookup_position'
+    )
+    # CROSS JOIN keeps the lookup table as the outer loop, so the target
+    # table is searched by key rather than scanned.
+    join_template = SQLiteTemplate(
+        'temp.$lookup_table CROSS JOIN $table_name ON $match'
+    )
+    where_clause = 'WHERE lookup_batch = ?'
+    order_clause = 'ORDER BY lookup_position'
+
+    @staticmethod
+    def get_lookup_table_name(arity: int) -> str:
+        return f'lookup_keys_{arity}'
+
+    @staticmethod
+    def get_key_column_names(arity: int) -> List[str]:
+        return [f'lookup_key_{i}' for i in range(arity)]
+
+    @classmethod
+    def schema_to_sql(cls, arity: int) -> str:
+        return cls.schema_template.substitute(
+            lookup_table=cls.get_lookup_table_name(arity),
+            key_columns=', '.join(cls.get_key_column_names(arity)),
+        )
+
+    @classmethod
+    def insert_sql(cls, arity: int) -> str:
+        return cls.insert_template.substitute(
+            lookup_table=cls.get_lookup_table_name(arity),
+            placeholders=', '.join('?' for _ in range(arity + 2)),
+        )
+
+    @classmethod
+    def delete_sql(cls, arity: int) -> str:
+        return cls.delete_template.substitute(
+            lookup_table=cls.get_lookup_table_name(arity)
+        )
+
+    @classmethod
+    def get_match_sql(cls, table_name: str, key_names: Sequence[str]) -> str:
+        return ' AND '.join(
+            f'{table_name}.{name} = {lookup_name}'
+            for name, lookup_name in zip(
+                key_names, cls.get_key_column_names(len(key_names))
+            )
+        )
+
+    @classmethod
+    def exists_sql(cls, table_name: str, key_names: Sequence[str]) -> str:
+        """One 0 or 1 per key of a batch, in input order."""
+        return cls.exists_template.substitute(
+            table_name=table_name,
+            lookup_table=cls.get_lookup_table_name(len(key_names)),
+            match=cls.get_match_sql(table_name, key_names),
+        )
+
+    @classmethod
+    def join_to_sql(cls, table_name: str, key_names: Sequence[str]) -> str:
+        """A FROM clause joining a batch of keys to table_name, for use
+        with where_clause and order_clause.
+        """
+        return cls.join_template.substitute(
+            table_name=table_name,
+            lookup_table=cls.get_lookup_table_name(len(key_names)),
+            match=cls.get_match_sql(table_name, key_names),
+        )
+
+    @staticmethod
+    def number_rows(batch: int, rows: Iterable[tuple]) -> Iterator[tuple]:
+        return ((batch, position) + row for position, row in enumerate(rows))
@@ -0,0 +1,244 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .enums import SQLiteCheckpointMode
+
+logger = logging.getLogger(__name__)
+
+# Each WAL frame is a page preceded by a 24 byte header.
+WAL_FRAME_HEADER_SIZE = 24
+
+
+class SQLiteMaintenanceStep(NamedTuple):
+    """error is set instead of result if the task failed."""
+    name: str
+    duration: float
+    result: Any = None
+    error: Optional[str] = None
+
+
+class SQLiteMaintenanceReport(NamedTuple):
+    started: float
+    idle: bool
+    steps: Tuple[SQLiteMaintenanceStep, ...]
+
+    @property
+    def duration(self) -> float:
+        return sum(step.duration for step in self.steps)
+
+    def get_step_names(self) -> List[str]:
+        return [step.name for step in self.steps]
+
+
+class SQLiteMaintenance(object):
+    """Runs ANALYZE, PRAGMA optimize and incremental vacuum while the
+    database is idle, and WAL checkpoints once the WAL grows. start()
+    runs a pass every interval seconds on a thread of its own.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        interval: float = 60.0,
+        idle_time: float = 5.0,
+        analyze_interval: float = 86400.0,
+        analysis_limit: Optional[int] = 1000,
+        vacuum_threshold: int = 1024,
+        vacuum_pages: int = 1024,
+        checkpoint_pages: int = 1000,
+        truncate_pages: int = 10000,
+        history: int = 100,
+        on_report: Optional[Callable[[SQLiteMaintenanceReport], None]] = None,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.idle_time = idle_time
+        self.analyze_interval = analyze_interval
+        self.analysis_limit = analysis_limit
+        self.vacuum_threshold = vacuum_threshold
+        self.vacuum_pages = vacuum_pages
+        self.checkpoint_pages = checkpoint_pages
+        self.truncate_pages = truncate_pages
+        self.on_report = on_report
+        self.reports: Deque[SQLiteMaintenanceReport] = deque(maxlen=history)
+        self.data_version: Optional[int] = None
+        self.last_change = time.monotonic()
+        self.last_analyzed: Optional[float] = None
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def get_pragma(connection: sqlite3.Connection, pragma: str) -> Any:
+        row = connection.execute(f'PRAGMA {pragma}').fetchone()
+        return None if row is None else tuple(row)[0]
+
+    def is_idle(self, connection: sqlite3.Connection) -> bool:
+        """Whether no other connection has committed for idle_time seconds."""
+        now = time.monotonic()
+        data_version = self.get_pragma(connection, 'data_version')
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.last_change = now
+        return now - self.last_change >= self.idle_time
+
+    @classmethod
+    def get_wal_frames(cls, connection: sqlite3.Connection) -> int:
+        """Frames in the main database's WAL, from the size of its file."""
+        if cls.get_pragma(connection, 'journal_mode') != 'wal':
+            return 0
+        path = tuple(connection.execute('PRAGMA database_list').fetchone())[2]
+        try:
+            size = os.path.getsize(f'{path}-wal')
+        except OSError:
+            return 0
+        page_size = cls.get_pragma(connection, 'page_size')
+        return size // (page_size + WAL_FRAME_HEADER_SIZE)
+
+    @staticmethod
+    def has_statistics(connection: sqlite3.Connection) -> bool:
+        return connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone() is not None
+
+    def needs_analyze(self, connection: sqlite3.Connection) -> bool:
+        if self.last_analyzed is None:
+            return not self.has_statistics(connection)
+        return time.monotonic() - self.last_analyzed >= self.analyze_interval
+
+    def analyze(self, connection: sqlite3.Connection) -> None:
+        if self.analysis_limit is not None:
+            connection.execute(f'PRAGMA analysis_limit = {int(self.analysis_limit)}')
+        connection.execute('ANALYZE')
+        self.last_analyzed = time.monotonic()
+
+    @staticmethod
+    def optimize(connection: sqlite3.Connection) -> None:
+        connection.execute('PRAGMA optimize')
+
+    def incremental_vacuum(self, connection: sqlite3.Connection) -> int:
+        before = self.get_pragma(connection, 'freelist_count')
+        # The pragma frees one page per step and returns no rows, which
+        # execute() would stop after; executescript() steps to the end.
+        connection.executescript(
+            f'PRAGMA incremental_vacuum({int(self.vacuum_pages)})'
+        )
+        return before - self.get_pragma(connection, 'freelist_count')
+
+    def needs_vacuum(self, connection: sqlite3.Connection) -> bool:
+        # auto_vacuum reads 2 for INCREMENTAL. executescript() would commit
+        # an open transaction, so none may be.
+        return (
+            not connection.in_transaction
+            and self.get_pragma(connection, 'auto_vacuum') == 2
+            and self.get_pragma(connection, 'freelist_count') >= self.vacuum_threshold
+        )
+
+    @staticmethod
+    def checkpoint(
+        connection: sqlite3.Connection,
+        mode: SQLiteCheckpointMode,
+    ) -> Tuple[int, int, int]:
+        row = connection.execute(
+            f'PRAGMA wal_checkpoint({SQLiteCheckpointMode(mode).value})'
+        ).fetchone()
+        return tuple(row)
+
+    def get_checkpoint_mode(
+        self,
+        connection: sqlite3.Connection,
+        idle: bool,
+    ) -> Optional[SQLiteCheckpointMode]:
+        frames = self.get_wal_frames(connection)
+        if idle and frames >= self.truncate_pages:
+            return SQLiteCheckpointMode.TRUNCATE
+        if frames >= self.checkpoint_pages:
+            return SQLiteCheckpointMode.PASSIVE
+        return None
+
+    @staticmethod
+    def run_step(
+        name: str,
+        func: Callable[[], Any],
+    ) -> SQLiteMaintenanceStep:
+        start = time.perf_counter()
+        try:
+            result = func()
+        except sqlite3.Error as e:
+            return SQLiteMaintenanceStep(
+                name, time.perf_counter() - start, error=str(e)
+            )
+        return SQLiteMaintenanceStep(name, time.perf_counter() - start, result)
+
+    def run(
+        self,
+        connection: sqlite3.Connection,
+        force: bool = False,
+    ) -> SQLiteMaintenanceReport:
+        """With force, the database is treated as idle without checking."""
+        started = time.time()
+        idle = force or self.is_idle(connection)
+        steps = []
+        if idle:
+            if self.needs_analyze(connection):
+                steps.append(self.run_step('analyze', lambda: self.analyze(connection)))
+            steps.append(self.run_step('optimize', lambda: self.optimize(connection)))
+            if self.needs_vacuum(connection):
+                steps.append(self.run_step(
+                    'incremental_vacuum', lambda: self.incremental_vacuum(connection)
+                ))
+        mode = self.get_checkpoint_mode(connection, idle)
+        if mode is not None:
+            steps.append(self.run_step(
+                f'wal_checkpoint({mode.value})',
+                lambda: self.checkpoint(connection, mode),
+            ))
+        report = SQLiteMaintenanceReport(started, idle, tuple(steps))
+        self.reports.append(report)
+        if self.on_report is not None:
+            self.on_report(report)
+        return report
+
+    def start(self) -> None:
+        if self.path is None or self.path == ':memory:':
+            raise ValueError('Background maintenance needs a database path')
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self.run_forever, name='sqlite_tables_maintenance', daemon=True
+        )
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run_forever(self) -> None:
+        connection = sqlite3.connect(self.path)
+        try:
+            self.run_safely(lambda: self.is_idle(connection))
+            while not self.stopped.wait(self.interval):
+                self.run_safely(lambda: self.run(connection))
+        finally:
+            connection.close()
+
+    def run_safely(self, func: Callable[[], Any]) -> None:
+        try:
+            func()
+        except Exception:
+            logger.exception('Maintenance of %s failed', self.path)
@@ -0,0 +1,130 @@
+from typing import (
+    Generator,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from .exceptions import InvalidTableConfiguration
+from .utils import SQLiteTemplate
+
+
+class SQLiteMembershipIndex(object):
+    """A (value, parent) table of the members of an indexed
+    IntListColumn, kept in step by triggers.
+    """
+    schema_template = SQLiteTemplate(
+        'CREATE TABLE $exists $members_table (value INTEGER NOT NULL, '
+        'parent NOT NULL, PRIMARY KEY (value, parent)) WITHOUT ROWID'
+    )
+    parent_index_template = SQLiteTemplate(
+        'CREATE INDEX $exists ${members_table}_parent ON $members_table (parent)'
+    )
+    add_members_template = SQLiteTemplate(
+        "INSERT OR IGNORE INTO $members_table (value, parent) "
+        "SELECT members.value, $parent FROM "
+        "json_each('[' || CAST($list AS TEXT) || ']') AS members"
+    )
+    # Lists rows already in the table when the members table is new (or
+    # empty, when there is nothing to list), not on every start.
+    backfill_template = SQLiteTemplate(
+        "INSERT OR IGNORE INTO $members_table (value, parent) "
+        "SELECT members.value, $table_name.$key_name FROM $table_name, "
+        "json_each('[' || CAST($table_name.$column_name AS TEXT) || ']') AS members "
+        "WHERE NOT EXISTS (SELECT 1 FROM $members_table)"
+    )
+    remove_members_template = SQLiteTemplate(
+        'DELETE FROM $members_table WHERE parent = old.$key_name'
+    )
+    match_any_template = SQLiteTemplate(
+        '$key_name IN (SELECT parent FROM $members_table WHERE value IN ($values))'
+    )
+    match_all_template = SQLiteTemplate(
+        '$key_name IN (SELECT parent FROM $members_table WHERE value IN ($values) '
+        'GROUP BY parent HAVING COUNT(*) = $count)'
+    )
+
+    @staticmethod
+    def get_members_table_name(table, column_name: str) -> str:
+        return f'{table.table_name}_{column_name}_members'
+
+    @staticmethod
+    def get_key_name(table) -> str:
+        key_names = table.get_row_key_names()
+        if len(key_names) != 1:
+            raise InvalidTableConfiguration(
+                f'Indexed lists need a single column key on "{table.table_name}"'
+            )
+        return key_names[0]
+
+    @classmethod
+    def schema_to_sql(cls, table, column_name: str) -> Generator:
+        """The members table and its parent index, then a backfill from
+        rows already in the table.
+        """
+        members_table = cls.get_members_table_name(table, column_name)
+        key_name = cls.get_key_name(table)
+        substitutions = {
+            'exists': table.get_exists_sql(),
+            'members_table': members_table,
+        }
+        yield cls.schema_template.substitute(substitutions)
+        yield cls.parent_index_template.substitute(substitutions)
+        yield cls.backfill_template.substitute(
+            members_table=members_table,
+            table_name=table.table_name,
+            key_name=key_name,
+            column_name=column_name,
+        )
+
+    @classmethod
+    def triggers_to_sql(cls, table, column_name: str) -> Generator:
+        members_table = cls.get_members_table_name(table, column_name)
+        key_name = cls.get_key_name(table)
+        add_members = cls.add_members_template.substitute(
+            members_table=members_table,
+            parent=f'new.{key_name}',
+            list=f'new.{column_name}',
+        )
+        remove_members = cls.remove_members_template.substitute(
+            members_table=members_table, key_name=key_name
+        )
+        events = (
+            ('insert', 'INSERT', add_members),
+            ('delete', 'DELETE', remove_members),
+            (
+                'update',
+                f'UPDATE OF {column_name}, {key_name}',
+                f'{remove_members}; {add_members}',
+            ),
+        )
+        for name, event, expr in events:
+            yield table.trigger_template.substitute({
+                'trigger_name': f'{members_table}_{name}',
+                'when': 'AFTER',
+                'event': event,
+                'table_name': table.table_name,
+                'expr': expr,
+            })
+
+    @classmethod
+    def filter_to_sql(
+        cls,
+        table,
+        column_name: str,
+        values: Sequence[int],
+        match_all: bool = False,
+    ) -> Tuple[str, List[int]]:
+        """A where clause matching rows whose list contains any (or, with
+        match_all, every) one of values.
+        """
+        values = list(dict.fromkeys(int(x) for x in values))
+        if not values:
+            return ('1' if match_all else '0'), []
+        template = cls.match_all_template if match_all else cls.match_any_template
+        return template.substitute(
+            key_name=cls.get_key_name(table),
+            members_table=cls.get_members_table_name(table, column_name),
+            values=', '.join('?' for _ in values),
+            count=len(values),
+        ), values
@@ -0,0 +1,184 @@
+import datetime
+import pathlib
+import sqlite3
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+)
+
+from .column import TemporalColumn
+from .enums import SQLitePartitionPeriod
+from .table import SQLiteTable
+from .utils import SQLiteTemplate
+
+
+def to_datetime(value: Any) -> datetime.datetime:
+    """Interpret a partition column value; a missing one is taken to be
+    now.
+    """
+    if value is None:
+        return datetime.datetime.utcnow()
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    if isinstance(value, (int, float)):
+        return datetime.datetime.utcfromtimestamp(value)
+    return datetime.datetime.strptime(str(value)[:10], '%Y-%m-%d')
+
+
+class TablePartitions(object):
+    """The partition files of one time-partitioned table, at most
+    max_attached of which are attached at a time. The view named after
+    the table only covers the attached ones.
+    """
+    attach_template = SQLiteTemplate('ATTACH DATABASE ? AS $schema_name')
+    detach_template = SQLiteTemplate('DETACH DATABASE $schema_name')
+    view_template = SQLiteTemplate('CREATE TEMP VIEW $table_name AS $selects')
+    empty_select_template = SQLiteTemplate('SELECT $null_columns WHERE 0')
+    drop_view_template = SQLiteTemplate('DROP VIEW IF EXISTS temp.$table_name')
+
+    def __init__(
+        self,
+        table: SQLiteTable,
+        directory: pathlib.Path,
+        max_attached: int = 10,
+    ) -> None:
+        self.table = table
+        self.directory = pathlib.Path(directory)
+        self.max_attached = max_attached
+        self.period = SQLitePartitionPeriod(table.partition_period)
+        self.attached: Dict[str, str] = {}
+        column = table.columns.get(table.partition_by)
+        self.codec = column.codec if isinstance(column, TemporalColumn) else None
+
+    def get_key(self, value: Any) -> str:
+        """The period key for a partition column value, decoding stored
+        numbers first.
+        """
+        if self.codec is not None and isinstance(value, (int, float)):
+            value = self.codec.decode(value)
+        return to_datetime(value).strftime(self.period.value)
+
+    def get_schema_name(self, key: str) -> str:
+        return f'{self.table.table_name}_{key}'
+
+    def get_path(self, key: str) -> pathlib.Path:
+        return self.directory / f'{self.get_schema_name(key)}.db'
+
+    def get_existing_keys(self) -> List[str]:
+        prefix = f'{self.table.table_name}_'
+        return sorted(
+            path.stem[len(prefix):]
+            for path in self.directory.glob(f'{prefix}*.db')
+            if path.stem[len(prefix):].isdigit()
+        )
+
+    def get_missing_keys(self) -> List[str]:
+        return [key for key in self.get_existing_keys() if key not in self.attached]
+
+    def create(
+        self,
+        key: str,
+        create_table: Callable[[sqlite3.Connection, SQLiteTable], None],
+    ) -> None:
+        connection = sqlite3.connect(str(self.get_path(key)))
+        try:
+            with connection:
+                create_table(connection, self.table)
+        finally:
+            connection.close()
+
+    def attach(
+        self,
+        connection: sqlite3.Connection,
+        key: str,
+        create_table: Callable[[sqlite3.Connection, SQLiteTable], None],
+    ) -> str:
+        """Attach the partition for key, creating its file if needed."""
+        if key in self.attached:
+            self.attached[key] = self.attached.pop(key)
+            return self.attached[key]
+        self.check_no_transaction(connection, f'attach partition "{key}"')
+        if not self.get_path(key).exists():
+            self.create(key, create_table)
+        while len(self.attached) >= self.max_attached:
+            self.detach(connection, next(iter(self.attached)))
+        schema_name = self.get_schema_name(key)
+        connection.execute(
+            self.attach_template.substitute(schema_name=schema_name),
+            (str(self.get_path(key)),),
+        )
+        self.attached[key] = schema_name
+        self.refresh_view(connection)
+        return schema_name
+
+    def attach_only(
+        self,
+        connection: sqlite3.Connection,
+        keys: List[str],
+        create_table: Callable[[sqlite3.Connection, SQLiteTable], None],
+    ) -> None:
+        """Make the view cover exactly the partitions for keys."""
+        if set(keys) != set(self.attached):
+            self.check_no_transaction(connection, 'switch partitions')
+        for key in [x for x in self.attached if x not in keys]:
+            self.detach(connection, key)
+        for key in keys:
+            self.attach(connection, key, create_table)
+
+    def detach(self, connection: sqlite3.Connection, key: str) -> None:
+        schema_name = self.attached.pop(key)
+        self.refresh_view(connection)
+        connection.execute(self.detach_template.substitute(schema_name=schema_name))
+
+    def check_no_transaction(
+        self,
+        connection: sqlite3.Connection,
+        action: str,
+    ) -> None:
+        if connection.in_transaction:
+            raise ValueError(
+                f'Can not {action} of "{self.table.table_name}" inside a '
+                f'transaction'
+            )
+
+    def refresh_view(self, connection: sqlite3.Connection) -> None:
+        table_name = self.table.table_name
+        connection.execute(self.drop_view_template.substitute(table_name=table_name))
+        if self.attached:
+            selects = ' UNION ALL '.join(
+                f'SELECT * FROM {schema_name}.{table_name}'
+                for _, schema_name in sorted(self.attached.items())
+            )
+        else:
+            selects = self.empty_select_template.substitute(null_columns=', '.join(
+                f'NULL AS {column_name}' for column_name in self.table.columns
+            ))
+        connection.execute(self.view_template.substitute({
+            'table_name': table_name,
+            'selects': selects,
+        }))
+
+    def drop_before(
+        self,
+        connection: sqlite3.Connection,
+        cutoff: Any,
+    ) -> List[pathlib.Path]:
+        """Detach and delete every partition for a period before the
+        one containing cutoff.
+        """
+        self.check_no_transaction(connection, 'drop partitions')
+        cutoff_key = self.get_key(cutoff)
+        dropped = []
+        for key in self.get_existing_keys():
+            if key >= cutoff_key:
+                continue
+            if key in self.attached:
+                self.detach(connection, key)
+            path = self.get_path(key)
+            path.unlink()
+            dropped.append(path)
+        return dropped
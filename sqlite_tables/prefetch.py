@@ -0,0 +1,84 @@
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from .table import SQLiteTable
+
+
+class SQLiteRelation(NamedTuple):
+    """A foreign key seen from the table rows are being loaded for:
+    forward when those rows hold it, reverse when the related rows do.
+    """
+    table_name: str
+    column_name: str
+    ref_table_name: str
+    ref_column_name: str
+    forward: bool
+
+    def get_row_column(self) -> str:
+        """The column of the given rows whose values are looked up."""
+        return self.column_name if self.forward else self.ref_column_name
+
+    def get_related_column(self) -> str:
+        """The column of the related table those values are matched to."""
+        return self.ref_column_name if self.forward else self.column_name
+
+
+def find_relations(
+    table: SQLiteTable,
+    related_table: SQLiteTable,
+) -> List[SQLiteRelation]:
+    relations = [
+        SQLiteRelation(
+            table.table_name,
+            column.column_name,
+            column.fk_table_ref,
+            column.fk_column_ref,
+            True,
+        )
+        for column in table.foreign_key_columns
+        if column.fk_table_ref == related_table.table_name
+    ]
+    relations.extend(
+        SQLiteRelation(
+            related_table.table_name,
+            column.column_name,
+            column.fk_table_ref,
+            column.fk_column_ref,
+            False,
+        )
+        for column in related_table.foreign_key_columns
+        if column.fk_table_ref == table.table_name
+    )
+    return relations
+
+
+def get_relation(
+    table: SQLiteTable,
+    related_table: SQLiteTable,
+    column_name: Optional[str] = None,
+) -> SQLiteRelation:
+    """column_name picks the foreign key when there are several."""
+    relations = [
+        x for x in find_relations(table, related_table)
+        if column_name is None or x.column_name == column_name
+    ]
+    if len(relations) != 1:
+        problem = 'No foreign key' if not relations else 'Several foreign keys'
+        raise ValueError(
+            f'{problem} between "{table.table_name}" and '
+            f'"{related_table.table_name}"; name the column to use'
+        )
+    return relations[0]
+
+
+def group_by_value(rows: Iterable, column_name: str) -> Dict[Any, List]:
+    groups: Dict[Any, List] = {}
+    for row in rows:
+        groups.setdefault(row.get_raw(column_name), []).append(row)
+    return groups
@@ -0,0 +1,132 @@
+import sqlite3
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .column import SQLiteColumn
+
+
+def get_declared_type_name(declared_type: Any) -> str:
+    return getattr(declared_type, 'value', declared_type).upper()
+
+
+def to_converter_input(value: Any) -> bytes:
+    """Converters registered with sqlite3 always receive bytes; pass
+    them the same thing when converting outside of sqlite3.
+    """
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return str(value).encode('ascii')
+
+
+class SQLiteCodecRegistry(object):
+    """Adapters and converters scoped to a single database. Connections
+    used with a registry should not set detect_types.
+    """
+
+    def __init__(
+        self,
+        adapters: Iterable[Tuple[Any, Callable]] = (),
+        converters: Iterable[Tuple[Any, Callable]] = (),
+    ) -> None:
+        self.adapters: Dict[type, Callable] = dict(adapters)
+        self.converters: Dict[str, Callable] = {
+            get_declared_type_name(declared_type): converter
+            for declared_type, converter in converters
+        }
+        self.table_converters: Dict[str, Dict[str, Callable]] = {}
+
+    def get_converter(self, column: SQLiteColumn) -> Optional[Callable]:
+        converter = column.get_converter()
+        if converter is not None:
+            return converter
+        return self.converters.get(get_declared_type_name(column.sqlite_type))
+
+    def get_column_converters(self, table) -> Dict[str, Callable]:
+        converters = {}
+        for column in table.columns.values():
+            converter = self.get_converter(column)
+            if converter is not None:
+                converters[column.column_name] = converter
+        return converters
+
+    def add_tables(self, tables: Iterable) -> None:
+        for table in tables:
+            self.table_converters[table.table_name] = self.get_column_converters(
+                table
+            )
+
+    def adapt(self, value: Any) -> Any:
+        adapter = self.adapters.get(type(value))
+        if adapter is None:
+            return value
+        return adapter(value)
+
+    def adapt_batch(self, values: Sequence) -> List:
+        adapters = self.adapters
+        return [
+            adapters[type(value)](value) if type(value) in adapters else value
+            for value in values
+        ]
+
+    def adapt_params(
+        self,
+        params: Union[Sequence, Dict[str, Any]],
+    ) -> Union[List, Dict[str, Any]]:
+        if isinstance(params, dict):
+            return {name: self.adapt(value) for name, value in params.items()}
+        return self.adapt_batch(params)
+
+    @staticmethod
+    def get_plan(
+        description: tuple,
+        converters: Dict[str, Callable],
+    ) -> List[Tuple[int, Callable]]:
+        plan = []
+        for i, column_description in enumerate(description):
+            converter = converters.get(column_description[0])
+            if converter is not None:
+                plan.append((i, converter))
+        return plan
+
+    @staticmethod
+    def convert_row(row: tuple, plan: List[Tuple[int, Callable]]) -> tuple:
+        values = list(row)
+        for i, converter in plan:
+            value = values[i]
+            if value is not None:
+                values[i] = converter(to_converter_input(value))
+        return tuple(values)
+
+    def get_row_factory(self, table=None) -> Callable:
+        """A row factory building sqlite3.Rows, converting the result
+        columns named like a converted column of table.
+        """
+        if table is None:
+            return sqlite3.Row
+        converters = self.table_converters.get(table.table_name)
+        if converters is None:
+            converters = self.get_column_converters(table)
+        if not converters:
+            return sqlite3.Row
+        cache: List[Any] = [None, []]
+
+        def row_factory(cursor: sqlite3.Cursor, row: tuple) -> sqlite3.Row:
+            description = cursor.description
+            if description is not cache[0]:
+                cache[:] = [description, self.get_plan(description, converters)]
+            if cache[1]:
+                row = self.convert_row(row, cache[1])
+            return sqlite3.Row(cursor, row)
+
+        return row_factory
@@ -0,0 +1,106 @@
+import itertools
+import sqlite3
+import time
+from typing import (
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+)
+
+from .table import SQLiteTable
+from .utils import SQLiteTemplate
+
+
+class TableReplica(object):
+    """An in-memory copy of some of a database's tables, which writes
+    reach once they are committed to the source.
+    """
+    replica_counter = itertools.count()
+    insert_template = SQLiteTemplate(
+        'INSERT INTO $table_name ($column_names) VALUES ($value_template)'
+    )
+
+    def __init__(
+        self,
+        tables: Sequence[SQLiteTable],
+        create_table: Callable[[sqlite3.Connection, SQLiteTable], None],
+        refresh_interval: Optional[float] = None,
+        batch_size: int = 10000,
+    ) -> None:
+        self.tables = {table.table_name: table for table in tables}
+        self.create_table = create_table
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.replica_uri = (
+            f'file:sqlite_tables_replica_{next(self.replica_counter)}'
+            f'?mode=memory&cache=shared'
+        )
+        self.connection = sqlite3.connect(self.replica_uri, uri=True)
+        self.loaded_at: Optional[float] = None
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def is_stale(self) -> bool:
+        if self.loaded_at is None:
+            return True
+        if self.refresh_interval is None:
+            return False
+        return time.monotonic() - self.loaded_at >= self.refresh_interval
+
+    def load(self, source: sqlite3.Connection) -> None:
+        """(Re)build every replicated table from source."""
+        with self.connection:
+            for table in self.tables.values():
+                self.connection.execute(f'DROP TABLE IF EXISTS {table.table_name}')
+                self.create_table(self.connection, table)
+                self.copy_rows(source, table)
+        self.loaded_at = time.monotonic()
+
+    def get_stored_names(self, table: SQLiteTable) -> List[str]:
+        """The columns that make up a stored row, including the rowid so
+        that the replica's rowids match the source's.
+        """
+        column_names = list(table.columns)
+        if not table.without_rowid:
+            column_names.insert(0, 'rowid')
+        return column_names
+
+    def get_insert_statement(self, table: SQLiteTable) -> str:
+        column_names = self.get_stored_names(table)
+        return self.insert_template.substitute({
+            'table_name': table.table_name,
+            'column_names': ', '.join(column_names),
+            'value_template': ', '.join('?' for _ in column_names),
+        })
+
+    def copy_rows(self, source: sqlite3.Connection, table: SQLiteTable) -> None:
+        column_names = ', '.join(self.get_stored_names(table))
+        cursor = source.cursor()
+        cursor.row_factory = None
+        cursor.execute(f'SELECT {column_names} FROM {table.table_name}')
+        insert_statement = self.get_insert_statement(table)
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            self.connection.executemany(insert_statement, rows)
+        cursor.close()
+
+    def execute(self, table_name: str, row: Sequence) -> None:
+        self.executemany(table_name, (row,))
+
+    def executemany(self, table_name: str, rows: Iterable[Sequence]) -> None:
+        """Apply rows committed to the source, as returned by the
+        get_stored_names columns, or mark the replica for reloading if
+        that fails.
+        """
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    self.get_insert_statement(self.tables[table_name]), rows
+                )
+        except sqlite3.Error:
+            self.loaded_at = None
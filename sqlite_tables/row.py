@@ -0,0 +1,95 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .registry import to_converter_input
+
+
+class LazyRowSpec(object):
+    """What the rows of one query share: where each column sits in the
+    raw tuple, how to convert it, and how to load deferred columns.
+    """
+
+    def __init__(
+        self,
+        column_names: Sequence[str],
+        selected_names: Sequence[str],
+        key_name: Union[str, Sequence[str]],
+        converters: Dict[str, Optional[Callable]],
+        load_deferred: Callable[[Any, str], Any],
+    ) -> None:
+        self.column_names = list(column_names)
+        self.positions = {name: i for i, name in enumerate(selected_names)}
+        if isinstance(key_name, str):
+            self.key_positions = [self.positions[key_name]]
+        else:
+            self.key_positions = [self.positions[name] for name in key_name]
+        self.converters = converters
+        self.load_deferred = load_deferred
+
+
+class LazyRow(object):
+    """A row that converts each column on first access; deferred columns
+    are read by key when first accessed.
+    """
+    __slots__ = ('spec', 'raw', 'values')
+
+    def __init__(self, spec: LazyRowSpec, raw: tuple) -> None:
+        self.spec = spec
+        self.raw = raw
+        self.values: Dict[str, Any] = {}
+
+    def __repr__(self) -> str:
+        return '<{!s}: {!r}>'.format(self.__class__.__name__, self.get_key())
+
+    def __len__(self) -> int:
+        return len(self.spec.column_names)
+
+    def __iter__(self) -> Iterator:
+        return (self[name] for name in self.spec.column_names)
+
+    def __getitem__(self, key: Union[str, int]) -> Any:
+        if isinstance(key, int):
+            key = self.spec.column_names[key]
+        try:
+            return self.values[key]
+        except KeyError:
+            pass
+        if key not in self.spec.converters:
+            raise IndexError(f'No item with that key: {key!r}')
+        position = self.spec.positions.get(key)
+        if position is None:
+            value = self.spec.load_deferred(self.get_key(), key)
+        else:
+            value = self.raw[position]
+        converter = self.spec.converters[key]
+        if converter is not None and value is not None:
+            value = converter(to_converter_input(value))
+        self.values[key] = value
+        return value
+
+    def get_raw(self, column_name: str) -> Any:
+        """The value as stored, without conversion or caching."""
+        position = self.spec.positions.get(column_name)
+        if position is None:
+            return self.spec.load_deferred(self.get_key(), column_name)
+        return self.raw[position]
+
+    def get_key(self) -> Any:
+        """The row's key; a tuple for composite keys."""
+        if len(self.spec.key_positions) == 1:
+            return self.raw[self.spec.key_positions[0]]
+        return tuple(self.raw[i] for i in self.spec.key_positions)
+
+    def keys(self) -> List[str]:
+        return list(self.spec.column_names)
+
+    def is_loaded(self, column_name: str) -> bool:
+        return column_name in self.values
@@ -0,0 +1,185 @@
+import bisect
+import heapq
+import itertools
+import sqlite3
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .database import SQLiteDatabase
+from .exceptions import InvalidDatabaseConfiguration
+from .row import LazyRow
+from .table import SQLiteTable
+from .utils import chunked
+
+
+def hash_shard(key: Any, shard_count: int) -> int:
+    """Shard index for key. Unlike hash(), stable across processes, so
+    rows stay on the same shard between runs.
+    """
+    if isinstance(key, int):
+        return key % shard_count
+    if not isinstance(key, bytes):
+        key = str(key).encode('utf-8')
+    return zlib.crc32(key) % shard_count
+
+
+def get_sort_key(value: Any) -> tuple:
+    """Order values as SQLite does, with NULL before everything else."""
+    return (value is not None, value)
+
+
+class ShardedDatabase(object):
+    """Spreads the rows of each table over several SQLiteDatabases by
+    hash or range of a shard key column.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[Union[str, Any]],
+        tables: Sequence[SQLiteTable],
+        shard_keys: Dict[str, str],
+        boundaries: Optional[Dict[str, Sequence]] = None,
+        **database_kwargs,
+    ) -> None:
+        if len(paths) == 0:
+            raise InvalidDatabaseConfiguration('ShardedDatabase needs a path')
+        self.tables = {table.table_name: table for table in tables}
+        self.shard_keys = shard_keys
+        self.boundaries = {
+            table_name: list(values)
+            for table_name, values in (boundaries or {}).items()
+        }
+        self.validate(len(paths))
+        self.shards = [
+            SQLiteDatabase(
+                connection=sqlite3.connect(path, check_same_thread=False),
+                tables=tables,
+                **database_kwargs,
+            )
+            for path in paths
+        ]
+        self.executor = ThreadPoolExecutor(max_workers=len(self.shards))
+
+    def validate(self, shard_count: int) -> None:
+        for table_name, column_name in self.shard_keys.items():
+            table = self.tables.get(table_name)
+            if table is None or column_name not in table.columns:
+                raise InvalidDatabaseConfiguration(
+                    f'Shard key "{column_name}" is not a column of "{table_name}"'
+                )
+        for table_name, values in self.boundaries.items():
+            if len(values) != shard_count - 1:
+                raise InvalidDatabaseConfiguration(
+                    f'"{table_name}" needs {shard_count - 1} shard boundaries'
+                )
+            if values != sorted(values):
+                raise InvalidDatabaseConfiguration(
+                    f'Shard boundaries for "{table_name}" must be sorted'
+                )
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        for shard in self.shards:
+            shard.connection.close()
+
+    def get_shard_key(self, table_name: str) -> str:
+        try:
+            return self.shard_keys[table_name]
+        except KeyError:
+            raise ValueError(f'Table "{table_name}" has no shard key')
+
+    def get_shard_index(self, table_name: str, key: Any) -> int:
+        boundaries = self.boundaries.get(table_name)
+        if boundaries is not None:
+            return bisect.bisect_right(boundaries, key)
+        return hash_shard(key, len(self.shards))
+
+    def do_creation(self) -> None:
+        for shard in self.shards:
+            shard.do_creation()
+
+    def insert(self, table_name: str, value_dict: Dict[str, Any]) -> None:
+        try:
+            key = value_dict[self.get_shard_key(table_name)]
+        except KeyError:
+            raise ValueError(f'Row has no value for the shard key of "{table_name}"')
+        self.shards[self.get_shard_index(table_name, key)].insert(
+            table_name, value_dict
+        )
+
+    def insert_many(
+        self,
+        table_name: str,
+        column_names: List[str],
+        rows: Iterable[Sequence],
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """Split rows by shard and insert each shard's rows in its own
+        thread, one transaction per shard per chunk of input.
+        """
+        key_position = column_names.index(self.get_shard_key(table_name))
+        chunk_size = chunk_size or SQLiteDatabase.batch_size
+        row_count = 0
+        for chunk in chunked(rows, chunk_size * len(self.shards)):
+            by_shard: Dict[int, List] = defaultdict(list)
+            for row in chunk:
+                index = self.get_shard_index(table_name, row[key_position])
+                by_shard[index].append(row)
+            futures = [
+                self.executor.submit(
+                    self.shards[index].insert_many,
+                    table_name,
+                    column_names,
+                    shard_rows,
+                    chunk_size,
+                )
+                for index, shard_rows in by_shard.items()
+            ]
+            row_count += sum(future.result() for future in futures)
+        return row_count
+
+    def select(
+        self,
+        table_name: str,
+        column_names: Optional[List[str]] = None,
+        where: Optional[str] = None,
+        params: Union[Sequence, Dict[str, Any]] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[LazyRow]:
+        """Query every shard and merge the results, lazily when ordered."""
+        if order_by is not None and column_names and order_by not in column_names:
+            column_names = list(column_names) + [order_by]
+        results = [
+            shard.select(
+                table_name,
+                column_names=column_names,
+                where=where,
+                params=params,
+                order_by=order_by,
+                descending=descending,
+                limit=limit,
+            )
+            for shard in self.shards
+        ]
+        if order_by is None:
+            merged: Iterator[LazyRow] = itertools.chain.from_iterable(results)
+        else:
+            merged = heapq.merge(
+                *results,
+                key=lambda row: get_sort_key(row[order_by]),
+                reverse=descending,
+            )
+        return itertools.islice(merged, limit)
@@ -1,6 +1,7 @@
 from collections import defaultdict
 import itertools
 from typing import (
+    Optional,
     Union,
     List,
     Tuple,
@@ -8,20 +9,55 @@ from typing import (
     Generator,
 )
 
+from .changes import SQLiteChangeLog
+from .compression import SQLiteCompressionMetadata
+from .membership import SQLiteMembershipIndex
 from .exceptions import InvalidTableConfiguration
 from .column import SQLiteColumn
-from .enums import SQLiteConstraint
+from .enums import (
+    SQLiteConstraint,
+    SQLitePartitionPeriod,
+)
 from .utils import SQLiteTemplate
 
 
 class SQLiteTable(object):
     schema_template = SQLiteTemplate(
-        'CREATE TABLE $exists $table_name ($column_defs)'
+        'CREATE TABLE $exists $table_name ($column_defs) $table_options'
     )
     unique_template = SQLiteTemplate('UNIQUE ($fields)')
+    primary_key_template = SQLiteTemplate('PRIMARY KEY ($fields)')
+    row_update_template = SQLiteTemplate(
+        'UPDATE $table_name SET $column_name = $value WHERE $row_match'
+    )
     trigger_template = SQLiteTemplate(
         'CREATE TRIGGER $trigger_name $when $event ON $table_name BEGIN $expr; END'
     )
+    index_template = SQLiteTemplate(
+        'CREATE INDEX $exists $index_name ON $table_name ($column_names)'
+    )
+    fts_template = SQLiteTemplate(
+        "CREATE VIRTUAL TABLE $exists $fts_table_name USING fts5("
+        "$column_names, content='$table_name')"
+    )
+    fts_insert_template = SQLiteTemplate(
+        'INSERT INTO $fts_table_name (rowid, $column_names) '
+        'VALUES (new.rowid, $new_values)'
+    )
+    fts_delete_template = SQLiteTemplate(
+        "INSERT INTO $fts_table_name ($fts_table_name, rowid, $column_names) "
+        "VALUES ('delete', old.rowid, $old_values)"
+    )
+    # Indexes rows already in the table when the index is new (or the
+    # table is empty, when rebuilding costs nothing).
+    fts_rebuild_template = SQLiteTemplate(
+        "INSERT INTO $fts_table_name ($fts_table_name) SELECT 'rebuild' "
+        "WHERE NOT EXISTS (SELECT 1 FROM ${fts_table_name}_docsize)"
+    )
+    fts_search_template = SQLiteTemplate(
+        'SELECT rowid FROM $fts_table_name WHERE $fts_table_name MATCH ? '
+        'ORDER BY bm25($fts_table_name) $limit'
+    )
 
     def __init__(
         self,
@@ -29,18 +65,36 @@ class SQLiteTable(object):
         columns: Union[List[SQLiteColumn], Tuple[SQLiteColumn], tuple] = (),
         unique_together: Union[Tuple[str], Tuple[Tuple], Tuple] = (),
         raise_exists_error: bool = False,
+        aggregates: Tuple = (),
+        indexes: Union[Tuple[str], Tuple[Tuple], Tuple] = (),
+        partition_by: Optional[str] = None,
+        partition_period: SQLitePartitionPeriod = SQLitePartitionPeriod.DAY,
+        capture_changes: bool = False,
+        primary_key: Tuple[str, ...] = (),
+        without_rowid: bool = False,
+        strict: bool = False,
     ):
         self.table_name = table_name
         self.columns = {column.column_name: column for column in columns}
         self.unique_together = unique_together
         self.raise_exists_error = raise_exists_error
-        self.foreign_key_columns = filter(lambda x: x.is_foreign_key, columns)
+        self.aggregates = {aggregate.name: aggregate for aggregate in aggregates}
+        self.indexes = indexes
+        self.partition_by = partition_by
+        self.partition_period = partition_period
+        self.capture_changes = capture_changes
+        self.primary_key = tuple(primary_key)
+        self.without_rowid = without_rowid
+        self.strict = strict
+        self.foreign_key_columns = [x for x in columns if x.is_foreign_key]
         try:
             self.primary_key_col = list(
                 filter(lambda x: x.is_primary_key, self.columns.values())
             )[0]
         except IndexError:
             self.primary_key_col = None
+        if self.primary_key_col is None and len(self.primary_key) == 1:
+            self.primary_key_col = self.columns.get(self.primary_key[0])
 
     def __repr__(self) -> str:
         template = (
@@ -60,41 +114,144 @@ class SQLiteTable(object):
     def get_primary_key_col_name(self) -> str:
         if self.primary_key_col is not None:
             return self.primary_key_col.column_name
+        if self.without_rowid:
+            raise InvalidTableConfiguration(
+                f'"{self.table_name}" has a composite primary key and no rowid'
+            )
         return 'rowid'
 
+    def get_primary_key_col_names(self) -> List[str]:
+        if self.primary_key:
+            return list(self.primary_key)
+        if self.primary_key_col is not None:
+            return [self.primary_key_col.column_name]
+        return []
+
+    def get_row_key_names(self) -> List[str]:
+        """The columns that identify a row: the primary key column,
+        rowid, or for WITHOUT ROWID tables every primary key column.
+        """
+        if self.without_rowid:
+            return self.get_primary_key_col_names()
+        return [self.get_primary_key_col_name()]
+
+    def get_row_key_sql(self, row: str) -> str:
+        """An expression for the key of the new or old row in a trigger;
+        composite keys are encoded as a JSON array.
+        """
+        names = [f'{row}.{x}' for x in self.get_row_key_names()]
+        if len(names) == 1:
+            return names[0]
+        return 'json_array({})'.format(', '.join(names))
+
+    def get_row_match_sql(self, row: str) -> str:
+        return ' AND '.join(f'{x} = {row}.{x}' for x in self.get_row_key_names())
+
     def validate_columns(self) -> None:
         if len(self.columns.keys()) == 0:
             raise InvalidTableConfiguration('Cannot create table without columns')
+        for name in self.primary_key:
+            if name not in self.columns:
+                raise InvalidTableConfiguration(
+                    f'Primary key column "{name}" is not a column'
+                )
+        if self.primary_key and any(
+            x.is_primary_key for x in self.columns.values()
+        ):
+            raise InvalidTableConfiguration(
+                'Specify the primary key either on a column or the table, not both'
+            )
+        if self.without_rowid and not self.get_primary_key_col_names():
+            raise InvalidTableConfiguration('WITHOUT ROWID tables need a primary key')
+        if self.without_rowid and self.get_searchable_columns():
+            raise InvalidTableConfiguration(
+                'Searchable columns need a rowid; remove without_rowid'
+            )
+        if self.partition_by is not None and self.partition_by not in self.columns:
+            raise InvalidTableConfiguration(
+                f'Cannot partition by unknown column "{self.partition_by}"'
+            )
 
-    def get_unique_constraints_sql(self) -> Union[Generator, tuple]:
+    @staticmethod
+    def get_column_sets(column_sets: Tuple) -> Tuple:
         try:
-            if isinstance(self.unique_together[0], str):
-                unique_sets: Tuple = (self.unique_together,)
-            else:
-                unique_sets = self.unique_together
+            if isinstance(column_sets[0], str):
+                return (column_sets,)
         except IndexError:
             return ()
+        return column_sets
+
+    def get_unique_constraints_sql(self) -> Union[Generator, tuple]:
         return (
-            self.unique_template.substitute(fields=', '.join(x)) for x in unique_sets
+            self.unique_template.substitute(fields=', '.join(x))
+            for x in self.get_column_sets(self.unique_together)
         )
 
+    def get_generated_column_names(self) -> List[str]:
+        return [
+            name
+            for column in self.columns.values()
+            for name in column.generated_columns
+        ]
+
+    def get_exists_sql(self) -> str:
+        if self.raise_exists_error:
+            return ''
+        return SQLiteConstraint.IF_NOT_EXISTS.value
+
+    def indexes_to_sql(self) -> Generator:
+        known_columns = set(self.columns).union(self.get_generated_column_names())
+        for column_names in self.get_column_sets(self.indexes):
+            for name in column_names:
+                if name not in known_columns:
+                    raise InvalidTableConfiguration(
+                        f'Cannot index unknown column "{name}"'
+                    )
+            yield self.index_template.substitute({
+                'exists': self.get_exists_sql(),
+                'index_name': '_'.join((self.table_name,) + tuple(column_names)),
+                'table_name': self.table_name,
+                'column_names': ', '.join(column_names),
+            })
+
     def get_foreign_key_constraints_sql(self) -> Generator:
         return (x.fk_constraint_to_sql() for x in self.foreign_key_columns)
 
+    def get_primary_key_constraint_sql(self) -> Tuple[str, ...]:
+        if not self.primary_key:
+            return ()
+        return (self.primary_key_template.substitute(
+            fields=', '.join(self.primary_key)
+        ),)
+
     def get_column_defs_sql(self) -> str:
         return ', '.join(
             itertools.chain(
-                (x.definition_to_sql() for x in self.columns.values()),
+                (x.definition_to_sql(self.strict) for x in self.columns.values()),
+                itertools.chain.from_iterable(
+                    x.generated_columns_to_sql(self.strict)
+                    for x in self.columns.values()
+                ),
+                self.get_primary_key_constraint_sql(),
                 self.get_foreign_key_constraints_sql(),
                 self.get_unique_constraints_sql(),
             )
         )
 
+    def get_table_options_sql(self) -> str:
+        options = []
+        if self.strict:
+            options.append('STRICT')
+        if self.without_rowid:
+            options.append('WITHOUT ROWID')
+        return ', '.join(options)
+
     def get_schema_definition_subs(self) -> dict:
         self.validate_columns()
         substitutions: DefaultDict[str, str] = defaultdict(str)
         substitutions['table_name'] = self.table_name
         substitutions['column_defs'] = self.get_column_defs_sql()
+        substitutions['table_options'] = self.get_table_options_sql()
         if not self.raise_exists_error:
             substitutions['exists'] = SQLiteConstraint.IF_NOT_EXISTS.value
         return substitutions
@@ -102,16 +259,113 @@ class SQLiteTable(object):
     def schema_to_sql(self) -> str:
         return self.schema_template.substitute(self.get_schema_definition_subs())
 
+    def get_compressed_columns(self) -> List[SQLiteColumn]:
+        return [x for x in self.columns.values() if x.compressor is not None]
+
+    def get_indexed_list_columns(self) -> List[SQLiteColumn]:
+        return [x for x in self.columns.values() if x.indexed]
+
+    def get_searchable_columns(self) -> List[SQLiteColumn]:
+        return [x for x in self.columns.values() if x.searchable]
+
+    def get_fts_table_name(self) -> str:
+        return f'{self.table_name}_fts'
+
+    def get_fts_substitutions(self) -> dict:
+        column_names = [x.column_name for x in self.get_searchable_columns()]
+        substitutions: DefaultDict[str, str] = defaultdict(str)
+        substitutions['table_name'] = self.table_name
+        substitutions['fts_table_name'] = self.get_fts_table_name()
+        substitutions['column_names'] = ', '.join(column_names)
+        substitutions['new_values'] = ', '.join(f'new.{x}' for x in column_names)
+        substitutions['old_values'] = ', '.join(f'old.{x}' for x in column_names)
+        if not self.raise_exists_error:
+            substitutions['exists'] = SQLiteConstraint.IF_NOT_EXISTS.value
+        return substitutions
+
+    def fts_schema_to_sql(self) -> str:
+        """An FTS5 index over the searchable columns, using this table
+        as external content so the text is not stored twice.
+        """
+        return self.fts_template.substitute(self.get_fts_substitutions())
+
+    def fts_rebuild_to_sql(self) -> str:
+        return self.fts_rebuild_template.substitute(self.get_fts_substitutions())
+
+    def fts_triggers_to_sql(self) -> Generator:
+        substitutions = self.get_fts_substitutions()
+        insert_expr = self.fts_insert_template.substitute(substitutions)
+        delete_expr = self.fts_delete_template.substitute(substitutions)
+        for name, event, expr in (
+            ('insert', 'INSERT', insert_expr),
+            ('delete', 'DELETE', delete_expr),
+            (
+                'update',
+                f'UPDATE OF {substitutions["column_names"]}',
+                f'{delete_expr}; {insert_expr}',
+            ),
+        ):
+            yield self.trigger_template.substitute({
+                'trigger_name': f'{self.get_fts_table_name()}_{name}',
+                'when': 'AFTER',
+                'event': event,
+                'table_name': self.table_name,
+                'expr': expr,
+            })
+
+    def search_to_sql(self, limit: Optional[int] = None) -> str:
+        substitutions = self.get_fts_substitutions()
+        if limit is not None:
+            substitutions['limit'] = f'LIMIT {int(limit)}'
+        return self.fts_search_template.substitute(substitutions)
+
+    def auxiliary_schema_to_sql(self) -> Generator:
+        """Definitions for tables that support this one, created after
+        the table itself and before its triggers.
+        """
+        yield from self.indexes_to_sql()
+        if self.get_searchable_columns():
+            yield self.fts_schema_to_sql()
+            yield self.fts_rebuild_to_sql()
+        for aggregate in self.aggregates.values():
+            yield from aggregate.schema_to_sql(self)
+        if self.capture_changes:
+            yield from SQLiteChangeLog.schema_to_sql()
+        for column in self.get_indexed_list_columns():
+            yield from SQLiteMembershipIndex.schema_to_sql(self, column.column_name)
+        if self.get_compressed_columns():
+            yield from SQLiteCompressionMetadata.schema_to_sql()
+
     def triggers_to_sql(self) -> Generator:
+        yield from self.column_triggers_to_sql()
+        if self.get_searchable_columns():
+            yield from self.fts_triggers_to_sql()
+        for aggregate in self.aggregates.values():
+            yield from aggregate.triggers_to_sql(self)
+        if self.capture_changes:
+            yield from SQLiteChangeLog.triggers_to_sql(self)
+        for column in self.get_indexed_list_columns():
+            yield from SQLiteMembershipIndex.triggers_to_sql(self, column.column_name)
+
+    def get_column_trigger_expression_sql(self, column: SQLiteColumn) -> str:
+        key_names = self.get_row_key_names()
+        if len(key_names) > 1:
+            return self.row_update_template.substitute({
+                'table_name': self.table_name,
+                'column_name': column.column_name,
+                'value': column.default_for_update,
+                'row_match': self.get_row_match_sql('old'),
+            })
+        expr_template = SQLiteTemplate(column.trigger_expression_to_sql())
+        return expr_template.substitute({
+            'primary_key_col': key_names[0],
+            'table_name': self.table_name,
+        })
+
+    def column_triggers_to_sql(self) -> Generator:
         for column in filter(lambda x: x.requires_trigger(), self.columns.values()):
-            expr_template = SQLiteTemplate(column.trigger_expression_to_sql())
             substitutions = {
-                'expr': expr_template.substitute(
-                    {
-                        'primary_key_col': self.get_primary_key_col_name(),
-                        'table_name': self.table_name,
-                    },
-                ),
+                'expr': self.get_column_trigger_expression_sql(column),
                 'trigger_name': f'{self.table_name}_{column.column_name}_update',
                 'when': 'AFTER',
                 'event': 'UPDATE',
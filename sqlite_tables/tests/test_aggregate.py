@@ -0,0 +1,166 @@
+import random
+import sqlite3
+import unittest
+
+from ..aggregate import SQLiteAggregate
+from ..column import (
+    IntColumn,
+    TextColumn,
+    RealColumn,
+)
+from ..database import SQLiteDatabase
+from ..exceptions import InvalidTableConfiguration
+from ..table import SQLiteTable
+
+
+class TestAggregateToSQL(unittest.TestCase):
+    def test_summary_table_schema(self):
+        table = SQLiteTable(
+            'events',
+            columns=(TextColumn('kind'), RealColumn('amount')),
+            aggregates=(
+                SQLiteAggregate(
+                    'by_kind', group_by=('kind',), sum_columns=('amount',),
+                    max_columns=('amount',),
+                ),
+            ),
+        )
+        self.assertEqual(
+            [
+                'CREATE TABLE IF NOT EXISTS events_by_kind (kind TEXT, '
+                'row_count INT NOT NULL DEFAULT 0, '
+                'sum_amount NUMERIC NOT NULL DEFAULT 0, max_amount REAL)',
+                'CREATE INDEX IF NOT EXISTS events_by_kind_group ON events_by_kind '
+                '(kind)',
+                'CREATE INDEX IF NOT EXISTS events_kind_amount ON events '
+                '(kind, amount)',
+                'INSERT INTO events_by_kind (kind, row_count, sum_amount, max_amount) '
+                'SELECT * FROM (SELECT kind, COUNT(*) AS row_count, '
+                'coalesce(SUM(amount), 0) AS sum_amount, MAX(amount) AS max_amount '
+                'FROM events GROUP BY kind) WHERE row_count > 0 AND NOT EXISTS '
+                '(SELECT 1 FROM events_by_kind)',
+            ],
+            list(table.auxiliary_schema_to_sql()),
+        )
+
+    def test_update_trigger_limited_to_source_columns(self):
+        table = SQLiteTable(
+            'events',
+            columns=(TextColumn('kind'), RealColumn('amount'), TextColumn('note')),
+            aggregates=(SQLiteAggregate('by_kind', group_by=('kind',)),),
+        )
+        update_trigger = list(table.triggers_to_sql())[-1]
+        self.assertTrue(update_trigger.startswith(
+            'CREATE TRIGGER events_by_kind_update AFTER UPDATE OF kind ON events'
+        ))
+
+    def test_unknown_column_raises(self):
+        table = SQLiteTable(
+            'events',
+            columns=(TextColumn('kind'),),
+            aggregates=(SQLiteAggregate('by_kind', group_by=('missing',)),),
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            list(table.auxiliary_schema_to_sql())
+
+
+class TestAggregateMaintenance(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'events',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('kind'),
+                IntColumn('amount'),
+            ),
+            aggregates=(
+                SQLiteAggregate(
+                    'by_kind',
+                    group_by=('kind',),
+                    sum_columns=('amount',),
+                    min_columns=('amount',),
+                    max_columns=('amount',),
+                ),
+                SQLiteAggregate('total', sum_columns=('amount',)),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def get_expected(self):
+        rows = self.db.connection.execute(
+            'SELECT kind, COUNT(*), TOTAL(amount), MIN(amount), MAX(amount) '
+            'FROM events GROUP BY kind'
+        )
+        return sorted((tuple(row) for row in rows), key=repr)
+
+    def get_actual(self):
+        return sorted(
+            (tuple(row) for row in self.db.get_aggregate('events', 'by_kind')),
+            key=repr,
+        )
+
+    def test_insert(self):
+        self.db.insert('events', {'id': 1, 'kind': 'a', 'amount': 5})
+        self.db.insert('events', {'id': 2, 'kind': 'a', 'amount': 2})
+        self.db.insert('events', {'id': 3, 'kind': None, 'amount': None})
+        self.assertEqual(
+            [('a', 2, 7, 2, 5), (None, 1, 0, None, None)],
+            self.get_actual(),
+        )
+
+    def test_delete_removes_empty_groups(self):
+        self.db.insert('events', {'id': 1, 'kind': 'a', 'amount': 5})
+        self.db.insert('events', {'id': 2, 'kind': 'b', 'amount': 2})
+        with self.db.connection:
+            self.db.connection.execute('DELETE FROM events WHERE id = 1')
+        self.assertEqual([('b', 1, 2, 2, 2)], self.get_actual())
+
+    def test_matches_group_by_after_random_changes(self):
+        rng = random.Random(0)
+        with self.db.connection:
+            for i in range(300):
+                self.db.connection.execute(
+                    'INSERT INTO events VALUES (?, ?, ?)',
+                    (i, rng.choice('abc'), rng.randrange(-50, 50)),
+                )
+            for _ in range(100):
+                self.db.connection.execute(
+                    'UPDATE events SET kind = ?, amount = ? WHERE id = ?',
+                    (rng.choice('abcd'), rng.randrange(-50, 50), rng.randrange(300)),
+                )
+            for _ in range(100):
+                self.db.connection.execute(
+                    'DELETE FROM events WHERE id = ?', (rng.randrange(300),)
+                )
+        self.assertEqual(self.get_expected(), self.get_actual())
+        total = self.db.get_aggregate('events', 'total')[0]
+        self.assertEqual(
+            self.db.connection.execute('SELECT COUNT(*), TOTAL(amount) FROM events')
+            .fetchone()[:],
+            (total['row_count'], total['sum_amount']),
+        )
+
+    def test_existing_rows_summarized(self):
+        table = self.db.get_table('events')
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE events (id INT PRIMARY KEY, kind, amount)')
+        connection.executemany(
+            'INSERT INTO events VALUES (?, ?, ?)',
+            [(1, 'a', 5), (2, 'a', None), (3, None, 2), (4, 'b', -1)],
+        )
+        self.db.connection.close()
+        self.db = SQLiteDatabase(connection=connection, tables=(table,))
+        self.db.do_creation()
+        self.assertEqual(self.get_expected(), self.get_actual())
+        (total,) = self.db.get_aggregate('events', 'total')
+        self.assertEqual((4, 6), tuple(total))
+        self.db.insert('events', {'id': 5, 'kind': 'b', 'amount': 3})
+        self.assertEqual(self.get_expected(), self.get_actual())
+
+    def test_unknown_aggregate_raises(self):
+        with self.assertRaises(ValueError):
+            self.db.get_aggregate('events', 'missing')
@@ -0,0 +1,61 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..backup import SQLiteBackupProgress
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..table import SQLiteTable
+
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(IntColumn('id', is_primary_key=True), TextColumn('body')),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        self.db.insert_many(
+            'test_table', ['id', 'body'], [(i, 'x' * 500) for i in range(200)]
+        )
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_backup_to_memory(self):
+        result = self.db.backup()
+        count = result.connection.execute('SELECT COUNT(*) FROM test_table')
+        self.assertEqual(200, count.fetchone()[0])
+        self.assertGreater(result.pages, 0)
+        self.assertEqual(result.pages * result.page_size, result.bytes_copied)
+
+    def test_backup_reports_progress_per_step(self):
+        reports = []
+        result = self.db.backup(pages_per_step=5, progress=reports.append)
+        self.assertGreater(len(reports), 1)
+        self.assertIsInstance(reports[0], SQLiteBackupProgress)
+        self.assertEqual(0, reports[-1].remaining)
+        self.assertEqual(result.pages, reports[-1].copied)
+
+    def test_backup_to_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'copy.db'
+            self.db.backup(path, pages_per_step=10, sleep=0.001)
+            connection = sqlite3.connect(str(path))
+            count = connection.execute('SELECT COUNT(*) FROM test_table')
+            self.assertEqual(200, count.fetchone()[0])
+            connection.close()
+
+    def test_backup_to_connection(self):
+        target = sqlite3.connect(':memory:')
+        result = self.db.backup(target)
+        self.assertIs(target, result.connection)
+        self.assertEqual(
+            1, target.execute('SELECT COUNT(*) FROM test_table WHERE id = 5')
+            .fetchone()[0]
+        )
@@ -0,0 +1,111 @@
+import io
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from .. import blob
+from ..blob import get_stream_size
+from ..column import (
+    BlobColumn,
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..table import SQLiteTable
+
+
+class TestBlobColumn(unittest.TestCase):
+    def test_definition_to_sql(self):
+        self.assertEqual(
+            "data BLOB DEFAULT X'00ff'",
+            BlobColumn('data', default=b'\x00\xff').definition_to_sql(),
+        )
+
+    def test_csv_round_trip(self):
+        self.assertEqual('AP8=', BlobColumn.to_csv(b'\x00\xff'))
+        self.assertEqual(b'\x00\xff', BlobColumn.from_csv('AP8='))
+
+
+class TestBlobStreaming(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'attachments',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('name'),
+                BlobColumn('data'),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_insert_and_read(self):
+        payload = bytes(range(256)) * 1000
+        rowid = self.db.insert_blob(
+            'attachments', {'id': 7, 'name': 'a'}, 'data', io.BytesIO(payload)
+        )
+        self.assertEqual(payload, self.db.get_raw_value('attachments', 'data', 'id', 7))
+        self.assertEqual(rowid, self.db.get_rowid(self.db.get_table('attachments'), 7))
+        target = io.BytesIO()
+        copied = self.db.read_blob('attachments', 'data', 7, target)
+        self.assertEqual(len(payload), copied)
+        self.assertEqual(payload, target.getvalue())
+
+    def test_reader_is_seekable_file(self):
+        self.db.insert('attachments', {'id': 1, 'data': b'0123456789'})
+        with self.db.open_blob('attachments', 'data', 1) as reader:
+            self.assertEqual(10, len(reader))
+            reader.seek(4)
+            self.assertEqual(b'456', reader.read(3))
+            buffered = io.BufferedReader(reader)
+            self.assertEqual(b'789', buffered.read())
+        with self.db.open_blob('attachments', 'data', 1) as reader:
+            chunks = [bytes(x) for x in reader.iter_chunks(4)]
+        self.assertEqual([b'0123', b'4567', b'89'], chunks)
+
+    def test_write_replaces_value(self):
+        self.db.insert('attachments', {'id': 1, 'data': b'old value'})
+        self.db.write_blob('attachments', 'data', 1, io.BytesIO(b'new'))
+        self.assertEqual(b'new', self.db.get_raw_value('attachments', 'data', 'id', 1))
+
+    def test_short_stream_rolls_back(self):
+        self.db.insert('attachments', {'id': 1, 'data': b'old'})
+        with self.assertRaises(ValueError):
+            self.db.write_blob('attachments', 'data', 1, io.BytesIO(b'ab'), size=5)
+        self.assertEqual(b'old', self.db.get_raw_value('attachments', 'data', 'id', 1))
+
+    def test_rejects_other_columns(self):
+        with self.assertRaises(ValueError):
+            self.db.open_blob('attachments', 'name', 1)
+
+    def test_memory_stays_flat(self):
+        size = 16 * 1024 * 1024
+        with tempfile.TemporaryFile() as source:
+            source.truncate(size)
+            self.assertEqual(size, get_stream_size(source))
+            tracemalloc.start()
+            try:
+                self.db.insert_blob('attachments', {'id': 1}, 'data', source)
+                with self.db.open_blob('attachments', 'data', 1) as reader:
+                    copied = sum(len(x) for x in reader.iter_chunks())
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        self.assertEqual(size, copied)
+        self.assertLess(peak, size // 4)
+
+
+class TestBlobStreamingWithoutBlobopen(TestBlobStreaming):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(blob, 'HAS_BLOBOPEN', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @unittest.skip('values are written whole without sqlite3.Blob')
+    def test_memory_stays_flat(self):
+        pass
@@ -0,0 +1,109 @@
+import unittest
+
+from ..changes import (
+    SQLiteChange,
+    SQLiteChangeLog,
+)
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..table import SQLiteTable
+
+
+class TestChangeLogToSQL(unittest.TestCase):
+    def setUp(self):
+        self.table = SQLiteTable(
+            'accounts',
+            columns=(IntColumn('id', is_primary_key=True), TextColumn('name')),
+            capture_changes=True,
+        )
+
+    def test_insert_trigger(self):
+        insert_trigger = list(SQLiteChangeLog.triggers_to_sql(self.table))[0]
+        self.assertEqual(
+            "CREATE TRIGGER accounts_changes_insert AFTER INSERT ON accounts BEGIN "
+            "INSERT INTO change_log (table_name, op, pk) "
+            "VALUES ('accounts', 'I', new.id); END",
+            insert_trigger,
+        )
+
+    def test_schema_only_when_capturing(self):
+        table = SQLiteTable('accounts', columns=(IntColumn('id'),))
+        self.assertEqual([], list(table.auxiliary_schema_to_sql()))
+        self.assertEqual(2, len(list(self.table.auxiliary_schema_to_sql())))
+
+
+class TestChangeCapture(unittest.TestCase):
+    def setUp(self):
+        tables = tuple(
+            SQLiteTable(
+                table_name,
+                columns=(
+                    IntColumn('id', is_primary_key=True),
+                    TextColumn('name'),
+                    IntColumn('balance'),
+                ),
+                capture_changes=True,
+            )
+            for table_name in ('accounts', 'other')
+        )
+        self.db = SQLiteDatabase(':memory:', tables=tables)
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def execute(self, statement, params=()):
+        with self.db.connection:
+            self.db.connection.execute(statement, params)
+
+    def test_logs_insert_update_delete(self):
+        self.db.insert('accounts', {'id': 1, 'name': 'a', 'balance': 0})
+        self.execute('UPDATE accounts SET balance = 5 WHERE id = 1')
+        self.execute('UPDATE accounts SET balance = 5 WHERE id = 1')
+        self.execute('DELETE FROM accounts WHERE id = 1')
+        self.assertEqual(
+            [
+                SQLiteChange(1, 'accounts', 'I', 1, ()),
+                SQLiteChange(2, 'accounts', 'U', 1, ('balance',)),
+                SQLiteChange(3, 'accounts', 'D', 1, ()),
+            ],
+            self.db.read_changes(),
+        )
+
+    def test_read_incrementally_and_by_table(self):
+        for i in range(5):
+            self.db.insert('accounts', {'id': i})
+            self.db.insert('other', {'id': i})
+        changes = self.db.read_changes(after_seq=4, limit=3)
+        self.assertEqual([5, 6, 7], [change.seq for change in changes])
+        changes = self.db.read_changes(table_names=['other'])
+        self.assertEqual({'other'}, {change.table_name for change in changes})
+
+    def test_consumer_tracks_offset(self):
+        consumer = self.db.get_change_consumer('search-indexer')
+        for i in range(3):
+            self.db.insert('accounts', {'id': i})
+        changes = consumer.poll(limit=2)
+        self.assertEqual([1, 2], [change.seq for change in changes])
+        self.assertEqual(changes, consumer.poll(limit=2))
+        consumer.acknowledge(changes[-1].seq)
+        self.assertEqual([3], [change.seq for change in consumer.poll()])
+
+    def test_prune_up_to_slowest_consumer(self):
+        fast = self.db.get_change_consumer('fast')
+        slow = self.db.get_change_consumer('slow')
+        for i in range(10):
+            self.db.insert('accounts', {'id': i})
+        fast.acknowledge(10)
+        slow.acknowledge(4)
+        self.assertEqual(4, self.db.prune_changes(batch_size=3))
+        self.assertEqual(5, self.db.read_changes()[0].seq)
+
+    def test_seq_not_reused_after_prune(self):
+        self.db.insert('accounts', {'id': 1})
+        self.db.prune_changes(up_to_seq=1)
+        self.db.insert('accounts', {'id': 2})
+        self.assertEqual([2], [change.seq for change in self.db.read_changes()])
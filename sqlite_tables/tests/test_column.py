@@ -1,3 +1,4 @@
+import datetime
 import unittest
 
 from ..column import (
@@ -8,9 +9,13 @@ from ..column import (
     DateTimeColumn,
     DateColumn,
     TimeColumn,
+    JSONColumn,
 )
 from ..exceptions import InvalidColumnConfiguration
-from ..enums import SQLiteType
+from ..enums import (
+    SQLiteTimeStorage,
+    SQLiteType,
+)
 
 
 class TestColumnDefToSQL(unittest.TestCase):
@@ -188,3 +193,88 @@ class TestTriggerExpressionToSQL(unittest.TestCase):
             f'old.$primary_key_col',
             col.trigger_expression_to_sql(),
         )
+
+
+class TestJSONColumn(unittest.TestCase):
+    def test_definition_to_sql(self):
+        col = JSONColumn('payload', default={'a': [1, 2]})
+        self.assertEqual(
+            """payload JSON_TEXT DEFAULT '{"a":[1,2]}'""",
+            col.definition_to_sql(),
+        )
+
+    def test_prepare_for_insert_is_compact(self):
+        self.assertEqual(
+            '{"a":1,"b":"é"}',
+            JSONColumn.prepare_for_insert({'a': 1, 'b': 'é'}),
+        )
+
+    def test_generated_columns_to_sql(self):
+        col = JSONColumn('payload', paths={'user_id': '$.user.id'})
+        self.assertEqual(
+            ["user_id GENERATED ALWAYS AS (json_extract(payload, '$.user.id')) "
+             "VIRTUAL"],
+            col.generated_columns_to_sql(),
+        )
+
+    def test_quoted_path_raises(self):
+        col = JSONColumn('payload', paths={'bad': "$.a'"})
+        with self.assertRaises(InvalidColumnConfiguration):
+            col.generated_columns_to_sql()
+
+
+class TestEpochStorage(unittest.TestCase):
+    def test_epoch_seconds_to_sql(self):
+        col = DateTimeColumn(
+            'created',
+            auto_now_insert=True,
+            auto_now_update=True,
+            storage=SQLiteTimeStorage.EPOCH_SECONDS,
+        )
+        self.assertEqual(
+            "created INT DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))",
+            col.definition_to_sql(),
+        )
+        self.assertEqual(
+            "UPDATE $table_name SET created = (CAST(strftime('%s', 'now') AS "
+            "INTEGER)) WHERE $primary_key_col = old.$primary_key_col",
+            col.trigger_expression_to_sql(),
+        )
+
+    def test_julian_day_is_real(self):
+        col = DateColumn('day', storage=SQLiteTimeStorage.JULIAN_DAY)
+        self.assertEqual(SQLiteType.REAL, col.sqlite_type)
+        self.assertEqual(2460436.5, col.prepare_for_insert(datetime.date(2024, 5, 6)))
+
+    def test_round_trip(self):
+        values = (
+            (DateTimeColumn, datetime.datetime(2024, 5, 6, 7, 8, 9, 123000)),
+            (DateColumn, datetime.date(2024, 5, 6)),
+            (TimeColumn, datetime.time(7, 8, 9)),
+        )
+        for column_class, value in values:
+            for storage in (
+                SQLiteTimeStorage.EPOCH_MILLISECONDS,
+                SQLiteTimeStorage.JULIAN_DAY,
+            ):
+                col = column_class('col', storage=storage)
+                encoded = col.encode_batch([value, None])
+                self.assertEqual([value, None], col.decode_batch(encoded))
+
+    def test_aware_datetime_stored_as_utc(self):
+        col = DateTimeColumn('created', storage=SQLiteTimeStorage.EPOCH_SECONDS)
+        value = datetime.datetime(
+            2024, 1, 1, 2, tzinfo=datetime.timezone(datetime.timedelta(hours=2))
+        )
+        self.assertEqual(1704067200, col.prepare_for_insert(value))
+
+    def test_range_to_sql(self):
+        col = DateColumn('day', storage=SQLiteTimeStorage.EPOCH_SECONDS)
+        self.assertEqual(
+            ('day >= ? AND day < ?', [1704067200, 1704153600]),
+            col.range_to_sql(datetime.date(2024, 1, 1), '2024-01-02'),
+        )
+        self.assertEqual(
+            ('day < ?', ['2024-01-02']),
+            DateColumn('day').range_to_sql(end=datetime.date(2024, 1, 2)),
+        )
@@ -0,0 +1,145 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..column import (
+    BlobColumn,
+    IntColumn,
+    JSONColumn,
+    TextColumn,
+)
+from ..compression import (
+    ColumnCompressor,
+    SQLiteCompressionMetadata,
+)
+from ..database import SQLiteDatabase
+from ..enums import SQLiteCompression
+from ..exceptions import (
+    InvalidColumnConfiguration,
+    InvalidDatabaseConfiguration,
+)
+from ..table import SQLiteTable
+
+
+class TestColumnCompressor(unittest.TestCase):
+    def test_round_trip(self):
+        data = b'GET /index.html 200\n' * 100
+        for compression in (SQLiteCompression.ZLIB, SQLiteCompression.LZMA):
+            compressor = ColumnCompressor(compression)
+            compressed = compressor.compress(data)
+            self.assertLess(len(compressed), len(data))
+            self.assertEqual(data, compressor.decompress(compressed))
+
+    def test_zlib_dictionary(self):
+        dictionary = b'{"level": "info", "service": "checkout", "message": '
+        value = b'{"level": "info", "service": "checkout", "message": "ok"}'
+        plain = ColumnCompressor(SQLiteCompression.ZLIB)
+        shared = ColumnCompressor(SQLiteCompression.ZLIB, dictionary=dictionary)
+        self.assertLess(len(shared.compress(value)), len(plain.compress(value)))
+        self.assertEqual(value, shared.decompress(shared.compress(value)))
+
+    def test_lzma_dictionary_raises(self):
+        with self.assertRaises(InvalidColumnConfiguration):
+            ColumnCompressor(SQLiteCompression.LZMA, dictionary=b'x')
+
+    def test_invalid_columns_raise(self):
+        for column in (
+            IntColumn('n', compression=SQLiteCompression.ZLIB),
+            TextColumn('t', default='x', compression=SQLiteCompression.ZLIB),
+            TextColumn('t', searchable=True, compression=SQLiteCompression.ZLIB),
+        ):
+            with self.assertRaises(InvalidColumnConfiguration):
+                column.definition_to_sql()
+
+
+class TestCompressedColumns(unittest.TestCase):
+    def setUp(self):
+        compression = SQLiteCompression.LZMA
+        table = SQLiteTable(
+            'logs',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('message', compression=compression),
+                JSONColumn('payload', compression=compression),
+                BlobColumn('data', compression=compression),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        self.message = 'connection reset by peer; retrying ' * 20
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_insert_and_lazy_select(self):
+        self.db.insert('logs', {
+            'id': 1, 'message': self.message, 'payload': {'a': [1]}, 'data': b'\x00',
+        })
+        raw = self.db.get_raw_value('logs', 'message', 'id', 1)
+        self.assertIsInstance(raw, bytes)
+        self.assertLess(len(raw), len(self.message))
+        row = next(self.db.select('logs'))
+        self.assertFalse(row.is_loaded('message'))
+        self.assertEqual(self.message, row['message'])
+        self.assertEqual({'a': [1]}, row['payload'])
+        self.assertEqual(b'\x00', row['data'])
+
+    def test_batches_and_csv(self):
+        self.db.insert_many(
+            'logs',
+            ['id', 'message', 'payload', 'data'],
+            [(i, self.message, [i], None) for i in range(3)],
+        )
+        rows = [row for batch in self.db.select_batches('logs') for row in batch]
+        self.assertEqual((2, self.message, [2], None), rows[2])
+        target = io.StringIO()
+        self.db.export_csv('logs', target, ['id', 'message'])
+        self.assertIn(self.message, target.getvalue())
+
+    def test_strict_table(self):
+        table = SQLiteTable(
+            'strict_logs',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('message', compression=SQLiteCompression.ZLIB),
+                JSONColumn('payload', compression=SQLiteCompression.ZLIB),
+            ),
+            strict=True,
+        )
+        self.assertIn('message BLOB', table.schema_to_sql())
+        db = SQLiteDatabase(connection=self.db.connection, tables=(table,))
+        db.do_creation()
+        db.insert('strict_logs', {'id': 1, 'message': self.message, 'payload': [1]})
+        row = next(db.select('strict_logs'))
+        self.assertEqual((self.message, [1]), (row['message'], row['payload']))
+
+    def test_records_metadata(self):
+        self.assertEqual(
+            [('logs', 'data', 'lzma', 6, None),
+             ('logs', 'message', 'lzma', 6, None),
+             ('logs', 'payload', 'lzma', 6, None)],
+            [tuple(x) for x in self.db.connection.execute(
+                f'SELECT * FROM {SQLiteCompressionMetadata.table_name} '
+                f'ORDER BY column_name'
+            )],
+        )
+
+
+class TestCompressionMetadata(unittest.TestCase):
+    def test_changed_codec_raises(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'test.db')
+            column = TextColumn(
+                'message', compression=SQLiteCompression.ZLIB, compression_level=9
+            )
+            table = SQLiteTable('logs', columns=(column,))
+            db = SQLiteDatabase(path, tables=(table,))
+            db.do_creation()
+            db.connection.close()
+            column = TextColumn('message', compression=SQLiteCompression.LZMA)
+            table = SQLiteTable('logs', columns=(column,))
+            db = SQLiteDatabase(path, tables=(table,))
+            with self.assertRaises(InvalidDatabaseConfiguration):
+                db.do_creation()
+            db.connection.close()
@@ -6,6 +6,10 @@ from ..types import (
     convert_bool,
     adapt_int_list,
     convert_int_list,
+    encode_bools,
+    decode_bools,
+    encode_int_lists,
+    decode_int_lists,
     IntList,
 )
 
@@ -162,3 +166,25 @@ class TestIntIterType(unittest.TestCase):
             )
             cursor = self.conn.execute('SELECT * FROM test_table')
             self.assertEqual([-1, 0, -3], cursor.fetchone()['test_intlist'])
+
+
+class TestBatchCodecs(unittest.TestCase):
+    def test_encode_bools(self):
+        self.assertEqual([1, 0, None], encode_bools([True, False, None]))
+
+    def test_decode_bools_native_and_legacy(self):
+        self.assertEqual(
+            [True, False, False, None],
+            decode_bools([1, 0, b'0', None]),
+        )
+
+    def test_encode_int_lists(self):
+        self.assertEqual(
+            ['1,-2', '', None],
+            encode_int_lists([[1, -2], [], None]),
+        )
+
+    def test_decode_int_lists(self):
+        decoded = decode_int_lists(['1,-2', b'3', '', None])
+        self.assertEqual([[1, -2], [3], [], None], decoded)
+        self.assertIsInstance(decoded[0], IntList)
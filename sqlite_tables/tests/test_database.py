@@ -1,3 +1,6 @@
+import datetime
+import io
+import tempfile
 import unittest
 import sqlite3
 from pathlib import Path
@@ -7,11 +10,21 @@ from ..database import (
     db_transaction,
 )
 from ..exceptions import InvalidDatabaseConfiguration
+from ..enums import (
+    SQLiteTempStore,
+    SQLiteTimeStorage,
+)
 from ..table import SQLiteTable
 from ..column import (
+    IntColumn,
+    RealColumn,
+    BoolColumn,
     TextColumn,
     IntListColumn,
+    JSONColumn,
+    DateTimeColumn,
 )
+from ..types import adapt_bool
 
 
 FIXTURE = Path('./sqlite_tables/tests/test_table.sql')
@@ -39,6 +52,101 @@ class TestDBSetup(unittest.TestCase):
         self.assertEqual(['test_table'], db.existing_tables)
 
 
+class TestStorageSettings(unittest.TestCase):
+    def test_defaults_unchanged(self):
+        db = SQLiteDatabase(':memory:')
+        default = sqlite3.connect(':memory:').execute('PRAGMA cache_size').fetchone()
+        self.assertEqual(default[0], db.get_storage_settings()['cache_size'])
+
+    def test_connection_pragmas_applied(self):
+        db = SQLiteDatabase(
+            ':memory:',
+            cache_size=-4096,
+            temp_store=SQLiteTempStore.MEMORY,
+        )
+        settings = db.get_storage_settings()
+        self.assertEqual(-4096, settings['cache_size'])
+        self.assertEqual(2, settings['temp_store'])
+
+    def test_page_size_applied_before_creation(self):
+        table = SQLiteTable('test_table', columns=(TextColumn('firstname'),))
+        with tempfile.TemporaryDirectory() as tmp:
+            db = SQLiteDatabase(
+                str(Path(tmp) / 'test.db'),
+                tables=(table,),
+                page_size=8192,
+                mmap_size=1 << 20,
+            )
+            db.do_creation()
+            settings = db.get_storage_settings()
+            db.connection.close()
+        self.assertEqual(8192, settings['page_size'])
+        self.assertEqual(1 << 20, settings['mmap_size'])
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(
+                TextColumn('title', searchable=True),
+                TextColumn('body', searchable=True),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        self.db.insert('test_table', {'title': 'apple', 'body': 'pie'})
+        self.db.insert('test_table', {'title': 'apple apple', 'body': 'apple'})
+        self.db.insert('test_table', {'title': 'pear', 'body': 'tart'})
+
+    def test_search_ranks_matches(self):
+        self.assertEqual([2, 1], self.db.search('test_table', 'apple'))
+
+    def test_search_limit(self):
+        self.assertEqual([2], self.db.search('test_table', 'apple', limit=1))
+
+    def test_search_follows_update_and_delete(self):
+        with self.db.connection:
+            self.db.connection.execute(
+                "UPDATE test_table SET body = 'apple' WHERE rowid = 3"
+            )
+            self.db.connection.execute('DELETE FROM test_table WHERE rowid = 2')
+        self.assertEqual([3], self.db.search('test_table', 'body: apple'))
+        self.assertEqual([], self.db.search('test_table', 'tart'))
+
+    def test_other_column_updates_leave_index_alone(self):
+        table = SQLiteTable(
+            'notes',
+            columns=(TextColumn('body', searchable=True), IntColumn('views')),
+        )
+        db = SQLiteDatabase(':memory:', tables=(table,))
+        db.do_creation()
+        db.insert('notes', {'body': 'apple', 'views': 0})
+        before = db.connection.total_changes
+        db.connection.execute('UPDATE notes SET views = 1')
+        self.assertEqual(1, db.connection.total_changes - before)
+        db.connection.execute("UPDATE notes SET body = 'pear'")
+        self.assertEqual([1], db.search('notes', 'pear'))
+
+    def test_existing_rows_indexed(self):
+        table = SQLiteTable(
+            'notes', columns=(TextColumn('body', searchable=True),)
+        )
+        db = SQLiteDatabase(connection=self.db.connection, tables=(table,))
+        self.db.connection.execute('CREATE TABLE notes (body TEXT)')
+        self.db.connection.execute("INSERT INTO notes VALUES ('apple'), ('pear')")
+        db.do_creation()
+        self.assertEqual([1], db.search('notes', 'apple'))
+
+    def test_search_without_searchable_columns_raises(self):
+        db = SQLiteDatabase(
+            ':memory:',
+            tables=(SQLiteTable('other', columns=(TextColumn('title'),)),),
+        )
+        with self.assertRaises(ValueError):
+            db.search('other', 'apple')
+
+
 class TestInsert(unittest.TestCase):
     def test_insert_single(self):
         table = SQLiteTable(
@@ -93,12 +201,215 @@ class TestInsert(unittest.TestCase):
         )
         db.do_creation()
         db.insert('test_table', {'firstname': 'test', 'int_list': [1, 2, 3]})
-        match = db.connection.execute(
-            "SELECT * FROM test_table WHERE firstname = 'test'"
+        match = db.execute(
+            "SELECT * FROM test_table WHERE firstname = 'test'",
+            table_name='test_table',
         ).fetchone()
         self.assertEqual([1, 2, 3], match['int_list'])
 
 
+class TestBatchInsertSelect(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                BoolColumn('active'),
+                IntListColumn('int_list'),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_insert_many_stores_native_types(self):
+        count = self.db.insert_many(
+            'test_table',
+            ['id', 'active', 'int_list'],
+            [(1, True, [1, 2]), (2, False, []), (3, None, None)],
+            chunk_size=2,
+        )
+        self.assertEqual(3, count)
+        types = self.db.connection.execute(
+            'SELECT typeof(active), typeof(int_list) FROM test_table ORDER BY id'
+        ).fetchall()
+        self.assertEqual(
+            [('integer', 'text'), ('integer', 'text'), ('null', 'null')],
+            [tuple(row) for row in types],
+        )
+
+    def test_select_batches_decodes(self):
+        rows = [(i, i % 2 == 0, [i, -i]) for i in range(5)]
+        self.db.insert_many('test_table', ['id', 'active', 'int_list'], rows)
+        batches = list(self.db.select_batches('test_table', chunk_size=2))
+        self.assertEqual([2, 2, 1], [len(batch) for batch in batches])
+        self.assertEqual(rows, [row for batch in batches for row in batch])
+
+    def test_select_batches_reads_single_insert_rows(self):
+        self.db.insert('test_table', {'id': 1, 'active': False, 'int_list': [4]})
+        (batch,) = self.db.select_batches('test_table', ['active', 'int_list'])
+        self.assertEqual([(False, [4])], batch)
+
+    def test_converted_reads_match(self):
+        self.db.insert_many(
+            'test_table', ['id', 'active', 'int_list'], [(1, True, [7])]
+        )
+        match = self.db.execute(
+            'SELECT * FROM test_table', table_name='test_table'
+        ).fetchone()
+        self.assertEqual((True, [7]), (match['active'], match['int_list']))
+
+    def test_filter_on_bool_param(self):
+        sqlite3.register_adapter(bool, adapt_bool)
+        self.addCleanup(sqlite3.adapters.pop, (bool, sqlite3.PrepareProtocol))
+        self.db.insert_many(
+            'test_table', ['id', 'active'], [(1, True), (2, False), (3, True)]
+        )
+        rows = self.db.select('test_table', where='active = ?', params=[True])
+        self.assertEqual([1, 3], [row['id'] for row in rows])
+        cursor = self.db.execute(
+            'SELECT id FROM test_table WHERE active = ?', (False,)
+        )
+        self.assertEqual([2], [row['id'] for row in cursor])
+
+
+class TestJSON(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                JSONColumn('payload', paths={'kind': '$.kind'}),
+            ),
+            indexes=('kind',),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        self.db.insert('test_table', {'id': 1, 'payload': {'kind': 'a', 'n': [1]}})
+        self.db.insert_many(
+            'test_table', ['id', 'payload'], [(2, {'kind': 'b'}), (3, None)]
+        )
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_round_trip(self):
+        match = self.db.execute(
+            'SELECT payload FROM test_table WHERE id = 1', table_name='test_table'
+        ).fetchone()
+        self.assertEqual({'kind': 'a', 'n': [1]}, match['payload'])
+        (batch,) = self.db.select_batches('test_table', ['payload'])
+        self.assertEqual([({'kind': 'a', 'n': [1]},), ({'kind': 'b'},), (None,)], batch)
+
+    def test_filter_on_path_uses_index(self):
+        (row,) = self.db.select('test_table', where='kind = ?', params=('b',))
+        self.assertEqual(2, row['id'])
+        plan = self.db.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM test_table WHERE kind = 'b'"
+        ).fetchall()
+        self.assertIn('USING INDEX test_table_kind', plan[0]['detail'])
+
+
+class TestEpochStorage(unittest.TestCase):
+    def setUp(self):
+        self.column = DateTimeColumn(
+            'created',
+            auto_now_insert=True,
+            auto_now_update=True,
+            storage=SQLiteTimeStorage.EPOCH_MILLISECONDS,
+        )
+        table = SQLiteTable(
+            'events',
+            columns=(IntColumn('id', is_primary_key=True), self.column),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_stores_integers_and_reads_datetimes(self):
+        value = datetime.datetime(2024, 5, 6, 7, 8, 9, 123000)
+        self.db.insert('events', {'id': 1, 'created': value})
+        self.assertEqual(
+            1714979289123, self.db.get_raw_value('events', 'created', 'id', 1)
+        )
+        row = next(self.db.select('events'))
+        self.assertEqual(value, row['created'])
+
+    def test_auto_now(self):
+        self.db.connection.execute('INSERT INTO events (id) VALUES (1)')
+        row = next(self.db.select('events'))
+        now = datetime.datetime.utcnow()
+        self.assertLess(abs(now - row['created']), datetime.timedelta(seconds=5))
+        self.db.connection.execute('UPDATE events SET created = 0 WHERE id = 1')
+        self.assertGreater(self.db.get_raw_value('events', 'created', 'id', 1), 0)
+
+    def test_range_query_and_batches(self):
+        start = datetime.datetime(2024, 1, 1)
+        self.db.insert_many(
+            'events',
+            ['id', 'created'],
+            [(i, start + datetime.timedelta(hours=i)) for i in range(48)],
+        )
+        where, params = self.column.range_to_sql(
+            datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)
+        )
+        rows = list(self.db.select('events', where=where, params=params))
+        self.assertEqual(list(range(24, 48)), [row['id'] for row in rows])
+        batches = list(self.db.select_batches('events', ['created'], chunk_size=10))
+        self.assertEqual(start, batches[0][0][0])
+
+
+class TestWithoutRowid(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'accounts',
+            columns=(
+                TextColumn('tenant'),
+                IntColumn('number'),
+                BoolColumn('active'),
+                IntListColumn('flags'),
+                TextColumn('note'),
+            ),
+            primary_key=('tenant', 'number'),
+            without_rowid=True,
+            strict=True,
+            capture_changes=True,
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_insert_and_select_by_composite_key(self):
+        self.db.insert(
+            'accounts',
+            {'tenant': 'a', 'number': 1, 'active': True, 'flags': [1, 2], 'note': 'x'},
+        )
+        self.db.insert_many(
+            'accounts',
+            ['tenant', 'number', 'active', 'flags', 'note'],
+            [('b', 1, False, [3], 'y')],
+        )
+        rows = list(self.db.select('accounts', defer=['note'], order_by='tenant'))
+        self.assertEqual([('a', 1), ('b', 1)], [row.get_key() for row in rows])
+        self.assertEqual([True, False], [row['active'] for row in rows])
+        self.assertEqual([1, 2], rows[0]['flags'])
+        self.assertEqual('y', rows[1]['note'])
+
+    def test_strict_rejects_wrong_type(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.insert('accounts', {'tenant': 'a', 'number': 'one'})
+
+    def test_change_log_records_composite_key(self):
+        self.db.insert('accounts', {'tenant': 'a', 'number': 1})
+        self.assertEqual('["a",1]', self.db.read_changes()[0].pk)
+
+
 class TestTransactionWrapper(unittest.TestCase):
     def get_wrapped_test_func(self):
         @db_transaction
@@ -125,3 +436,109 @@ class TestTransactionWrapper(unittest.TestCase):
             self.get_wrapped_test_func()(TestObject()).connection,
             sqlite3.Connection,
         )
+
+
+class TestCSV(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('name'),
+                RealColumn('score'),
+                BoolColumn('active'),
+                IntListColumn('int_list'),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_import_converts_types(self):
+        source = io.StringIO(
+            'id,name,score,active,int_list\r\n'
+            '1,alice,1.5,true,"1,2"\r\n'
+            '2,,,0,\r\n'
+        )
+        self.assertEqual(2, self.db.import_csv('test_table', source))
+        rows = self.db.execute(
+            'SELECT * FROM test_table ORDER BY id', table_name='test_table'
+        ).fetchall()
+        self.assertEqual(
+            [1, 'alice', 1.5, True, [1, 2]],
+            list(rows[0]),
+        )
+        self.assertEqual([2, '', None, False], list(rows[1])[:4])
+
+    def test_import_chunks(self):
+        source = io.StringIO(
+            'id,name\r\n' + ''.join(f'{i},name{i}\r\n' for i in range(25))
+        )
+        self.assertEqual(
+            25, self.db.import_csv('test_table', source, chunk_size=10)
+        )
+        count = self.db.connection.execute(
+            'SELECT COUNT(*) FROM test_table'
+        ).fetchone()[0]
+        self.assertEqual(25, count)
+
+    def test_import_column_map(self):
+        source = io.StringIO('ident\tname\r\n7\tbob\r\n')
+        self.db.import_csv(
+            'test_table', source, column_map={'ident': 'id'}, delimiter='\t'
+        )
+        match = self.db.connection.execute('SELECT * FROM test_table').fetchone()
+        self.assertEqual((7, 'bob'), (match['id'], match['name']))
+
+    def test_import_unknown_column_raises(self):
+        source = io.StringIO('id,unknown\r\n1,2\r\n')
+        with self.assertRaises(ValueError):
+            self.db.import_csv('test_table', source)
+
+    def test_import_skips_blank_lines(self):
+        source = io.StringIO('id,name\r\n\r\n1,a\r\n\r\n2,b\r\n\r\n')
+        self.assertEqual(2, self.db.import_csv('test_table', source))
+
+    def test_import_ragged_row_raises(self):
+        for line in ('3', '3,c,extra'):
+            source = io.StringIO(f'id,name\r\n1,a\r\n\r\n{line}\r\n')
+            with self.assertRaisesRegex(ValueError, 'line 4'):
+                self.db.import_csv('test_table', source)
+        count = self.db.connection.execute(
+            'SELECT COUNT(*) FROM test_table'
+        ).fetchone()[0]
+        self.assertEqual(0, count)
+
+    def test_import_rolls_back_on_error(self):
+        source = io.StringIO('id\r\n1\r\nnot-an-int\r\n')
+        with self.assertRaises(ValueError):
+            self.db.import_csv('test_table', source, chunk_size=1)
+        count = self.db.connection.execute(
+            'SELECT COUNT(*) FROM test_table'
+        ).fetchone()[0]
+        self.assertEqual(0, count)
+
+    def test_export_round_trip(self):
+        self.db.insert(
+            'test_table',
+            {'id': 1, 'name': 'alice', 'score': 2.5, 'active': True,
+             'int_list': [3, 4]},
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'out.csv'
+            self.assertEqual(1, self.db.export_csv('test_table', path))
+            with open(path, newline='') as fd:
+                self.assertEqual(
+                    'id,name,score,active,int_list\r\n1,alice,2.5,1,"3,4"\r\n',
+                    fd.read(),
+                )
+
+    def test_export_selected_columns(self):
+        self.db.insert('test_table', {'id': 1, 'name': 'alice'})
+        target = io.StringIO()
+        self.db.export_csv(
+            'test_table', target, column_names=['name'], write_header=False
+        )
+        self.assertEqual('alice\r\n', target.getvalue())
@@ -0,0 +1,142 @@
+import sqlite3
+import unittest
+
+from ..aggregate import SQLiteAggregate
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..diagnostics import (
+    SQLiteIndexSuggestion,
+    get_constrained_columns,
+    get_shape,
+    get_trigger_statements,
+)
+from ..table import SQLiteTable
+
+
+class TestShapes(unittest.TestCase):
+    def test_literals_replaced(self):
+        self.assertEqual(
+            'SELECT t1.a FROM t1 WHERE b = ? AND c IN (?) AND d = ? LIMIT ?',
+            get_shape(
+                "SELECT t1.a FROM t1\n WHERE b = 'it''s' AND c IN (1, -2.5, 'x') "
+                "AND d = X'00' LIMIT 10"
+            ),
+        )
+
+    def test_trigger_statements(self):
+        self.assertEqual(
+            ["UPDATE t SET a = ';' WHERE id = ?", 'DELETE FROM u WHERE t_id = ?'],
+            get_trigger_statements(
+                "CREATE TRIGGER tr AFTER DELETE ON t BEGIN UPDATE t SET a = ';' "
+                "WHERE id = old.id; DELETE FROM u WHERE t_id = old.id; END"
+            ),
+        )
+
+    def test_constrained_columns(self):
+        table = SQLiteTable(
+            'events',
+            columns=(IntColumn('id'), TextColumn('kind'), IntColumn('user_id')),
+        )
+        self.assertEqual(
+            ['kind', 'user_id'],
+            get_constrained_columns(
+                'SELECT id FROM events WHERE user_id > ? AND events.kind = ? '
+                'ORDER BY id',
+                table,
+                ['events'],
+            ),
+        )
+        self.assertEqual(
+            ['kind', 'id'],
+            get_constrained_columns(
+                'SELECT e.id FROM events AS e CROSS JOIN other ON other.user_id = '
+                'e.user_id WHERE e.kind = ? ORDER BY e.id DESC',
+                table,
+                ['events', 'e'],
+            ),
+        )
+        self.assertEqual(
+            [],
+            get_constrained_columns(
+                'SELECT id FROM events WHERE kind LIKE ?', table, ['events']
+            ),
+        )
+
+
+class TestQueryDiagnostics(unittest.TestCase):
+    def get_database(self, scan_min_rows, **kwargs):
+        table = SQLiteTable(
+            'events',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('kind'),
+                IntColumn('user_id'),
+            ),
+            **kwargs,
+        )
+        db = SQLiteDatabase(
+            connection=sqlite3.connect(':memory:'),
+            tables=[table],
+            query_diagnostics=True,
+            scan_min_rows=scan_min_rows,
+        )
+        db.do_creation()
+        db.insert_many(
+            'events',
+            ['id', 'kind', 'user_id'],
+            [(i, f'k{i % 5}', i % 50) for i in range(500)],
+        )
+        return db
+
+    def test_scan_flagged_with_suggestion(self):
+        db = self.get_database(100)
+        for kind in ('k1', 'k2'):
+            list(db.select('events', where='kind = ?', params=(kind,)))
+        list(db.select('events', where="kind = 'k3'"))
+        findings = db.get_query_findings()
+        self.assertEqual(1, len(findings))
+        finding = findings[0]
+        self.assertEqual('query', finding.source)
+        self.assertEqual(3, finding.executions)
+        self.assertEqual(('events', 500), finding.scans[0][:2])
+        self.assertEqual(
+            (SQLiteIndexSuggestion(
+                'events',
+                ('kind',),
+                'CREATE INDEX IF NOT EXISTS events_kind ON events (kind)',
+            ),),
+            finding.suggestions,
+        )
+
+    def test_small_tables_and_indexed_lookups_ignored(self):
+        db = self.get_database(1000, indexes=('kind',))
+        list(db.select('events', where='user_id = 3'))
+        self.assertEqual([], db.get_query_findings())
+        db.diagnostics.min_rows = 100
+        db.diagnostics.reset()
+        list(db.select('events', where="kind = 'k1'"))
+        list(db.fetch_by_keys('events', [1, 2]))
+        self.assertEqual([], db.get_query_findings())
+
+    def test_trigger_statements_explained(self):
+        db = self.get_database(100, aggregates=(
+            SQLiteAggregate('by_kind', group_by=('kind',), max_columns=('user_id',)),
+        ))
+        db.diagnostics.reset()
+        self.assertEqual([], db.get_query_findings())
+        # Drop the index the aggregate creates for recomputing maximums.
+        db.connection.execute('DROP INDEX events_kind_user_id')
+        findings = db.get_query_findings()
+        self.assertEqual(
+            {'events_by_kind_delete', 'events_by_kind_update'},
+            {x.source for x in findings},
+        )
+        self.assertEqual(('kind',), findings[0].suggestions[0].column_names)
+
+    def test_not_enabled(self):
+        db = SQLiteDatabase(connection=sqlite3.connect(':memory:'), tables=[])
+        with self.assertRaises(ValueError):
+            db.get_query_findings()
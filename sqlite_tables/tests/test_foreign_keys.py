@@ -0,0 +1,105 @@
+import sqlite3
+import unittest
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..enums import SQLiteForeignKeyMode
+from ..exceptions import ForeignKeyViolation
+from ..table import SQLiteTable
+
+
+TABLES = (
+    SQLiteTable(
+        'authors',
+        columns=(IntColumn('id', is_primary_key=True), TextColumn('name')),
+    ),
+    SQLiteTable(
+        'books',
+        columns=(
+            IntColumn('id', is_primary_key=True),
+            IntColumn(
+                'author_id',
+                is_foreign_key=True,
+                fk_table_ref='authors',
+                fk_column_ref='id',
+            ),
+        ),
+    ),
+)
+
+
+class TestForeignKeyModes(unittest.TestCase):
+    def get_db(self, mode):
+        db = SQLiteDatabase(':memory:', tables=TABLES, foreign_keys=mode)
+        db.do_creation()
+        self.addCleanup(db.connection.close)
+        return db
+
+    def test_off(self):
+        db = self.get_db(SQLiteForeignKeyMode.OFF)
+        db.insert('books', {'id': 1, 'author_id': 5})
+        self.assertEqual(1, len(db.check_foreign_keys()))
+
+    def test_immediate(self):
+        db = self.get_db(SQLiteForeignKeyMode.IMMEDIATE)
+        with self.assertRaises(sqlite3.IntegrityError):
+            db.insert('books', {'id': 1, 'author_id': 5})
+
+    def test_deferred_checks_at_commit(self):
+        db = self.get_db(SQLiteForeignKeyMode.DEFERRED)
+        with db.transaction():
+            db.insert('books', {'id': 1, 'author_id': 5})
+            db.insert('authors', {'id': 5, 'name': 'a'})
+        with self.assertRaises(sqlite3.IntegrityError):
+            with db.transaction():
+                db.insert('books', {'id': 2, 'author_id': 6})
+        self.assertEqual(
+            [1], [x[0] for x in db.connection.execute('SELECT id FROM books')]
+        )
+
+
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.db = SQLiteDatabase(
+            ':memory:', tables=TABLES, foreign_keys=SQLiteForeignKeyMode.IMMEDIATE
+        )
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_children_before_parents(self):
+        with self.db.bulk_load(['books']):
+            self.db.insert_many('books', ['id', 'author_id'], [(1, 1), (2, 2)])
+            self.db.insert_many('authors', ['id', 'name'], [(1, 'a'), (2, 'b')])
+        self.assertEqual(
+            2, self.db.connection.execute('SELECT COUNT(*) FROM books').fetchone()[0]
+        )
+        self.assertEqual(
+            1, self.db.connection.execute('PRAGMA foreign_keys').fetchone()[0]
+        )
+
+    def test_reports_violations_and_rolls_back(self):
+        with self.assertRaises(ForeignKeyViolation) as cm:
+            with self.db.bulk_load():
+                self.db.insert_many('authors', ['id', 'name'], [(1, 'a')])
+                self.db.insert_many(
+                    'books', ['id', 'author_id'], [(1, 1), (2, 7), (3, 8)]
+                )
+        self.assertEqual(
+            [('books', 'authors', ('author_id',), (7,)),
+             ('books', 'authors', ('author_id',), (8,))],
+            [
+                (x.table_name, x.parent_table_name, x.column_names, x.values)
+                for x in cm.exception.violations
+            ],
+        )
+        self.assertEqual(
+            0, self.db.connection.execute('SELECT COUNT(*) FROM authors').fetchone()[0]
+        )
+        self.assertEqual(
+            1, self.db.connection.execute('PRAGMA foreign_keys').fetchone()[0]
+        )
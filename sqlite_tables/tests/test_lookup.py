@@ -0,0 +1,143 @@
+import sqlite3
+import unittest
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..lookup import SQLiteKeyLookup
+from ..table import SQLiteTable
+
+
+class TestKeyLookupToSQL(unittest.TestCase):
+    def test_exists_sql(self):
+        self.assertEqual(
+            'SELECT EXISTS (SELECT 1 FROM grants WHERE grants.role = lookup_key_0 '
+            'AND grants.user_id = lookup_key_1) FROM temp.lookup_keys_2 WHERE '
+            'lookup_batch = ? ORDER BY lookup_position',
+            SQLiteKeyLookup.exists_sql('grants', ['role', 'user_id']),
+        )
+
+    def test_join_to_sql(self):
+        self.assertEqual(
+            'temp.lookup_keys_1 CROSS JOIN users ON users.id = lookup_key_0',
+            SQLiteKeyLookup.join_to_sql('users', ['id']),
+        )
+
+
+class TestKeyLookup(unittest.TestCase):
+    def setUp(self):
+        users = SQLiteTable(
+            'users',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('email', unique=True),
+                TextColumn('bio'),
+            ),
+        )
+        grants = SQLiteTable(
+            'grants',
+            columns=(
+                TextColumn('role', allow_null=False),
+                IntColumn('user_id', allow_null=False),
+            ),
+            primary_key=('role', 'user_id'),
+            without_rowid=True,
+        )
+        self.db = SQLiteDatabase(
+            connection=sqlite3.connect(':memory:'), tables=[users, grants]
+        )
+        self.db.do_creation()
+        self.db.insert_many(
+            'users',
+            ['id', 'email', 'bio'],
+            [(i, f'u{i}@example.com', f'bio {i}') for i in range(1, 101)],
+        )
+        self.db.insert_many(
+            'grants', ['role', 'user_id'], [('admin', 1), ('editor', 2)]
+        )
+
+    def test_exists_many(self):
+        self.assertEqual(
+            [(5, True), (500, False), (1, True)],
+            list(self.db.exists_many('users', [5, 500, 1, 5])),
+        )
+
+    def test_exists_many_composite_key(self):
+        self.assertEqual(
+            [(('admin', 1), True), (('admin', 2), False)],
+            list(self.db.exists_many('grants', [('admin', 1), ('admin', 2)])),
+        )
+
+    def test_fetch_by_keys_in_key_order(self):
+        rows = self.db.fetch_by_keys('users', [7, 3, 1000, 5], defer=('bio',))
+        self.assertEqual([7, 3, 5], [row['id'] for row in rows])
+
+    def test_rowid_keys(self):
+        table = SQLiteTable('notes', columns=(TextColumn('body'),))
+        db = SQLiteDatabase(connection=sqlite3.connect(':memory:'), tables=[table])
+        db.do_creation()
+        db.insert_many('notes', ['body'], [('a',), ('b',), ('c',)])
+        self.assertEqual(
+            [(3, True), (9, False), (1, True)], list(db.exists_many('notes', [3, 9, 1]))
+        )
+        rows = db.fetch_by_keys('notes', [3, 1])
+        self.assertEqual(['c', 'a'], [row['body'] for row in rows])
+
+    def test_fetch_by_other_column(self):
+        rows = list(self.db.fetch_by_keys(
+            'users',
+            ['u9@example.com', 'nobody@example.com'],
+            key_names=['email'],
+            column_names=['id', 'bio'],
+        ))
+        self.assertEqual([(9, 'bio 9')], [(row['id'], row['bio']) for row in rows])
+
+    def test_more_keys_than_variable_limit(self):
+        keys = range(self.db.get_max_variables() + 10)
+        found = [key for key, exists in self.db.exists_many('users', keys) if exists]
+        self.assertEqual(list(range(1, 101)), found)
+
+    def test_one_query_per_lookup(self):
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+        list(self.db.fetch_by_keys('users', range(50)))
+        self.db.connection.set_trace_callback(None)
+        selects = [x for x in statements if x.startswith('SELECT')]
+        self.assertEqual(1, len(selects))
+
+    def test_lookup_table_reused_and_emptied(self):
+        list(self.db.exists_many('users', [1, 2]))
+        list(self.db.fetch_by_keys('users', [3]))
+        tables = self.db.connection.execute(
+            "SELECT name FROM sqlite_temp_master WHERE type = 'table'"
+        ).fetchall()
+        self.assertEqual([('lookup_keys_1',)], [tuple(x) for x in tables])
+        self.assertEqual(
+            0,
+            self.db.connection.execute(
+                'SELECT COUNT(*) FROM temp.lookup_keys_1'
+            ).fetchone()[0],
+        )
+
+    def test_abandoned_lookup_removes_keys(self):
+        rows = self.db.fetch_by_keys('users', [1, 2, 3])
+        next(rows)
+        rows.close()
+        self.assertEqual(
+            0,
+            self.db.connection.execute(
+                'SELECT COUNT(*) FROM temp.lookup_keys_1'
+            ).fetchone()[0],
+        )
+
+    def test_join_searches_target_by_key(self):
+        list(self.db.exists_many('users', [1]))
+        plan = self.db.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT users.id FROM '
+            + SQLiteKeyLookup.join_to_sql('users', ['id'])
+            + ' WHERE lookup_batch = 0'
+        ).fetchall()
+        details = ' '.join(row[3] for row in plan)
+        self.assertNotIn('SCAN users', details)
@@ -0,0 +1,146 @@
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..enums import (
+    SQLiteAutoVacuum,
+    SQLiteCheckpointMode,
+)
+from ..exceptions import InvalidDatabaseConfiguration
+from ..maintenance import SQLiteMaintenance
+from ..table import SQLiteTable
+
+
+class TestMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / 'test.db'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_database(self, **kwargs):
+        table = SQLiteTable(
+            'notes',
+            columns=(IntColumn('id', is_primary_key=True), TextColumn('body')),
+            indexes=('body',),
+        )
+        db = SQLiteDatabase(path=self.path, tables=[table], **kwargs)
+        db.do_creation()
+        db.insert_many(
+            'notes', ['id', 'body'], [(i, 'x' * 500) for i in range(2000)]
+        )
+        return db
+
+    def test_analyze_then_optimize(self):
+        db = self.get_database()
+        report = db.run_maintenance()
+        self.assertTrue(report.idle)
+        self.assertEqual(['analyze', 'optimize'], report.get_step_names())
+        self.assertIsNotNone(
+            db.connection.execute('SELECT * FROM sqlite_stat1').fetchone()
+        )
+        self.assertEqual(['optimize'], db.run_maintenance().get_step_names())
+        self.assertEqual(2, len(db.maintenance.reports))
+
+    def test_incremental_vacuum(self):
+        db = self.get_database(auto_vacuum=SQLiteAutoVacuum.INCREMENTAL)
+        db.maintenance.vacuum_threshold = 10
+        db.maintenance.vacuum_pages = 50
+        with db.transaction():
+            db.connection.execute('DELETE FROM notes')
+        report = db.run_maintenance()
+        step = report.steps[-1]
+        self.assertEqual('incremental_vacuum', step.name)
+        self.assertEqual(50, step.result)
+        self.assertGreaterEqual(step.duration, 0.0)
+
+    def test_no_vacuum_without_incremental_auto_vacuum(self):
+        db = self.get_database()
+        db.maintenance.vacuum_threshold = 1
+        with db.transaction():
+            db.connection.execute('DELETE FROM notes')
+        self.assertNotIn(
+            'incremental_vacuum', db.run_maintenance().get_step_names()
+        )
+
+    def test_wal_checkpoints(self):
+        db = self.get_database()
+        db.connection.execute('PRAGMA journal_mode = wal')
+        db.connection.execute('PRAGMA wal_autocheckpoint = 0')
+        with db.transaction():
+            db.connection.execute("UPDATE notes SET body = 'y' || body")
+        maintenance = SQLiteMaintenance(checkpoint_pages=10, truncate_pages=10 ** 6)
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(
+            SQLiteCheckpointMode.PASSIVE,
+            maintenance.get_checkpoint_mode(connection, idle=True),
+        )
+        maintenance.truncate_pages = 10
+        self.assertEqual(
+            SQLiteCheckpointMode.PASSIVE,
+            maintenance.get_checkpoint_mode(connection, idle=False),
+        )
+        report = maintenance.run(connection, force=True)
+        self.assertEqual('wal_checkpoint(TRUNCATE)', report.steps[-1].name)
+        self.assertEqual(0, maintenance.get_wal_frames(connection))
+        connection.close()
+
+    def test_busy_database_is_not_idle(self):
+        db = self.get_database()
+        maintenance = SQLiteMaintenance(idle_time=3600)
+        connection = sqlite3.connect(self.path)
+        maintenance.is_idle(connection)
+        maintenance.last_change -= 7200
+        self.assertTrue(maintenance.is_idle(connection))
+        db.insert('notes', {'id': 5000, 'body': 'new'})
+        report = maintenance.run(connection)
+        self.assertFalse(report.idle)
+        self.assertEqual((), report.steps)
+        connection.close()
+
+    def test_background_thread(self):
+        reported = threading.Event()
+        db = self.get_database()
+        db.maintenance.on_report = lambda report: reported.set()
+        db.maintenance.interval = 0.01
+        db.maintenance.idle_time = 0.0
+        db.maintenance.start()
+        self.assertTrue(reported.wait(5))
+        db.stop_maintenance()
+        self.assertIsNone(db.maintenance.thread)
+        self.assertIn('analyze', db.maintenance.reports[0].get_step_names())
+
+    def test_background_survives_errors(self):
+        reports = []
+        reported = threading.Event()
+
+        def on_report(report):
+            reports.append(report)
+            if len(reports) == 1:
+                raise RuntimeError('report failed')
+            reported.set()
+
+        db = self.get_database()
+        db.maintenance.on_report = on_report
+        db.maintenance.interval = 0.01
+        with self.assertLogs('sqlite_tables.maintenance') as logs:
+            db.maintenance.start()
+            self.assertTrue(reported.wait(5))
+        db.stop_maintenance()
+        self.assertIn('report failed', logs.output[0])
+
+    def test_background_needs_path(self):
+        with self.assertRaises(InvalidDatabaseConfiguration):
+            SQLiteDatabase(
+                connection=sqlite3.connect(':memory:'), maintenance_interval=1.0
+            )
+        with self.assertRaises(InvalidDatabaseConfiguration):
+            SQLiteDatabase(':memory:', maintenance_interval=1.0)
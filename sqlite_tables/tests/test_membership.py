@@ -0,0 +1,126 @@
+import unittest
+
+from ..column import (
+    IntColumn,
+    IntListColumn,
+)
+from ..database import SQLiteDatabase
+from ..exceptions import InvalidTableConfiguration
+from ..membership import SQLiteMembershipIndex
+from ..table import SQLiteTable
+
+
+class TestMembershipIndexToSQL(unittest.TestCase):
+    def setUp(self):
+        self.table = SQLiteTable(
+            'posts',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                IntListColumn('tags', indexed=True),
+            ),
+        )
+
+    def test_triggers(self):
+        self.assertEqual(
+            [
+                'CREATE TRIGGER posts_tags_members_insert AFTER INSERT ON posts BEGIN '
+                'INSERT OR IGNORE INTO posts_tags_members (value, parent) SELECT '
+                "members.value, new.id FROM json_each('[' || CAST(new.tags AS TEXT) "
+                "|| ']') AS members; END",
+                'CREATE TRIGGER posts_tags_members_delete AFTER DELETE ON posts BEGIN '
+                'DELETE FROM posts_tags_members WHERE parent = old.id; END',
+            ],
+            list(SQLiteMembershipIndex.triggers_to_sql(self.table, 'tags'))[:2],
+        )
+
+    def test_filter_to_sql(self):
+        self.assertEqual(
+            ('id IN (SELECT parent FROM posts_tags_members WHERE value IN (?, ?) '
+             'GROUP BY parent HAVING COUNT(*) = 2)', [3, 1]),
+            SQLiteMembershipIndex.filter_to_sql(
+                self.table, 'tags', [3, 1, 3], match_all=True
+            ),
+        )
+
+    def test_composite_key_raises(self):
+        table = SQLiteTable(
+            'posts',
+            columns=(
+                IntColumn('a'), IntColumn('b'), IntListColumn('tags', indexed=True)
+            ),
+            primary_key=('a', 'b'),
+            without_rowid=True,
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            list(table.auxiliary_schema_to_sql())
+
+
+class TestMembershipQueries(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'posts',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                IntListColumn('tags', indexed=True),
+                IntListColumn('other'),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        self.db.insert('posts', {'id': 1, 'tags': [1, 2, 3]})
+        self.db.insert_many(
+            'posts', ['id', 'tags'], [(2, [2, 4]), (3, []), (4, None), (5, [4, 4])]
+        )
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def get_ids(self, rows):
+        return sorted(row.get_key() for row in rows)
+
+    def test_contains(self):
+        self.assertEqual([1, 2], self.get_ids(self.db.contains('posts', 'tags', 2)))
+        self.assertEqual(
+            [1, 2, 5], self.get_ids(self.db.contains_any('posts', 'tags', [1, 4]))
+        )
+        self.assertEqual(
+            [2], self.get_ids(self.db.contains_all('posts', 'tags', [2, 4]))
+        )
+        self.assertEqual([], self.get_ids(self.db.contains_any('posts', 'tags', [])))
+
+    def test_uses_index(self):
+        where, params = SQLiteMembershipIndex.filter_to_sql(
+            self.db.get_table('posts'), 'tags', [2]
+        )
+        plan = ' '.join(
+            row[3] for row in self.db.connection.execute(
+                f'EXPLAIN QUERY PLAN SELECT id FROM posts WHERE {where}', params
+            )
+        )
+        self.assertIn('posts_tags_members', plan)
+        self.assertNotIn('SCAN posts_tags_members', plan)
+
+    def test_kept_in_sync(self):
+        connection = self.db.connection
+        connection.execute("UPDATE posts SET tags = '7' WHERE id = 1")
+        connection.execute('DELETE FROM posts WHERE id = 2')
+        self.assertEqual([1], self.get_ids(self.db.contains('posts', 'tags', 7)))
+        self.assertEqual([5], self.get_ids(self.db.contains('posts', 'tags', 4)))
+        self.assertEqual([], self.get_ids(self.db.contains('posts', 'tags', 2)))
+
+    def test_backfills_existing_rows(self):
+        schema = list(
+            SQLiteMembershipIndex.schema_to_sql(self.db.get_table('posts'), 'tags')
+        )
+        self.db.connection.execute('DELETE FROM posts_tags_members WHERE parent = 1')
+        for statement in schema:
+            self.db.connection.execute(statement)
+        self.assertEqual([2], self.get_ids(self.db.contains('posts', 'tags', 2)))
+        self.db.connection.execute('DELETE FROM posts_tags_members')
+        for statement in schema:
+            self.db.connection.execute(statement)
+        self.assertEqual([1, 2], self.get_ids(self.db.contains('posts', 'tags', 2)))
+
+    def test_unindexed_column_raises(self):
+        with self.assertRaises(ValueError):
+            list(self.db.contains('posts', 'other', 1))
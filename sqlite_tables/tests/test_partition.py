@@ -0,0 +1,216 @@
+import datetime
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..column import (
+    IntColumn,
+    DateTimeColumn,
+)
+from ..database import SQLiteDatabase
+from ..enums import (
+    SQLitePartitionPeriod,
+    SQLiteTimeStorage,
+)
+from ..exceptions import (
+    InvalidDatabaseConfiguration,
+    InvalidTableConfiguration,
+)
+from ..partition import to_datetime
+from ..table import SQLiteTable
+
+
+class TestToDatetime(unittest.TestCase):
+    def test_iso_string(self):
+        self.assertEqual(
+            datetime.datetime(2026, 1, 2), to_datetime('2026-01-02 10:11:12')
+        )
+
+    def test_date(self):
+        self.assertEqual(
+            datetime.datetime(2026, 1, 2), to_datetime(datetime.date(2026, 1, 2))
+        )
+
+    def test_epoch_seconds(self):
+        self.assertEqual(datetime.datetime(1970, 1, 2), to_datetime(86400))
+
+
+class TestPartitionedTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_table(
+        self,
+        period=SQLitePartitionPeriod.DAY,
+        storage=SQLiteTimeStorage.TEXT,
+    ):
+        return SQLiteTable(
+            'events',
+            columns=(
+                IntColumn('id'),
+                DateTimeColumn('created', auto_now_insert=True, storage=storage),
+            ),
+            partition_by='created',
+            partition_period=period,
+        )
+
+    def get_db(self, period=SQLitePartitionPeriod.DAY, **kwargs):
+        db = SQLiteDatabase(
+            str(self.directory / 'main.db'), tables=(self.get_table(period, **kwargs),)
+        )
+        db.do_creation()
+        self.addCleanup(db.connection.close)
+        return db
+
+    def get_partition_files(self):
+        return sorted(path.name for path in self.directory.glob('events_*.db'))
+
+    def test_do_creation_creates_no_partition(self):
+        db = self.get_db()
+        self.assertEqual([], self.get_partition_files())
+        self.assertEqual([], list(db.select('events')))
+
+    def test_inserts_routed_by_period(self):
+        db = self.get_db(SQLitePartitionPeriod.MONTH)
+        db.insert('events', {'id': 1, 'created': '2026-01-05 00:00:00'})
+        db.insert_many(
+            'events',
+            ['id', 'created'],
+            [(2, '2026-01-20 00:00:00'), (3, '2026-02-01 00:00:00')],
+        )
+        self.assertIn('events_202601.db', self.get_partition_files())
+        self.assertIn('events_202602.db', self.get_partition_files())
+        ids = db.connection.execute(
+            'SELECT id FROM events_202601.events ORDER BY id'
+        ).fetchall()
+        self.assertEqual([1, 2], [row['id'] for row in ids])
+
+    def test_import_csv_routed_by_period(self):
+        db = self.get_db()
+        source = io.StringIO('id,created\n1,2026-01-01\n2,2026-01-02\n')
+        self.assertEqual(2, db.import_csv('events', source))
+        ids = db.connection.execute(
+            'SELECT id FROM events_20260102.events'
+        ).fetchall()
+        self.assertEqual([2], [row['id'] for row in ids])
+        with self.assertRaises(ValueError):
+            db.import_csv('events', io.StringIO('id\n3\n'))
+
+    def test_routed_by_period_in_every_storage(self):
+        created = datetime.datetime(2026, 3, 15, 12, 30)
+        for storage in SQLiteTimeStorage:
+            db = self.get_db(SQLitePartitionPeriod.MONTH, storage=storage)
+            stored = db.get_table('events').columns['created'].encode_value(created)
+            db.insert('events', {'id': 1, 'created': created})
+            db.insert_many('events', ['id', 'created'], [(2, created), (3, stored)])
+            ids = db.connection.execute(
+                'SELECT id FROM events_202603.events ORDER BY id'
+            ).fetchall()
+            self.assertEqual([1, 2, 3], [row['id'] for row in ids], storage)
+            db.connection.close()
+            for path in self.directory.glob('*.db'):
+                path.unlink()
+
+    def test_view_spans_partitions(self):
+        db = self.get_db()
+        for i, day in enumerate(('2026-01-01', '2026-01-02', '2026-01-03')):
+            db.insert('events', {'id': i, 'created': day})
+        count = db.connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+        self.assertEqual(3, count)
+
+    def test_reopen_attaches_existing_partitions(self):
+        db = self.get_db()
+        db.insert('events', {'id': 1, 'created': '2026-01-01'})
+        db.connection.close()
+        db = self.get_db()
+        count = db.connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+        self.assertEqual(1, count)
+
+    def test_drop_partitions(self):
+        db = self.get_db()
+        db.insert('events', {'id': 1, 'created': '2026-01-01'})
+        db.insert('events', {'id': 2, 'created': '2026-01-02'})
+        dropped = db.drop_partitions('events', datetime.date(2026, 1, 2))
+        self.assertEqual(['events_20260101.db'], [path.name for path in dropped])
+        self.assertNotIn('events_20260101.db', self.get_partition_files())
+        ids = db.connection.execute('SELECT id FROM events').fetchall()
+        self.assertEqual([2], [row['id'] for row in ids])
+
+    def test_new_partition_refused_inside_transaction(self):
+        db = self.get_db()
+        db.insert('events', {'id': 1, 'created': '2026-01-01'})
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                db.insert('events', {'id': 2, 'created': '2026-01-01'})
+                db.insert('events', {'id': 3, 'created': '2026-01-02'})
+        self.assertNotIn('events_20260102.db', self.get_partition_files())
+        ids = db.connection.execute('SELECT id FROM events').fetchall()
+        self.assertEqual([1], [row['id'] for row in ids])
+
+    def test_attached_partitions_written_inside_transaction(self):
+        db = self.get_db()
+        db.attach_partitions('events', ['2026-01-01', '2026-01-02'])
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.insert('events', {'id': 1, 'created': '2026-01-01'})
+                db.insert_many('events', ['id', 'created'], [(2, '2026-01-02')])
+                raise RuntimeError
+        count = db.connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+        self.assertEqual(0, count)
+
+    def test_drop_refused_inside_transaction(self):
+        db = self.get_db()
+        with db.transaction():
+            with self.assertRaises(ValueError):
+                db.drop_partitions('events', datetime.date(2026, 1, 2))
+            self.assertTrue(db.connection.in_transaction)
+
+    def test_attached_partitions_bounded(self):
+        db = self.get_db()
+        days = [datetime.date(2026, 1, day) for day in range(1, 13)]
+        for i, day in enumerate(days):
+            db.insert('events', {'id': i, 'created': day})
+        attached = db.connection.execute('PRAGMA database_list').fetchall()
+        self.assertEqual(10, len(db.partitions['events'].attached))
+        self.assertEqual(12, len(attached))
+        ids = db.connection.execute('SELECT id FROM events ORDER BY id').fetchall()
+        self.assertEqual(list(range(2, 12)), [row['id'] for row in ids])
+        db.attach_partitions('events', days[:1])
+        self.assertIn(
+            0, [row['id'] for row in db.connection.execute('SELECT id FROM events')]
+        )
+
+    def test_select_reads_unattached_partitions(self):
+        db = self.get_db()
+        rows = [(i, datetime.date(2026, 1, i)) for i in range(1, 16)]
+        self.assertEqual(15, db.insert_many('events', ['id', 'created'], rows))
+        self.assertEqual(15, len(self.get_partition_files()))
+        self.assertEqual(10, len(db.partitions['events'].attached))
+        db.connection.close()
+        db = self.get_db()
+        ids = [row['id'] for row in db.select('events', order_by='created')]
+        self.assertEqual(list(range(1, 16)), ids)
+        latest = db.select('events', order_by='created', descending=True, limit=12)
+        self.assertEqual(list(range(15, 3, -1)), [row['id'] for row in latest])
+        batches = db.select_batches('events', ['id'], chunk_size=4)
+        self.assertEqual(15, sum(len(batch) for batch in batches))
+        with self.assertRaises(ValueError):
+            list(db.select('events', order_by='id'))
+        with self.assertRaises(ValueError):
+            list(db.exists_many('events', [1], ['id']))
+
+    def test_memory_database_needs_directory(self):
+        with self.assertRaises(InvalidDatabaseConfiguration):
+            SQLiteDatabase(':memory:', tables=(self.get_table(),))
+
+    def test_unknown_partition_column_raises(self):
+        table = SQLiteTable(
+            'events', columns=(IntColumn('id'),), partition_by='created'
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            table.validate_columns()
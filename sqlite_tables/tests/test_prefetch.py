@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..prefetch import get_relation
+from ..table import SQLiteTable
+
+
+AUTHORS = SQLiteTable(
+    'authors',
+    columns=(IntColumn('id', is_primary_key=True), TextColumn('name')),
+)
+BOOKS = SQLiteTable(
+    'books',
+    columns=(
+        IntColumn('id', is_primary_key=True),
+        TextColumn('title'),
+        IntColumn(
+            'author_id', is_foreign_key=True, fk_table_ref='authors', fk_column_ref='id'
+        ),
+    ),
+)
+
+
+class TestGetRelation(unittest.TestCase):
+    def test_directions(self):
+        forward = get_relation(BOOKS, AUTHORS)
+        self.assertTrue(forward.forward)
+        self.assertEqual(('author_id', 'id'), (
+            forward.get_row_column(), forward.get_related_column()
+        ))
+        reverse = get_relation(AUTHORS, BOOKS)
+        self.assertFalse(reverse.forward)
+        self.assertEqual(('id', 'author_id'), (
+            reverse.get_row_column(), reverse.get_related_column()
+        ))
+
+    def test_unrelated_raises(self):
+        with self.assertRaises(ValueError):
+            get_relation(AUTHORS, AUTHORS)
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.db = SQLiteDatabase(':memory:', tables=(AUTHORS, BOOKS))
+        self.db.do_creation()
+        self.db.insert_many(
+            'authors', ['id', 'name'], [(i, f'author {i}') for i in range(3000)]
+        )
+        self.db.insert_many(
+            'books',
+            ['id', 'title', 'author_id'],
+            [(i, f'book {i}', i % 1500) for i in range(6000)]
+            + [(6000, 'anonymous', None)],
+        )
+        self.statements = []
+        self.db.connection.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_children(self):
+        authors = list(self.db.select('authors', order_by='id'))
+        books = self.db.prefetch(authors, 'authors', 'books', order_by='id')
+        self.assertEqual(2, len(self.statements))
+        self.assertEqual(
+            ['book 7', 'book 1507', 'book 3007', 'book 4507'],
+            [book['title'] for book in books[7]],
+        )
+        self.assertEqual([], books[2999])
+
+    def test_parents_in_chunks(self):
+        books = list(self.db.select('books', column_names=['title', 'author_id']))
+        authors = self.db.prefetch(
+            books, 'books', 'authors', column_names=['name'], chunk_size=500
+        )
+        self.assertEqual(4, len(self.statements))
+        self.assertEqual('author 1', authors[1501][0]['name'])
+        self.assertEqual([], authors[6000])
+
+    def test_max_variables_without_getlimit(self):
+        connection = self.db.connection
+        self.db.connection = mock.Mock(spec=[])
+        for version, expected in (((3, 31, 1), 999), ((3, 32, 0), 32766)):
+            with mock.patch('sqlite3.sqlite_version_info', version):
+                self.assertEqual(expected, self.db.get_max_variables())
+        self.db.connection = connection
@@ -0,0 +1,173 @@
+import decimal
+import io
+import sqlite3
+import unittest
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+    BoolColumn,
+    IntListColumn,
+    SQLiteColumn,
+)
+from ..database import SQLiteDatabase
+from ..enums import SQLiteType
+from ..registry import SQLiteCodecRegistry
+from ..table import SQLiteTable
+from ..types import (
+    IntList,
+    adapt_int_list,
+    convert_bool,
+    convert_int_list,
+)
+
+
+class TestCodecRegistry(unittest.TestCase):
+    def get_registry(self, *tables):
+        registry = SQLiteCodecRegistry(
+            adapters=((IntList, adapt_int_list),),
+            converters=(('BOOL', convert_bool), ('INT_LIST', convert_int_list)),
+        )
+        registry.add_tables(tables)
+        return registry
+
+    def test_only_converted_columns_registered(self):
+        registry = self.get_registry(SQLiteTable(
+            'test_table',
+            columns=(IntColumn('id'), TextColumn('name'), BoolColumn('active')),
+        ))
+        self.assertEqual(['active'], list(registry.table_converters['test_table']))
+
+    def test_native_tables_use_sqlite3_row(self):
+        registry = self.get_registry(
+            SQLiteTable('test_table', columns=(IntColumn('id'), TextColumn('name')))
+        )
+        self.assertIs(sqlite3.Row, registry.get_row_factory())
+
+    def test_converters_kept_per_table(self):
+        registry = self.get_registry(
+            SQLiteTable('first', columns=(BoolColumn('flag'),)),
+            SQLiteTable('second', columns=(IntListColumn('flag'),)),
+        )
+        self.assertIs(convert_bool, registry.table_converters['first']['flag'])
+        self.assertIs(convert_int_list, registry.table_converters['second']['flag'])
+
+    def test_adapt_by_exact_type(self):
+        registry = self.get_registry()
+        self.assertEqual(b'1,2', registry.adapt(IntList([1, 2])))
+        self.assertEqual([1, 2], registry.adapt([1, 2]))
+
+
+class TestDatabaseCodecs(unittest.TestCase):
+    def get_table(self):
+        return SQLiteTable(
+            'test_table',
+            columns=(TextColumn('name'), IntListColumn('int_list')),
+        )
+
+    def test_databases_with_different_converters(self):
+        def convert_reversed(value):
+            return IntList(reversed(convert_int_list(value)))
+
+        plain = SQLiteDatabase(':memory:', tables=(self.get_table(),))
+        reversing = SQLiteDatabase(
+            ':memory:',
+            tables=(self.get_table(),),
+            converters=(('INT_LIST', convert_reversed),),
+        )
+        for db in (plain, reversing):
+            db.do_creation()
+            db.insert('test_table', {'name': 'test', 'int_list': [1, 2, 3]})
+        query = 'SELECT int_list FROM test_table'
+        for db, expected in ((plain, [1, 2, 3]), (reversing, [3, 2, 1])):
+            match = db.execute(query, table_name='test_table').fetchone()
+            self.assertEqual(expected, match[0])
+
+    def test_does_not_register_globally(self):
+        converters = dict(sqlite3.converters)
+        SQLiteDatabase(':memory:', tables=(self.get_table(),))
+        self.assertEqual(converters, sqlite3.converters)
+
+    def test_passed_connection_converts(self):
+        db = SQLiteDatabase(
+            connection=sqlite3.connect(':memory:'),
+            tables=(self.get_table(),),
+        )
+        db.do_creation()
+        db.insert('test_table', {'name': 'test', 'int_list': [4]})
+        match = db.execute('SELECT * FROM test_table', table_name='test_table')
+        self.assertEqual(('test', [4]), tuple(match.fetchone()))
+
+    def test_same_column_name_in_other_tables(self):
+        tables = (
+            SQLiteTable('a', columns=(TextColumn('tags'),)),
+            SQLiteTable('b', columns=(IntListColumn('tags'),)),
+        )
+        db = SQLiteDatabase(':memory:', tables=tables)
+        db.do_creation()
+        db.insert('a', {'tags': '1,2'})
+        db.insert('b', {'tags': [1, 2]})
+        for table_name, expected in (('a', '1,2'), ('b', [1, 2])):
+            query = f'SELECT tags FROM {table_name}'
+            match = db.execute(query, table_name=table_name).fetchone()
+            self.assertEqual(expected, match[0])
+        self.assertEqual('x', db.execute("SELECT 'x' AS flag").fetchone()[0])
+
+
+class DecimalColumn(SQLiteColumn):
+    @staticmethod
+    def from_csv(value: str) -> decimal.Decimal:
+        return decimal.Decimal(value)
+
+    def __init__(self, column_name: str, **kwargs) -> None:
+        super().__init__(column_name, SQLiteType.TEXT, **kwargs)
+
+
+class TestAdapters(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'prices',
+            columns=(IntColumn('id', is_primary_key=True), DecimalColumn('amount')),
+        )
+        self.db = SQLiteDatabase(
+            ':memory:', tables=(table,), adapters=((decimal.Decimal, str),)
+        )
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def get_amounts(self):
+        return [
+            row[0] for row in
+            self.db.connection.execute('SELECT amount FROM prices ORDER BY id')
+        ]
+
+    def test_insert(self):
+        self.db.insert('prices', {'id': 1, 'amount': decimal.Decimal('1.50')})
+        self.assertEqual(['1.50'], self.get_amounts())
+
+    def test_insert_many(self):
+        self.db.insert_many(
+            'prices', ['id', 'amount'], [(1, decimal.Decimal('2.25')), (2, None)]
+        )
+        self.assertEqual(['2.25', None], self.get_amounts())
+
+    def test_import_csv(self):
+        self.db.import_csv('prices', io.StringIO('id,amount\n1,3.75\n'))
+        self.assertEqual(['3.75'], self.get_amounts())
+
+    def test_select_params(self):
+        self.db.insert_many('prices', ['id', 'amount'], [(1, '1.5'), (2, '2.5')])
+        (row,) = self.db.select(
+            'prices', where='amount = ?', params=(decimal.Decimal('2.5'),)
+        )
+        self.assertEqual(2, row['id'])
+
+    def test_execute_params(self):
+        self.db.insert_many('prices', ['id', 'amount'], [(1, '1.5')])
+        for params in ((decimal.Decimal('1.5'),), {'a': decimal.Decimal('1.5')}):
+            query = 'SELECT id FROM prices WHERE amount = ' + (
+                ':a' if isinstance(params, dict) else '?'
+            )
+            self.assertEqual(1, self.db.execute(query, params).fetchone()[0])
@@ -0,0 +1,151 @@
+import io
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..table import SQLiteTable
+
+
+class TestReplica(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / 'test.db')
+        self.tables = (
+            SQLiteTable(
+                'countries',
+                columns=(IntColumn('id', is_primary_key=True), TextColumn('name')),
+            ),
+            SQLiteTable('events', columns=(IntColumn('country_id'),)),
+        )
+        db = SQLiteDatabase(self.path, tables=self.tables)
+        db.do_creation()
+        db.insert_many('countries', ['id', 'name'], [(1, 'France'), (2, 'Peru')])
+        db.connection.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_db(self, **kwargs):
+        db = SQLiteDatabase(
+            self.path, tables=self.tables, replicated_tables=('countries',), **kwargs
+        )
+        self.addCleanup(db.connection.close)
+        self.addCleanup(db.replica.close)
+        return db
+
+    def test_loaded_on_startup(self):
+        db = self.get_db()
+        rows = db.replica.connection.execute('SELECT name FROM countries')
+        self.assertEqual(['France', 'Peru'], sorted(row['name'] for row in rows))
+
+    def test_reads_use_replica(self):
+        db = self.get_db()
+        self.assertIs(db.replica.connection, db.get_read_connection('countries'))
+        self.assertIs(db.connection, db.get_read_connection('events'))
+        with mock.patch.object(db, 'connection') as connection:
+            (row,) = db.select('countries', where='id = ?', params=(2,))
+            connection.cursor.assert_not_called()
+        self.assertEqual('Peru', row['name'])
+
+    def test_writes_applied_to_both(self):
+        db = self.get_db()
+        db.insert('countries', {'id': 3, 'name': 'Chad'})
+        db.insert_many('countries', ['id', 'name'], [(4, 'Fiji')])
+        db.import_csv('countries', io.StringIO('id,name\n5,Oman\n'))
+        for connection in (db.connection, db.replica.connection):
+            count = connection.execute('SELECT COUNT(*) FROM countries')
+            self.assertEqual(5, count.fetchone()[0])
+
+    def test_writes_applied_on_commit(self):
+        db = self.get_db()
+
+        def get_count():
+            return db.replica.connection.execute(
+                'SELECT COUNT(*) FROM countries'
+            ).fetchone()[0]
+
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.insert('countries', {'id': 3, 'name': 'Chad'})
+                db.import_csv('countries', io.StringIO('id,name\n4,Fiji\n'))
+                raise RuntimeError
+        self.assertEqual(2, get_count())
+        with db.transaction():
+            db.insert('countries', {'id': 3, 'name': 'Chad'})
+            with self.assertRaises(RuntimeError):
+                with db.transaction():
+                    db.insert_many('countries', ['id', 'name'], [(4, 'Fiji')])
+                    raise RuntimeError
+            self.assertEqual(2, get_count())
+        self.assertEqual(3, get_count())
+
+    def test_failed_replica_write_reloads(self):
+        db = self.get_db()
+        db.replica.connection.execute("INSERT INTO countries VALUES (3, 'Chad')")
+        db.replica.connection.commit()
+        db.insert('countries', {'id': 3, 'name': 'Chad'})
+        self.assertTrue(db.replica.is_stale())
+        self.assertEqual(3, len(list(db.select('countries'))))
+
+    def test_refresh_interval_reloads(self):
+        db = self.get_db(replica_refresh_interval=0)
+        with db.connection:
+            db.connection.execute("INSERT INTO countries VALUES (5, 'Oman')")
+        names = [row['name'] for row in db.select('countries')]
+        self.assertIn('Oman', names)
+
+    def test_replica_is_shared_in_process(self):
+        db = self.get_db()
+        other = sqlite3.connect(db.replica.replica_uri, uri=True)
+        count = other.execute('SELECT COUNT(*) FROM countries').fetchone()[0]
+        other.close()
+        self.assertEqual(2, count)
+
+    def test_rowids_and_defaults_match_source(self):
+        path = str(Path(self.tmp.name) / 'notes.db')
+        tables = (
+            SQLiteTable(
+                'notes',
+                columns=(
+                    TextColumn('body', searchable=True),
+                    IntColumn('seed', default='(random())'),
+                ),
+            ),
+        )
+        db = SQLiteDatabase(path, tables=tables)
+        db.do_creation()
+        db.insert_many('notes', ['body'], [('red',), ('green',), ('blue',)])
+        with db.connection:
+            db.connection.execute("DELETE FROM notes WHERE body = 'green'")
+        db.connection.close()
+        db = SQLiteDatabase(path, tables=tables, replicated_tables=('notes',))
+        self.addCleanup(db.connection.close)
+        self.addCleanup(db.replica.close)
+        db.insert('notes', {'body': 'pink'})
+        db.insert_many('notes', ['body'], [('cyan',)])
+        query = 'SELECT rowid, body, seed FROM notes ORDER BY rowid'
+        self.assertEqual(
+            [tuple(row) for row in db.connection.execute(query)],
+            [tuple(row) for row in db.replica.connection.execute(query)],
+        )
+        (rowid,) = db.connection.execute(
+            "SELECT rowid FROM notes WHERE body = 'blue'"
+        ).fetchone()
+        self.assertEqual([rowid], db.search('notes', 'blue'))
+
+    def test_created_on_do_creation(self):
+        db = SQLiteDatabase(
+            ':memory:', tables=self.tables, replicated_tables=('countries',)
+        )
+        self.assertIsNone(db.replica.loaded_at)
+        db.do_creation()
+        db.insert('countries', {'id': 1, 'name': 'Mali'})
+        (row,) = db.select('countries')
+        self.assertEqual('Mali', row['name'])
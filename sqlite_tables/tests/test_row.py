@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+    IntListColumn,
+)
+from ..database import SQLiteDatabase
+from ..row import (
+    LazyRow,
+    LazyRowSpec,
+)
+from ..table import SQLiteTable
+from ..types import convert_int_list
+
+
+class TestLazyRow(unittest.TestCase):
+    def get_row(self, converter, load_deferred=None):
+        spec = LazyRowSpec(
+            column_names=['id', 'int_list', 'body'],
+            selected_names=['id', 'int_list'],
+            key_name='id',
+            converters={'id': None, 'int_list': converter, 'body': None},
+            load_deferred=load_deferred,
+        )
+        return LazyRow(spec, (7, '1,2'))
+
+    def test_converts_on_first_access_only(self):
+        converter = mock.Mock(side_effect=convert_int_list)
+        row = self.get_row(converter)
+        self.assertFalse(row.is_loaded('int_list'))
+        self.assertEqual([1, 2], row['int_list'])
+        self.assertEqual([1, 2], row[1])
+        converter.assert_called_once_with(b'1,2')
+
+    def test_loads_deferred_by_key(self):
+        load_deferred = mock.Mock(return_value='text')
+        row = self.get_row(None, load_deferred)
+        self.assertEqual('text', row['body'])
+        self.assertEqual('text', row['body'])
+        load_deferred.assert_called_once_with(7, 'body')
+
+    def test_unknown_key_raises(self):
+        with self.assertRaises(IndexError):
+            self.get_row(None)['missing']
+
+    def test_keys(self):
+        self.assertEqual(['id', 'int_list', 'body'], self.get_row(None).keys())
+
+
+class TestSelect(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('body'),
+                IntListColumn('int_list'),
+            ),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+        for i in range(3):
+            self.db.insert(
+                'test_table', {'id': i, 'body': f'body{i}', 'int_list': [i, i]}
+            )
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_select_all(self):
+        rows = list(self.db.select('test_table'))
+        self.assertEqual([[0, 'body0', [0, 0]]], [list(rows[0])])
+        self.assertEqual(3, len(rows))
+
+    def test_select_where(self):
+        (row,) = self.db.select('test_table', where='id = ?', params=(2,))
+        self.assertEqual([2, 2], row['int_list'])
+
+    def test_defer_leaves_column_out_of_query(self):
+        with mock.patch.object(
+            self.db, 'get_raw_value', wraps=self.db.get_raw_value
+        ) as get_raw_value:
+            rows = list(self.db.select('test_table', defer=['body']))
+            get_raw_value.assert_not_called()
+            self.assertEqual('body1', rows[1]['body'])
+            get_raw_value.assert_called_once_with('test_table', 'body', 'id', 1)
+
+    def test_defer_rowid_table(self):
+        db = SQLiteDatabase(
+            ':memory:',
+            tables=(SQLiteTable('other', columns=(TextColumn('body'),)),),
+        )
+        db.do_creation()
+        db.insert('other', {'body': 'text'})
+        (row,) = db.select('other', defer=['body'])
+        self.assertEqual('text', row['body'])
+
+    def test_defer_unknown_column_raises(self):
+        with self.assertRaises(ValueError):
+            list(self.db.select('test_table', defer=['missing']))
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..exceptions import InvalidDatabaseConfiguration
+from ..sharding import (
+    ShardedDatabase,
+    hash_shard,
+)
+from ..table import SQLiteTable
+
+
+class TestHashShard(unittest.TestCase):
+    def test_int_keys(self):
+        self.assertEqual([0, 1, 2, 0], [hash_shard(i, 3) for i in range(4)])
+
+    def test_str_keys_stable(self):
+        self.assertEqual(hash_shard('device-1', 4), hash_shard(b'device-1', 4))
+
+
+class TestShardedDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = [str(Path(self.tmp.name) / f'shard{i}.db') for i in range(3)]
+        self.table = SQLiteTable(
+            'events',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('device'),
+                IntColumn('value'),
+            ),
+        )
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def get_db(self, **kwargs):
+        self.db = ShardedDatabase(
+            self.paths, (self.table,), shard_keys={'events': 'id'}, **kwargs
+        )
+        self.db.do_creation()
+        return self.db
+
+    def get_shard_ids(self, index):
+        return [
+            row['id'] for row in
+            self.db.shards[index].connection.execute('SELECT id FROM events')
+        ]
+
+    def test_insert_routes_by_hash(self):
+        db = self.get_db()
+        for i in range(6):
+            db.insert('events', {'id': i, 'device': 'a'})
+        self.assertEqual([1, 4], self.get_shard_ids(1))
+
+    def test_insert_many_routes_by_range(self):
+        db = self.get_db(boundaries={'events': (10, 20)})
+        count = db.insert_many(
+            'events',
+            ['id', 'value'],
+            [(i, i * 2) for i in range(30)],
+            chunk_size=4,
+        )
+        self.assertEqual(30, count)
+        self.assertEqual(list(range(10)), sorted(self.get_shard_ids(0)))
+        self.assertEqual(list(range(20, 30)), sorted(self.get_shard_ids(2)))
+
+    def test_select_ordered_merge_with_limit(self):
+        db = self.get_db()
+        db.insert_many('events', ['id', 'value'], [(i, -i) for i in range(20)])
+        rows = db.select(
+            'events', column_names=['id'], order_by='value', limit=5
+        )
+        self.assertEqual([19, 18, 17, 16, 15], [row['id'] for row in rows])
+
+    def test_select_descending_nulls_last(self):
+        db = self.get_db()
+        db.insert_many(
+            'events', ['id', 'value'], [(1, None), (2, 5), (3, 7), (4, None)]
+        )
+        rows = db.select('events', order_by='value', descending=True)
+        self.assertEqual([3, 2], [row['id'] for row in rows][:2])
+
+    def test_select_unordered_reads_all_shards(self):
+        db = self.get_db()
+        db.insert_many('events', ['id'], [(i,) for i in range(10)])
+        rows = db.select('events', where='id >= ?', params=(5,))
+        self.assertEqual(list(range(5, 10)), sorted(row['id'] for row in rows))
+
+    def test_bad_boundaries_raise(self):
+        with self.assertRaises(InvalidDatabaseConfiguration):
+            self.get_db(boundaries={'events': (10,)})
+        self.get_db()
+
+    def test_missing_shard_key_raises(self):
+        db = self.get_db()
+        with self.assertRaises(ValueError):
+            db.insert('events', {'device': 'a'})
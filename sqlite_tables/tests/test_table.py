@@ -6,6 +6,8 @@ from ..column import (
     DateTimeColumn,
     TimeColumn,
     DateColumn,
+    JSONColumn,
+    BoolColumn,
 )
 from ..exceptions import InvalidTableConfiguration
 from ..table import SQLiteTable
@@ -229,3 +231,168 @@ class TestTriggersToSQL(unittest.TestCase):
             f'rowid = old.rowid; END',
             list(table.triggers_to_sql())[0],
         )
+
+
+class TestFTSToSQL(unittest.TestCase):
+    def setUp(self):
+        self.table = SQLiteTable(
+            'test_table',
+            columns=(
+                IntColumn('id', is_primary_key=True),
+                TextColumn('title', searchable=True),
+                TextColumn('body', searchable=True),
+                TextColumn('slug'),
+            ),
+        )
+
+    def test_fts_schema(self):
+        self.assertEqual(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS test_table_fts USING fts5("
+            "title, body, content='test_table')",
+            self.table.fts_schema_to_sql(),
+        )
+
+    def test_fts_rebuild(self):
+        self.assertEqual(
+            "INSERT INTO test_table_fts (test_table_fts) SELECT 'rebuild' "
+            "WHERE NOT EXISTS (SELECT 1 FROM test_table_fts_docsize)",
+            self.table.fts_rebuild_to_sql(),
+        )
+
+    def test_fts_triggers(self):
+        insert, delete, update = self.table.fts_triggers_to_sql()
+        self.assertEqual(
+            'CREATE TRIGGER test_table_fts_insert AFTER INSERT ON test_table '
+            'BEGIN INSERT INTO test_table_fts (rowid, title, body) '
+            'VALUES (new.rowid, new.title, new.body); END',
+            insert,
+        )
+        self.assertEqual(
+            "CREATE TRIGGER test_table_fts_delete AFTER DELETE ON test_table "
+            "BEGIN INSERT INTO test_table_fts (test_table_fts, rowid, title, body) "
+            "VALUES ('delete', old.rowid, old.title, old.body); END",
+            delete,
+        )
+        self.assertTrue(update.startswith(
+            'CREATE TRIGGER test_table_fts_update AFTER UPDATE OF title, body '
+            'ON test_table'
+        ))
+
+    def test_search_sql(self):
+        self.assertEqual(
+            'SELECT rowid FROM test_table_fts WHERE test_table_fts MATCH ? '
+            'ORDER BY bm25(test_table_fts) LIMIT 10',
+            self.table.search_to_sql(limit=10),
+        )
+
+    def test_no_searchable_columns(self):
+        table = SQLiteTable('test_table', columns=(TextColumn('title'),))
+        self.assertEqual([], list(table.auxiliary_schema_to_sql()))
+        self.assertEqual([], list(table.triggers_to_sql()))
+
+
+class TestIndexesToSQL(unittest.TestCase):
+    def test_index_on_json_path(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(JSONColumn('payload', paths={'kind': '$.kind'}),),
+            indexes=(('kind',), ('payload', 'kind')),
+        )
+        self.assertEqual(
+            'CREATE TABLE IF NOT EXISTS test_table (payload JSON_TEXT, '
+            "kind GENERATED ALWAYS AS (json_extract(payload, '$.kind')) VIRTUAL)",
+            table.schema_to_sql(),
+        )
+        self.assertEqual(
+            [
+                'CREATE INDEX IF NOT EXISTS test_table_kind ON test_table (kind)',
+                'CREATE INDEX IF NOT EXISTS test_table_payload_kind ON test_table '
+                '(payload, kind)',
+            ],
+            list(table.indexes_to_sql()),
+        )
+
+    def test_index_unknown_column_raises(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(TextColumn('firstname'),),
+            indexes=('lastname',),
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            list(table.indexes_to_sql())
+
+
+class TestTableOptionsToSQL(unittest.TestCase):
+    def get_table(self, **kwargs):
+        return SQLiteTable(
+            'test_table',
+            columns=(
+                TextColumn('tenant'),
+                IntColumn('number'),
+                BoolColumn('active'),
+                DateTimeColumn('modified', auto_now_update=True),
+            ),
+            primary_key=('tenant', 'number'),
+            **kwargs,
+        )
+
+    def test_composite_primary_key_without_rowid_strict(self):
+        self.assertEqual(
+            'CREATE TABLE IF NOT EXISTS test_table (tenant TEXT, number INT, '
+            'active INT, modified TEXT, PRIMARY KEY (tenant, number)) '
+            'STRICT, WITHOUT ROWID',
+            self.get_table(without_rowid=True, strict=True).schema_to_sql(),
+        )
+
+    def test_primary_key_col_name(self):
+        self.assertEqual('rowid', self.get_table().get_primary_key_col_name())
+        table = self.get_table(without_rowid=True)
+        with self.assertRaises(InvalidTableConfiguration):
+            table.get_primary_key_col_name()
+        self.assertEqual(['tenant', 'number'], table.get_row_key_names())
+        self.assertEqual(
+            'json_array(new.tenant, new.number)', table.get_row_key_sql('new')
+        )
+
+    def test_single_column_table_primary_key(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(TextColumn('code'),),
+            primary_key=('code',),
+            without_rowid=True,
+        )
+        self.assertEqual('code', table.get_primary_key_col_name())
+
+    def test_composite_key_update_trigger(self):
+        self.assertEqual(
+            ['CREATE TRIGGER test_table_modified_update AFTER UPDATE ON test_table '
+             'BEGIN UPDATE test_table SET modified = CURRENT_TIMESTAMP WHERE '
+             'tenant = old.tenant AND number = old.number; END'],
+            list(self.get_table(without_rowid=True).triggers_to_sql()),
+        )
+
+    def test_without_rowid_needs_primary_key(self):
+        table = SQLiteTable(
+            'test_table', columns=(TextColumn('code'),), without_rowid=True
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            table.schema_to_sql()
+
+    def test_unknown_primary_key_column_raises(self):
+        table = SQLiteTable(
+            'test_table', columns=(TextColumn('code'),), primary_key=('id',)
+        )
+        with self.assertRaises(InvalidTableConfiguration):
+            table.schema_to_sql()
+
+    def test_strict_generated_column_is_typed(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(JSONColumn('payload', paths={'kind': '$.kind'}),),
+            strict=True,
+        )
+        self.assertEqual(
+            'CREATE TABLE IF NOT EXISTS test_table (payload TEXT, kind ANY '
+            "GENERATED ALWAYS AS (json_extract(payload, '$.kind')) VIRTUAL) STRICT",
+            table.schema_to_sql(),
+        )
@@ -0,0 +1,217 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from ..column import (
+    IntColumn,
+    TextColumn,
+)
+from ..database import SQLiteDatabase
+from ..enums import SQLiteTransactionMode
+from ..table import SQLiteTable
+from ..transaction import (
+    SQLiteBatchSizer,
+    SQLiteTransaction,
+    is_busy_error,
+)
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'test.db'
+        table = SQLiteTable(
+            'test_table',
+            columns=(IntColumn('id', is_primary_key=True), TextColumn('body')),
+        )
+        self.db = SQLiteDatabase(
+            connection=sqlite3.connect(self.path, timeout=0),
+            tables=(table,),
+            busy_backoff=0.001,
+        )
+        self.db.do_creation()
+        self.other = sqlite3.connect(self.path, timeout=0)
+
+    def tearDown(self):
+        self.other.close()
+        self.db.connection.close()
+        self.directory.cleanup()
+
+    def get_ids(self):
+        return [
+            x[0] for x in self.other.execute('SELECT id FROM test_table ORDER BY id')
+        ]
+
+    def test_commits_on_success(self):
+        with self.db.transaction():
+            self.db.insert('test_table', {'id': 1, 'body': 'a'})
+            self.assertEqual([], self.get_ids())
+        self.assertEqual([1], self.get_ids())
+
+    def test_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.insert('test_table', {'id': 1, 'body': 'a'})
+                raise RuntimeError
+        self.assertEqual([], self.get_ids())
+        self.assertFalse(self.db.connection.in_transaction)
+
+    def test_nested_failure_only_undoes_savepoint(self):
+        commits = self.db.transaction_stats.commits
+        with self.db.transaction():
+            self.db.insert('test_table', {'id': 1, 'body': 'a'})
+            with self.assertRaises(sqlite3.IntegrityError):
+                self.db.insert_many('test_table', ['id', 'body'], [(2, 'b'), (1, 'c')])
+            self.db.insert('test_table', {'id': 3, 'body': 'c'})
+        self.assertEqual([1, 3], self.get_ids())
+        self.assertEqual(commits + 1, self.db.transaction_stats.commits)
+        self.assertGreaterEqual(self.db.transaction_stats.savepoints, 3)
+
+    def test_immediate_mode_takes_write_lock(self):
+        with self.db.transaction(SQLiteTransactionMode.IMMEDIATE):
+            with self.assertRaises(sqlite3.OperationalError) as cm:
+                self.other.execute('BEGIN IMMEDIATE')
+            self.assertTrue(is_busy_error(cm.exception))
+
+    def test_retries_begin_while_busy(self):
+        self.other.execute('BEGIN IMMEDIATE')
+        transaction = self.db.transaction(SQLiteTransactionMode.IMMEDIATE)
+        with self.assertRaises(sqlite3.OperationalError):
+            with transaction:
+                pass
+        self.assertEqual(self.db.busy_retries, transaction.busy_retries)
+        self.assertEqual(self.db.busy_retries, self.db.transaction_stats.busy_retries)
+        self.other.rollback()
+        with self.db.transaction(SQLiteTransactionMode.IMMEDIATE):
+            self.db.insert('test_table', {'id': 1, 'body': 'a'})
+        self.assertEqual([1], self.get_ids())
+
+    def test_run_in_transaction_retries_call(self):
+        calls = []
+
+        def insert():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError('database is locked')
+            self.db.insert('test_table', {'id': len(calls), 'body': 'a'})
+            return len(calls)
+
+        self.assertEqual(3, self.db.run_in_transaction(insert))
+        self.assertEqual([3], self.get_ids())
+        self.assertEqual(2, self.db.transaction_stats.busy_retries)
+
+    def test_joins_implicit_transaction(self):
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE t (x)')
+        connection.execute('INSERT INTO t VALUES (1)')
+        with SQLiteTransaction(connection):
+            connection.execute('INSERT INTO t VALUES (2)')
+        self.assertFalse(connection.in_transaction)
+        connection.close()
+
+    def test_on_commit_after_outermost_commit(self):
+        called = []
+        with self.db.transaction():
+            SQLiteTransaction.on_commit(self.db.connection, lambda: called.append(1))
+            with self.assertRaises(ValueError):
+                with self.db.transaction():
+                    SQLiteTransaction.on_commit(
+                        self.db.connection, lambda: called.append(2)
+                    )
+                    raise ValueError
+            self.assertEqual([], called)
+        self.assertEqual([1], called)
+        SQLiteTransaction.on_commit(self.db.connection, lambda: called.append(3))
+        self.assertEqual([1, 3], called)
+
+
+class TestTransactionTelemetry(unittest.TestCase):
+    def setUp(self):
+        table = SQLiteTable(
+            'test_table',
+            columns=(IntColumn('id', is_primary_key=True), TextColumn('body')),
+        )
+        self.db = SQLiteDatabase(':memory:', tables=(table,))
+        self.db.do_creation()
+
+    def tearDown(self):
+        self.db.connection.close()
+
+    def test_records_rows_per_transaction(self):
+        with self.db.transaction():
+            self.db.insert('test_table', {'id': 0, 'body': 'a'})
+            self.db.insert_many('test_table', ['id', 'body'], [(1, 'b'), (2, 'c')])
+        timing = self.db.transaction_stats.recent[-1]
+        self.assertTrue(timing.committed)
+        self.assertEqual(3, timing.rows)
+        self.assertGreaterEqual(timing.duration, timing.commit_time)
+        self.assertEqual(3, self.db.transaction_stats.rows)
+
+    def test_rolled_back_savepoint_rows_not_counted(self):
+        with self.db.transaction():
+            self.db.insert_many('test_table', ['id', 'body'], [(1, 'a'), (2, 'b')])
+            with self.assertRaises(ValueError):
+                with self.db.transaction():
+                    self.db.insert('test_table', {'id': 3, 'body': 'c'})
+                    raise ValueError
+        self.assertEqual(2, self.db.transaction_stats.recent[-1].rows)
+
+    def test_write_lock_wait_recorded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'test.db')
+            db = SQLiteDatabase(path, tables=self.db.tables.values())
+            db.do_creation()
+            other = sqlite3.connect(path, check_same_thread=False)
+            other.execute('BEGIN IMMEDIATE')
+            release = threading.Timer(0.2, other.rollback)
+            release.start()
+            db.insert('test_table', {'id': 1, 'body': 'a'})
+            release.join()
+            timing = db.transaction_stats.recent[-1]
+            self.assertIs(SQLiteTransactionMode.IMMEDIATE, timing.mode)
+            self.assertGreaterEqual(timing.lock_wait, 0.1)
+            other.close()
+            db.connection.close()
+
+    def test_records_rollback(self):
+        rollbacks = self.db.transaction_stats.rollbacks
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.insert_many('test_table', ['id', 'body'], [(1, 'a'), (1, 'b')])
+        self.assertFalse(self.db.transaction_stats.recent[-1].committed)
+        self.assertEqual(rollbacks + 1, self.db.transaction_stats.rollbacks)
+        self.assertEqual(0, self.db.transaction_stats.rows)
+
+
+class TestBatchSizer(unittest.TestCase):
+    def test_adapts_to_latency(self):
+        sizer = SQLiteBatchSizer(0.1, size=1000, min_size=250, max_size=4000)
+        self.assertEqual(2000, sizer.observe(0.01))
+        self.assertEqual(4000, sizer.observe(0.01))
+        self.assertEqual(4000, sizer.observe(0.01))
+        self.assertEqual(4000, sizer.observe(0.07))
+        self.assertEqual(2000, sizer.observe(0.2))
+        for _ in range(4):
+            sizer.observe(0.2)
+        self.assertEqual(250, sizer.size)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            SQLiteBatchSizer(0.1, size=10, min_size=100)
+
+    def test_insert_many_commits_per_chunk(self):
+        table = SQLiteTable('test_table', columns=(IntColumn('id'),))
+        db = SQLiteDatabase(':memory:', tables=(table,), commit_latency_target=1.0)
+        db.do_creation()
+        db.batch_sizer = SQLiteBatchSizer(1.0, size=100, min_size=100, max_size=400)
+        commits = db.transaction_stats.commits
+        self.assertEqual(
+            1000, db.insert_many('test_table', ['id'], ((i,) for i in range(1000)))
+        )
+        self.assertEqual(
+            [100, 200, 400, 300],
+            [x.rows for x in db.transaction_stats.recent][-4:],
+        )
+        self.assertEqual(commits + 4, db.transaction_stats.commits)
+        db.connection.close()
@@ -0,0 +1,282 @@
+import random
+import sqlite3
+import time
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from .enums import SQLiteTransactionMode
+
+
+T = TypeVar('T')
+BUSY_ERROR_CODES = (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+
+
+def is_busy_error(error: Exception) -> bool:
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    error_code = getattr(error, 'sqlite_errorcode', None)
+    if error_code is not None:
+        return error_code & 0xff in BUSY_ERROR_CODES
+    return 'locked' in str(error)
+
+
+class SQLiteTransactionTiming(NamedTuple):
+    mode: SQLiteTransactionMode
+    lock_wait: float
+    commit_time: float
+    duration: float
+    busy_retries: int
+    rows: int
+    committed: bool
+
+
+class SQLiteTransactionStats(object):
+    """Counters and timings for the outermost transactions on one
+    database. lock_wait is the time spent in BEGIN, which only waits for
+    the write lock in IMMEDIATE or EXCLUSIVE mode.
+    """
+
+    def __init__(self, history: int = 100) -> None:
+        self.transactions = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.savepoints = 0
+        self.busy_retries = 0
+        self.rows = 0
+        self.lock_wait = 0.0
+        self.max_lock_wait = 0.0
+        self.commit_time = 0.0
+        self.max_commit_time = 0.0
+        self.recent: Deque[SQLiteTransactionTiming] = deque(maxlen=history)
+
+    def __repr__(self) -> str:
+        return (
+            '{!s}(transactions={!r}, commits={!r}, rollbacks={!r}, '
+            'savepoints={!r}, busy_retries={!r}, rows={!r})'
+        ).format(
+            self.__class__.__name__,
+            self.transactions,
+            self.commits,
+            self.rollbacks,
+            self.savepoints,
+            self.busy_retries,
+            self.rows,
+        )
+
+    @property
+    def rows_per_transaction(self) -> float:
+        return self.rows / self.commits if self.commits else 0.0
+
+    @property
+    def mean_commit_time(self) -> float:
+        return self.commit_time / self.commits if self.commits else 0.0
+
+    def record(self, timing: SQLiteTransactionTiming) -> None:
+        self.recent.append(timing)
+        self.lock_wait += timing.lock_wait
+        self.max_lock_wait = max(self.max_lock_wait, timing.lock_wait)
+        if timing.committed:
+            self.commits += 1
+            self.rows += timing.rows
+            self.commit_time += timing.commit_time
+            self.max_commit_time = max(self.max_commit_time, timing.commit_time)
+        else:
+            self.rollbacks += 1
+
+
+class SQLiteBatchSizer(object):
+    """Picks rows per transaction from recent commit times, doubling while
+    commits finish well under target_latency and halving when they
+    overrun it.
+    """
+
+    def __init__(
+        self,
+        target_latency: float,
+        size: int = 1000,
+        min_size: int = 100,
+        max_size: int = 100000,
+    ) -> None:
+        if not min_size <= size <= max_size:
+            raise ValueError('size must be between min_size and max_size')
+        self.target_latency = target_latency
+        self.size = size
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def observe(self, latency: float) -> int:
+        if latency > self.target_latency:
+            self.size = max(self.min_size, self.size // 2)
+        elif latency < self.target_latency / 2:
+            self.size = min(self.max_size, self.size * 2)
+        return self.size
+
+
+class SQLiteTransaction(object):
+    """A transaction scope on a connection. Nested scopes become
+    savepoints; BEGIN and COMMIT are retried while the database is busy.
+    """
+    active: Dict[int, 'SQLiteTransaction'] = {}
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        mode: SQLiteTransactionMode = SQLiteTransactionMode.DEFERRED,
+        retries: int = 5,
+        backoff: float = 0.005,
+        max_backoff: float = 0.5,
+        stats: Optional[SQLiteTransactionStats] = None,
+        begin_statements: Sequence[str] = (),
+    ) -> None:
+        self.connection = connection
+        self.begin_statements = begin_statements
+        self.mode = SQLiteTransactionMode(mode)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = stats or SQLiteTransactionStats()
+        self.outer: Optional[SQLiteTransaction] = None
+        self.savepoint: Optional[str] = None
+        self.depth = 0
+        self.busy_retries = 0
+        self.rows = 0
+        self.started_at = 0.0
+        self.lock_wait = 0.0
+        self.commit_time = 0.0
+        self.on_commit_funcs: List[Callable[[], Any]] = []
+        self.outer_on_commit_count = 0
+        self.outer_rows = 0
+
+    @classmethod
+    def add_rows(cls, connection: sqlite3.Connection, count: int) -> None:
+        """Count rows written in the transaction open on connection."""
+        transaction = cls.active.get(id(connection))
+        if transaction is not None:
+            transaction.rows += count
+
+    @classmethod
+    def on_commit(cls, connection: sqlite3.Connection, func: Callable[[], Any]) -> None:
+        """Call func once the transaction open on connection commits, or
+        now if there is none. func is dropped if the transaction, or the
+        savepoint it was added in, is rolled back.
+        """
+        transaction = cls.active.get(id(connection))
+        if transaction is None:
+            func()
+        else:
+            transaction.on_commit_funcs.append(func)
+
+    def retry_busy(self, func: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt >= self.retries:
+                    raise
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+            self.busy_retries += 1
+            self.stats.busy_retries += 1
+
+    def begin(self) -> None:
+        if not self.connection.in_transaction:
+            # Otherwise join the transaction sqlite3 already opened
+            # implicitly, as "with connection:" would.
+            self.retry_busy(
+                lambda: self.connection.execute(f'BEGIN {self.mode.value}')
+            )
+        for statement in self.begin_statements:
+            self.connection.execute(statement)
+
+    def __enter__(self) -> 'SQLiteTransaction':
+        self.outer = self.active.get(id(self.connection))
+        if self.outer is None:
+            self.rows = 0
+            self.commit_time = 0.0
+            self.on_commit_funcs = []
+            self.started_at = time.perf_counter()
+            self.begin()
+            self.lock_wait = time.perf_counter() - self.started_at
+            self.active[id(self.connection)] = self
+            self.stats.transactions += 1
+        else:
+            self.outer.depth += 1
+            self.outer_on_commit_count = len(self.outer.on_commit_funcs)
+            self.outer_rows = self.outer.rows
+            self.savepoint = f'sqlite_tables_{self.outer.depth}'
+            self.connection.execute(f'SAVEPOINT {self.savepoint}')
+            self.stats.savepoints += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.outer is not None:
+            self.exit_savepoint(exc_type is None)
+            return
+        del self.active[id(self.connection)]
+        committed = False
+        try:
+            if exc_type is None:
+                commit_started_at = time.perf_counter()
+                self.retry_busy(self.connection.commit)
+                self.commit_time = time.perf_counter() - commit_started_at
+                committed = True
+        finally:
+            if not committed:
+                self.connection.rollback()
+            self.stats.record(SQLiteTransactionTiming(
+                self.mode,
+                self.lock_wait,
+                self.commit_time,
+                time.perf_counter() - self.started_at,
+                self.busy_retries,
+                self.rows,
+                committed,
+            ))
+        on_commit_funcs, self.on_commit_funcs = self.on_commit_funcs, []
+        if committed:
+            for func in on_commit_funcs:
+                func()
+
+    def exit_savepoint(self, success: bool) -> None:
+        self.outer.depth -= 1
+        if not self.connection.in_transaction:
+            return
+        if not success:
+            self.connection.execute(f'ROLLBACK TO SAVEPOINT {self.savepoint}')
+            del self.outer.on_commit_funcs[self.outer_on_commit_count:]
+            self.outer.rows = self.outer_rows
+        self.connection.execute(f'RELEASE SAVEPOINT {self.savepoint}')
+
+    def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call func inside this transaction. If it is the outermost
+        scope, the whole call is retried when the database is busy.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self:
+                    return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if (
+                    self.outer is not None
+                    or not is_busy_error(e)
+                    or attempt >= self.retries
+                ):
+                    raise
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+            self.busy_retries += 1
+            self.stats.busy_retries += 1
@@ -1,3 +1,17 @@
+import datetime
+import json
+from functools import lru_cache
+from typing import (
+    Any,
+    Optional,
+    Sequence,
+    List,
+    Union,
+)
+
+from .enums import SQLiteTimeStorage
+
+
 def adapt_bool(boolean: bool) -> bytes:
     return str(int(boolean)).encode('ascii')
 
@@ -20,3 +34,165 @@ def convert_int_list(comma_separated_ints: bytes) -> IntList:
     if len(comma_separated_ints) == 0 or comma_separated_ints is None:
         return IntList([])
     return IntList(int(i) for i in comma_separated_ints.decode().split(','))
+
+
+def encode_bools(values: Sequence[Optional[bool]]) -> List[Optional[int]]:
+    return [None if value is None else int(value) for value in values]
+
+
+def decode_bools(values: Sequence[Union[int, bytes, None]]) -> List[Optional[bool]]:
+    """Accepts both native integers and the ASCII bytes written by
+    adapt_bool.
+    """
+    return [None if value is None else bool(int(value)) for value in values]
+
+
+def encode_int_lists(values: Sequence[Optional[list]]) -> List[Optional[str]]:
+    return [
+        None if value is None else ','.join(map(str, value)) for value in values
+    ]
+
+
+def decode_int_lists(
+    values: Sequence[Union[str, bytes, None]],
+) -> List[Optional[IntList]]:
+    decoded: List[Optional[IntList]] = []
+    for value in values:
+        if value is None:
+            decoded.append(None)
+        elif len(value) == 0:
+            decoded.append(IntList([]))
+        else:
+            if isinstance(value, bytes):
+                value = value.decode('ascii')
+            decoded.append(IntList(map(int, value.split(','))))
+    return decoded
+
+
+def dump_json(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def convert_json(value: bytes) -> Any:
+    return json.loads(value)
+
+
+def encode_jsons(values: Sequence[Any]) -> List[Optional[str]]:
+    return [None if value is None else dump_json(value) for value in values]
+
+
+def decode_jsons(values: Sequence[Union[str, bytes, None]]) -> List[Any]:
+    return [None if value is None else json.loads(value) for value in values]
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+JULIAN_DAY_AT_EPOCH = 2440587.5
+TEMPORAL_KINDS = ('datetime', 'date', 'time')
+TIME_UNITS = {
+    SQLiteTimeStorage.EPOCH_SECONDS: datetime.timedelta(seconds=1),
+    SQLiteTimeStorage.EPOCH_MILLISECONDS: datetime.timedelta(milliseconds=1),
+    SQLiteTimeStorage.JULIAN_DAY: datetime.timedelta(days=1),
+}
+NOW_SQL = {
+    ('datetime', SQLiteTimeStorage.EPOCH_SECONDS):
+        "CAST(strftime('%s', 'now') AS INTEGER)",
+    ('datetime', SQLiteTimeStorage.EPOCH_MILLISECONDS):
+        "CAST(round((julianday('now') - 2440587.5) * 86400000) AS INTEGER)",
+    ('datetime', SQLiteTimeStorage.JULIAN_DAY):
+        "julianday('now')",
+    ('date', SQLiteTimeStorage.EPOCH_SECONDS):
+        "CAST(strftime('%s', 'now', 'start of day') AS INTEGER)",
+    ('date', SQLiteTimeStorage.EPOCH_MILLISECONDS):
+        "CAST(strftime('%s', 'now', 'start of day') AS INTEGER) * 1000",
+    ('date', SQLiteTimeStorage.JULIAN_DAY):
+        "julianday('now', 'start of day')",
+    ('time', SQLiteTimeStorage.EPOCH_SECONDS):
+        "CAST(strftime('%s', 'now') AS INTEGER) % 86400",
+    ('time', SQLiteTimeStorage.EPOCH_MILLISECONDS):
+        "CAST(round((julianday('now') - julianday('now', 'start of day')) "
+        "* 86400000) AS INTEGER)",
+    ('time', SQLiteTimeStorage.JULIAN_DAY):
+        "julianday('now') - julianday('now', 'start of day')",
+}
+
+
+class TemporalCodec(object):
+    """Converts datetimes, dates or times to and from epoch seconds,
+    milliseconds or Julian days; decoded values are naive UTC.
+    """
+
+    def __init__(self, kind: str, storage: SQLiteTimeStorage) -> None:
+        if kind not in TEMPORAL_KINDS or storage not in TIME_UNITS:
+            raise ValueError(f'No temporal codec for {kind} stored as {storage}')
+        self.kind = kind
+        self.storage = storage
+        self.unit = TIME_UNITS[storage]
+        self.is_integer = storage is not SQLiteTimeStorage.JULIAN_DAY
+        self.offset = (
+            JULIAN_DAY_AT_EPOCH
+            if storage is SQLiteTimeStorage.JULIAN_DAY and kind != 'time'
+            else 0
+        )
+
+    def get_now_sql(self) -> str:
+        return NOW_SQL[(self.kind, self.storage)]
+
+    def to_datetime(self, value: Any) -> datetime.datetime:
+        if isinstance(value, str):
+            value = getattr(datetime, self.kind).fromisoformat(value)
+        if isinstance(value, datetime.datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            if self.kind == 'time':
+                return datetime.datetime.combine(EPOCH.date(), value.time())
+            return value
+        if isinstance(value, datetime.date):
+            return datetime.datetime(value.year, value.month, value.day)
+        if isinstance(value, datetime.time):
+            return datetime.datetime.combine(EPOCH.date(), value)
+        raise ValueError(f'Can not store {value!r} as a {self.kind}')
+
+    def encode(self, value: Any) -> Union[int, float, None]:
+        """Numbers are taken to be encoded already."""
+        if value is None or isinstance(value, (int, float)):
+            return value
+        delta = self.to_datetime(value) - EPOCH
+        if self.is_integer:
+            return delta // self.unit
+        return delta / self.unit + self.offset
+
+    def decode(self, value: Union[int, float, None]) -> Any:
+        if value is None:
+            return None
+        if self.is_integer:
+            decoded = EPOCH + self.unit * value
+        else:
+            # Julian days are floats; round to the millisecond so that
+            # decoding does not produce values like 07:08:09.122982.
+            milliseconds = round((value - self.offset) * 86400000)
+            decoded = EPOCH + datetime.timedelta(milliseconds=milliseconds)
+        if self.kind == 'date':
+            return decoded.date()
+        if self.kind == 'time':
+            return decoded.time()
+        return decoded
+
+    def convert(self, value: bytes) -> Any:
+        """Converter taking the bytes sqlite3 passes to converters."""
+        return self.decode(int(value) if self.is_integer else float(value))
+
+    def encode_batch(self, values: Sequence[Any]) -> List[Union[int, float, None]]:
+        encode = self.encode
+        return [encode(value) for value in values]
+
+    def decode_batch(self, values: Sequence[Union[int, float, None]]) -> List[Any]:
+        decode = self.decode
+        return [decode(value) for value in values]
+
+
+@lru_cache(maxsize=None)
+def get_temporal_codec(kind: str, storage: SQLiteTimeStorage) -> TemporalCodec:
+    """Codecs are shared, so columns with the same kind and storage have
+    the same converter.
+    """
+    return TemporalCodec(kind, storage)
@@ -1,5 +1,16 @@
+import io
 import re
+import itertools
+import pathlib
+from contextlib import contextmanager
 from string import Template
+from typing import (
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Union,
+)
 
 
 class SQLiteTemplate(Template):
@@ -10,3 +21,30 @@ class SQLiteTemplate(Template):
 
     def substitute(self, *args, **kwargs):
         return self.ws_pattern.sub('', super().substitute(*args, **kwargs))
+
+
+STREAM_BUFFER_SIZE = io.DEFAULT_BUFFER_SIZE * 128
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def open_text_stream(
+    target: Union[str, pathlib.Path, IO[str]],
+    mode: str,
+) -> Iterator[IO[str]]:
+    '''Open target if it is a path, otherwise yield it unchanged and
+    leave closing it to the caller.
+    '''
+    if isinstance(target, (str, pathlib.Path)):
+        with open(target, mode, newline='', buffering=STREAM_BUFFER_SIZE) as fd:
+            yield fd
+    else:
+        yield target